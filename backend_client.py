@@ -0,0 +1,391 @@
+import json
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import ProtocolError
+from urllib3.util.retry import Retry
+
+from metrics import gzip_size, metrics, parse_server_timing
+from resilience import (STALE_MIN_WAIT_SECONDS, STALE_WAIT_FACTOR, STALE_WHILE_REVALIDATE, CircuitOpenError,
+                        StaleResponse, circuit_breaker)
+from response_cache import compress_payload, decode_payload, make_cache_key, response_cache
+from scenario_store import scenario_store
+from scheduler import PRIORITY_INTERACTIVE, scheduler
+from section_stream import STREAM_CONTENT_TYPE, TruncatedStreamError, assemble_sections, read_sections
+from timeouts import CONNECT_TIMEOUT, DEFAULT_READ_TIMEOUT, READ_TIMEOUTS
+
+# Connection pool sizing (one pool per host, shared by all Streamlit sessions)
+POOL_CONNECTIONS = 4
+POOL_MAXSIZE = 16
+
+# Retry with exponential backoff only where the backend has not started the optimisation: failed
+# connects and throttled / unavailable answers. A read timeout or dropped connection after the request
+# was sent is never retried, as that would start the same optimisation again on every attempt.
+RETRY_TOTAL = 3
+RETRY_BACKOFF_FACTOR = 1.0
+RETRY_STATUS_CODES = (429, 503)
+
+# Response bodies are read from the socket in chunks of this size
+READ_CHUNK_SIZE = 64 * 1024
+
+# Identical requests (same endpoint and canonical body) already in flight share that one backend call
+COALESCE_REQUESTS = True
+
+# Callers that draw sections as they arrive ask for a streamed response (see section_stream.py).
+# Backends that ignore the Accept header keep answering with one JSON document.
+STREAM_SECTIONS = True
+
+
+class BackendError(Exception):
+    def __init__(self, status_code, detail=None, text=""):
+        self.status_code = status_code
+        self.detail = detail
+        self.text = text
+        super().__init__(detail or f"Request failed with status code: {status_code}")
+
+    @classmethod
+    def from_response(cls, response):
+        detail = None
+        try:
+            error_data = response.json()
+            if isinstance(error_data, dict):
+                detail = error_data.get("detail")
+        except ValueError:
+            pass
+        return cls(response.status_code, detail, response.text)
+
+
+def is_backend_failure(error):
+    # Errors that say the backend is down or overloaded, as opposed to a rejected request
+    if isinstance(error, BackendError):
+        return error.status_code >= 500 or error.status_code == 429
+    return isinstance(error, requests.exceptions.RequestException)
+
+
+class SingleFlight:
+    # Concurrent calls with the same key run once: the first caller executes the function,
+    # later callers block until it finishes and get the same result or exception
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, function, *args):
+        # Returns (result, shared) where shared is True for callers that joined another call
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+        if not leader:
+            return future.result(), True
+        try:
+            result = function(*args)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result, False
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+
+def run_in_thread(function, *args):
+    # Future of function(*args) running on a daemon thread of its own, so it can outlive the caller
+    future = Future()
+
+    def run():
+        future.set_running_or_notify_cancel()
+        try:
+            result = function(*args)
+        except BaseException as e:
+            future.set_exception(e)
+        else:
+            future.set_result(result)
+    threading.Thread(target=run, daemon=True).start()
+    return future
+
+
+def stale_wait(endpoint):
+    # Seconds a caller with a saved response waits for the fresh one (see resilience.py), or None
+    typical = metrics.quantile("fetch", endpoint, 0.95)
+    if typical is None:
+        return None
+    return max(STALE_MIN_WAIT_SECONDS, STALE_WAIT_FACTOR * typical)
+
+
+class SectionRelay:
+    # Passes a fresh call's sections on to the caller until it has been served a saved response instead
+    def __init__(self, on_section):
+        self.on_section = on_section
+        self.started = threading.Event()
+        self.detached = False
+
+    def __call__(self, path, value):
+        self.started.set()
+        if not self.detached:
+            self.on_section(path, value)
+
+
+class BackendClient:
+    def __init__(self, base_url, local_mode=False, apim_secret=None):
+        self.base_url = base_url
+        self.session = requests.Session()
+
+        retry = Retry(
+            total=RETRY_TOTAL,
+            read=False,  # Re-raises the read error (requests.ReadTimeout) instead of retrying
+            backoff_factor=RETRY_BACKOFF_FACTOR,
+            status_forcelist=RETRY_STATUS_CODES,
+            allowed_methods=frozenset(["POST"]),
+            respect_retry_after_header=True,
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE, max_retries=retry)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        # The local backend authenticates with the APIM secret header
+        if local_mode:
+            self.session.headers["P2X-APIM-Secret"] = apim_secret
+
+        # Shared by every session using this client, see get_backend_client
+        self.single_flight = SingleFlight()
+        self._refreshes = {}  # Cache key -> Future of a refresh waiting for an open circuit
+        self._refresh_lock = threading.Lock()
+
+    def timeout_for(self, endpoint):
+        return CONNECT_TIMEOUT, READ_TIMEOUTS.get(endpoint, DEFAULT_READ_TIMEOUT)
+
+    def post(self, endpoint, request_body, stages=None, stream_sections=False):
+        with metrics.timer("serialize", endpoint, stages):
+            parameters = json.dumps(request_body)
+        metrics.increment("request_bytes", endpoint, len(parameters))
+        headers = {"Accept": f"{STREAM_CONTENT_TYPE}, application/json;q=0.9"} if stream_sections else None
+        # Streamed so the body can be read without urllib3 decoding it first
+        with metrics.timer("wait", endpoint, stages):
+            return self.session.post(
+                f"{self.base_url}{endpoint}",
+                data={"parameters": parameters},
+                headers=headers,
+                timeout=self.timeout_for(endpoint),
+                stream=True
+            )
+
+    def calculate(self, endpoint, request_body, use_cache=True, priority=PRIORITY_INTERACTIVE, session_id=None):
+        # Returns (data, from_cache); raises BackendError on a non-200 response and CircuitOpenError while
+        # the endpoint's circuit is open. from_cache is a StaleResponse when a saved response is served.
+        data, from_cache, _ = self.calculate_with_payload(endpoint, request_body, use_cache, priority, session_id)
+        return data, from_cache
+
+    def calculate_with_payload(self, endpoint, request_body, use_cache=True, priority=PRIORITY_INTERACTIVE,
+                               session_id=None, tag=None, on_section=None):
+        # Returns (data, from_cache, payload) where payload is the gzip-compressed JSON body.
+        # priority, session_id and tag place a backend call in the admission queue (scheduler.py).
+        # on_section(path, value) is called for each section of a streamed response as it arrives;
+        # it is not called for cached, stale or coalesced results.
+        stages = {}
+        admission = (priority, session_id, tag)
+        try:
+            with metrics.timer("calculate", endpoint, stages):
+                data, from_cache, payload = self._calculate(endpoint, request_body, use_cache, stages, admission,
+                                                            on_section)
+        except Exception:
+            metrics.increment("errors", endpoint)
+            raise
+        if isinstance(from_cache, StaleResponse):
+            metrics.increment("stale", endpoint)
+        elif use_cache:
+            metrics.increment("cache_hits" if from_cache else "cache_misses", endpoint)
+        if not from_cache:
+            metrics.increment("response_bytes", endpoint, len(payload))
+            metrics.increment("response_json_bytes", endpoint, gzip_size(payload))
+        metrics.log_calculation(endpoint, from_cache, stages, request_body, payload)
+        return data, from_cache, payload
+
+    def _calculate(self, endpoint, request_body, use_cache, stages, admission, on_section):
+        if use_cache:
+            payload = response_cache.get_payload(endpoint, request_body)
+            if payload is not None:
+                with metrics.timer("decode", endpoint, stages):
+                    data = decode_payload(payload)
+                return data, True, payload
+
+        if not (use_cache and STALE_WHILE_REVALIDATE):
+            return self._calculate_fresh(endpoint, request_body, stages, admission, on_section)
+
+        # The fresh call runs on a thread of its own, in the caller's scheduler priority class. The caller
+        # waits stale_wait(endpoint) for it; after that, or when the call fails or the endpoint's circuit is
+        # open, the response saved for this request is served instead, marked as stale. The fresh call
+        # keeps running and stores its response, so the next submit of this request gets it.
+        fresh_stages = {}
+        relay = SectionRelay(on_section) if on_section is not None else None
+        fresh = run_in_thread(self._calculate_fresh, endpoint, request_body, fresh_stages, admission, relay)
+        wait = stale_wait(endpoint)
+        try:
+            try:
+                result = fresh.result(timeout=wait)
+            except FutureTimeoutError:
+                stale = scenario_store.latest_payload(make_cache_key(endpoint, request_body))
+                # Once sections are arriving the backend is answering, so the fresh result is worth the wait
+                if stale is not None and not (relay is not None and relay.started.is_set()):
+                    if relay is not None:
+                        relay.detached = True
+                    return self._serve_stale(endpoint, stages, stale,
+                                             f"the backend has not answered within {wait:.1f} s", fresh)
+                result = fresh.result()
+        except Exception as e:
+            if not (isinstance(e, CircuitOpenError) or is_backend_failure(e)):
+                raise
+            stale = scenario_store.latest_payload(make_cache_key(endpoint, request_body))
+            if stale is None:
+                raise
+            if isinstance(e, CircuitOpenError):
+                reason = f"requests to the {e.endpoint.upper()} backend are paused after repeated failures"
+                return self._serve_stale(endpoint, stages, stale, reason,
+                                         self._refresh_later(endpoint, request_body, admission, e.retry_in))
+            return self._serve_stale(endpoint, stages, stale, f"the backend failed ({e})")
+        stages.update(fresh_stages)
+        return result
+
+    def _serve_stale(self, endpoint, stages, stale, reason, refresh=None):
+        payload, saved_at = stale
+        with metrics.timer("decode", endpoint, stages):
+            data = decode_payload(payload)
+        return data, StaleResponse(saved_at, reason, refresh), payload
+
+    def _refresh_later(self, endpoint, request_body, admission, delay):
+        # While the circuit is open, one refresh per request is started once it lets a probe call through
+        key = make_cache_key(endpoint, request_body)
+        with self._refresh_lock:
+            refresh = self._refreshes.get(key)
+            if refresh is None:
+                refresh = self._refreshes[key] = run_in_thread(self._refresh, key, endpoint, request_body,
+                                                                admission, delay)
+        return refresh
+
+    def _refresh(self, key, endpoint, request_body, admission, delay):
+        try:
+            time.sleep(delay)
+            return self._calculate_fresh(endpoint, request_body, {}, admission, None)
+        finally:
+            with self._refresh_lock:
+                del self._refreshes[key]
+
+    def _calculate_fresh(self, endpoint, request_body, stages, admission, on_section):
+        if not COALESCE_REQUESTS:
+            data, payload = self._fetch(endpoint, request_body, stages, admission, on_section)
+            return data, False, payload
+        # Only the caller that makes the backend call gets its sections streamed
+        (data, payload), shared = self.single_flight.do(make_cache_key(endpoint, request_body), self._fetch,
+                                                        endpoint, request_body, stages, admission, on_section)
+        if not shared:
+            return data, False, payload
+        # Joined another session's call: no backend call of its own, so it counts like a cache hit.
+        # The response is decoded again so sessions never share one mutable object.
+        metrics.increment("coalesced", endpoint)
+        with metrics.timer("decode", endpoint, stages):
+            data = decode_payload(payload)
+        return data, True, payload
+
+    def _fetch(self, endpoint, request_body, stages, admission, on_section=None):
+        # An open circuit rejects the call before it takes an admission token
+        breaker = circuit_breaker(endpoint)
+        if not breaker.allow():
+            metrics.increment("circuit_rejected", endpoint)
+            raise CircuitOpenError(endpoint, breaker.retry_in())
+        # The slot is held until the body is read, the rate token is spent on admission
+        data = None
+        try:
+            with metrics.timer("admission", endpoint, stages):
+                scheduler.acquire(*admission)
+            try:
+                sent = time.perf_counter()
+                response = self.post(endpoint, request_body, stages, STREAM_SECTIONS and on_section is not None)
+                try:
+                    if response.status_code != 200:
+                        raise BackendError.from_response(response)
+                    backend_seconds = parse_server_timing(response.headers.get("Server-Timing"))
+                    if backend_seconds is not None:
+                        metrics.observe("backend", endpoint, backend_seconds)
+                        stages["backend"] = backend_seconds
+                    with metrics.timer("download", endpoint, stages):
+                        if is_section_stream(response):
+                            data, payload = read_section_stream(response, endpoint, stages, on_section)
+                        else:
+                            payload = read_payload(response)
+                finally:
+                    response.close()
+            finally:
+                scheduler.release()
+        except Exception as e:
+            if is_backend_failure(e):
+                breaker.record_failure()
+            else:
+                breaker.record_success()
+            raise
+        breaker.record_success()
+
+        if data is None:
+            with metrics.timer("decode", endpoint, stages):
+                data = decode_payload(payload)
+        stages["fetch"] = time.perf_counter() - sent
+        metrics.observe("fetch", endpoint, stages["fetch"])
+        response_cache.set_payload(endpoint, request_body, payload)
+        scenario_store.save(endpoint, request_body, payload, data)
+        return data, payload
+
+
+def read_payload(response):
+    # requests advertises gzip/deflate (plus br when the optional brotli package is installed).
+    # gzip bodies are kept exactly as they came off the wire; anything else is decoded by
+    # urllib3 and gzip-compressed once, so callers always get the same payload format
+    encoding = response.headers.get("Content-Encoding", "").strip().lower()
+    if encoding == "gzip":
+        return b"".join(response.raw.stream(READ_CHUNK_SIZE, decode_content=False))
+    return compress_payload(b"".join(response.raw.stream(READ_CHUNK_SIZE, decode_content=True)))
+
+
+def is_section_stream(response):
+    return response.headers.get("Content-Type", "").split(";")[0].strip().lower() == STREAM_CONTENT_TYPE
+
+
+def read_section_stream(response, endpoint, stages, on_section=None):
+    # Returns (data, payload). Sections are parsed as their lines complete, so the JSON decoding
+    # happens during the download; the payload is re-encoded into the usual gzip-compressed format.
+    # A stream cut off early fails like any other dropped connection (a RequestException), so the
+    # circuit breaker counts it and a saved response can be served instead of the partial one.
+    started = time.perf_counter()
+    sections = []
+    try:
+        for path, value in read_sections(response.raw.stream(READ_CHUNK_SIZE, decode_content=True)):
+            if not sections:
+                stages["first_section"] = time.perf_counter() - started
+                metrics.observe("first_section", endpoint, stages["first_section"])
+            sections.append((path, value))
+            if on_section is not None:
+                on_section(path, value)
+    except (TruncatedStreamError, ProtocolError) as e:
+        raise requests.exceptions.ChunkedEncodingError(
+            f"The {endpoint} response stream ended early after {len(sections)} section(s): {e}") from e
+    data = assemble_sections(sections)
+    return data, compress_payload(json.dumps(data, separators=(",", ":"), ensure_ascii=False).encode("utf-8"))
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_backend_client(BE_URL, LOCAL_MODE, P2X_APIM_SECRET):
+    # One pooled client per backend configuration, shared across sessions
+    key = (BE_URL, LOCAL_MODE, P2X_APIM_SECRET)
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            client = BackendClient(BE_URL, LOCAL_MODE, P2X_APIM_SECRET)
+            _clients[key] = client
+        return client
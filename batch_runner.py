@@ -0,0 +1,117 @@
+import itertools
+import math
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import pandas as pd
+
+from scheduler import PRIORITY_BATCH, current_session_id
+
+# Bounded worker pool: enough to overlap backend calls without flooding APIM
+BATCH_MAX_WORKERS = 8
+BATCH_MAX_SCENARIOS = 500
+
+
+def parse_sweep_values(text, cast=float):
+    # Accepts "start:stop:step" (inclusive) or a comma separated list; empty text means no sweep.
+    # Repeated values are dropped so the grid has no duplicate scenarios
+    text = (text or "").strip()
+    if not text:
+        return []
+    if ":" in text:
+        parts = [_sweep_number(p) for p in text.split(":")]
+        if len(parts) != 3 or parts[2] <= 0 or parts[1] < parts[0]:
+            raise ValueError(f"Invalid range '{text}', expected start:stop:step")
+        start, stop, step = parts
+        count = int(round((stop - start) / step)) + 1
+        values = [round(start + i * step, 10) for i in range(count)]
+        values = [_cast_number(value, cast, f"{value:g}") for value in values]
+    else:
+        values = [_cast_number(_sweep_number(v), cast, v.strip()) for v in text.split(",") if v.strip()]
+    return list(dict.fromkeys(values))
+
+
+def _sweep_number(text):
+    try:
+        number = float(text)
+    except ValueError:
+        raise ValueError(f"'{text.strip()}' is not a number") from None
+    if not math.isfinite(number):
+        raise ValueError(f"'{text.strip()}' is not a finite number")
+    return number
+
+
+def _cast_number(number, cast, text):
+    # Integer parameters (N_cycles_ID) take whole numbers only instead of silently truncating
+    if cast is int and not number.is_integer():
+        raise ValueError(f"'{text}' is not a whole number")
+    return cast(number)
+
+
+def build_grid(sweeps):
+    # Cartesian product of {parameter: [values]} as a list of override dicts
+    sweeps = {key: values for key, values in sweeps.items() if values}
+    if not sweeps:
+        return []
+    keys = list(sweeps)
+    return [dict(zip(keys, combo)) for combo in itertools.product(*sweeps.values())]
+
+
+def read_scenario_csv(uploaded_file, base_request_body):
+    # Each CSV row overrides the matching request body keys; values keep the base value type
+    df = pd.read_csv(uploaded_file)
+    # pandas reads a repeated column "Q_max" as "Q_max.1"
+    duplicates = [col.rpartition(".")[0] for col in df.columns if col not in base_request_body
+                  and col.rpartition(".")[0] in base_request_body and col.rpartition(".")[2].isdigit()]
+    if duplicates:
+        raise ValueError(f"Duplicate parameter columns: {', '.join(dict.fromkeys(duplicates))}")
+    unknown = [col for col in df.columns if col not in base_request_body]
+    if unknown:
+        raise ValueError(f"Unknown parameter columns: {', '.join(unknown)}")
+    rows = []
+    for number, record in enumerate(df.to_dict("records"), start=1):
+        rows.append({key: _csv_value(value, base_request_body[key], number, key) for key, value in record.items()})
+    return rows
+
+
+def _csv_value(value, base_value, row, column):
+    # Empty cells are errors rather than NaN parameters sent to the backend
+    if isinstance(value, float) and math.isnan(value):
+        raise ValueError(f"Row {row}: missing value for {column}")
+    if isinstance(base_value, str):
+        return str(value)
+    try:
+        number = float(value)
+    except ValueError:
+        raise ValueError(f"Row {row}: '{value}' is not a number for {column}") from None
+    if not math.isfinite(number):
+        raise ValueError(f"Row {row}: '{value}' is not a finite number for {column}")
+    if isinstance(base_value, int) and not number.is_integer():
+        raise ValueError(f"Row {row}: {column} takes whole numbers, got '{value}'")
+    return type(base_value)(number)
+
+
+def apply_overrides(base_request_body, overrides):
+    request_body = dict(base_request_body)
+    request_body.update(overrides)
+    return request_body
+
+
+def run_batch(client, endpoint, request_bodies, max_workers=BATCH_MAX_WORKERS, priority=PRIORITY_BATCH):
+    # Yields (index, data, error) in completion order so callers can render partial results.
+    # Backend calls queue behind interactive submits and take turns with other sessions' batches.
+    session_id = current_session_id()
+    pool = ThreadPoolExecutor(max_workers=max_workers)
+    try:
+        futures = {pool.submit(client.calculate, endpoint, body, priority=priority, session_id=session_id): index
+                   for index, body in enumerate(request_bodies)}
+        for future in as_completed(futures):
+            index = futures[future]
+            try:
+                data, _ = future.result()
+                yield index, data, None
+            except Exception as e:
+                yield index, None, e
+    finally:
+        # Drop queued scenarios if the consumer stops early (e.g. a Streamlit rerun)
+        pool.shutdown(wait=False, cancel_futures=True)
+
@@ -1,15 +1,29 @@
 import streamlit as st
-import requests
-import json
-import plotly.express as px
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
+import time
+import pandas as pd
+
+from backend_client import get_backend_client
+from job_manager import render_jobs, render_saved_scenarios, submit_job
+from market_tables import BALANCING_AND_TRADING_MARKETS, render_market_tabs
+from response_diff import render_response_diff
+from result_views import (LAST_RUN_NOTE, last_run, last_run_inputs, pending_tabs, remember_run, render_tabs,
+                          response_memo, run_memo)
+from sensitivity import render_sensitivity, render_sensitivity_inputs
+from batch_runner import (BATCH_MAX_SCENARIOS, apply_overrides, build_grid, parse_sweep_values, read_scenario_csv,
+                          run_batch)
+from dcf import break_even_year, final_npv
 
 
 def render_beks_calculator(BE_URL, LOCAL_MODE, P2X_APIM_SECRET):
     st.header("BEKS Demo")
     st.write("Fill in the form below to submit a request to the BEKS API.")
 
+    # Single scenario or a batch sweep over the sizing parameters
+    beks_mode = st.radio("Mode", ["Single scenario", "Batch sweep", "Sensitivity"], horizontal=True, key="beks_mode")
+    if beks_mode == "Batch sweep":
+        batch_source = st.radio("Batch scenarios from", ["Parameter ranges", "CSV upload"], horizontal=True,
+                                key="beks_batch_source")
+
     # Create form for input parameters
     with st.form("beks_input_form"):
         st.header("Input Parameters")
@@ -84,6 +98,27 @@ def render_beks_calculator(BE_URL, LOCAL_MODE, P2X_APIM_SECRET):
         with col11:
             p_mffrd_bsp = st.number_input("mFRRd", value=0.0, step=1.0, key="mfrrd_energy")
 
+        if beks_mode == "Batch sweep":
+            st.subheader("Batch Sweep")
+            if batch_source == "Parameter ranges":
+                st.info("Enter start:stop:step or comma separated values. Empty fields keep the single value above. "
+                        "All combinations are submitted.")
+                col12, col13, col14, col15 = st.columns(4)
+                with col12:
+                    sweep_q_max = st.text_input("Q_max values (MWh)", value="0.5:2.0:0.5", key="beks_sweep_q_max")
+                with col13:
+                    sweep_q_total = st.text_input("Q_total values (MWh)", value="1.0:4.0:1.0", key="beks_sweep_q_total")
+                with col14:
+                    sweep_n_cycles_id = st.text_input("N_cycles_ID values", value="", key="beks_sweep_n_cycles_id")
+                with col15:
+                    sweep_rte = st.text_input("RTE values (%)", value="", key="beks_sweep_rte")
+            else:
+                scenario_file = st.file_uploader(
+                    "Scenario CSV - one row per scenario, columns named as request parameters (e.g. Q_max,Q_total,N_cycles_ID)",
+                    type="csv", key="beks_scenario_csv")
+        elif beks_mode == "Sensitivity":
+            sensitivity_parameters, sensitivity_percent = render_sensitivity_inputs("beks")
+
         # Submit button
         submit_button = st.form_submit_button("Submit")
 
@@ -117,867 +152,413 @@ def render_beks_calculator(BE_URL, LOCAL_MODE, P2X_APIM_SECRET):
             "Sector": sector
         }
 
+        if beks_mode == "Batch sweep":
+            try:
+                if batch_source == "Parameter ranges":
+                    scenario_rows = build_grid({
+                        "Q_max": parse_sweep_values(sweep_q_max),
+                        "Q_total": parse_sweep_values(sweep_q_total),
+                        "N_cycles_ID": parse_sweep_values(sweep_n_cycles_id, int),
+                        "RTE": parse_sweep_values(sweep_rte)
+                    })
+                else:
+                    scenario_rows = read_scenario_csv(scenario_file, request_body) if scenario_file else []
+            except ValueError as e:
+                st.error(f"Invalid batch definition: {str(e)}")
+                return
+
+            render_beks_batch(BE_URL, LOCAL_MODE, P2X_APIM_SECRET, request_body, scenario_rows)
+            return
+        if beks_mode == "Sensitivity":
+            render_sensitivity(BE_URL, LOCAL_MODE, P2X_APIM_SECRET, "beks", request_body, sensitivity_parameters,
+                               sensitivity_percent)
+            return
+
         # Display the request body
         with st.expander("Request Body"):
             st.json(request_body)
 
-        # Make the POST request
-        with st.spinner("Processing request..."):
-            try:
-                # Build headers for local mode
-                headers = {}
-                if LOCAL_MODE:
-                    headers["P2X-APIM-Secret"] = P2X_APIM_SECRET
-
-                response = requests.post(f"{BE_URL}beks", data={"parameters": json.dumps(request_body)}, headers=headers)
-
-                # Check if the request was successful
-                if response.status_code == 200:
-                    # Parse the response
-                    data = response.json()
-
-                    # Display success message
-                    st.success("Request successful!")
-
-                    # Add download button for the JSON response
-                    st.download_button(
-                        label="Download JSON",
-                        data=json.dumps(data, indent=2),
-                        file_name="response.json",
-                        mime="application/json"
-                    )
-
-                    # VISUALIZATION SECTION
-                    st.header("Visualization")
-
-                    # Create tabs for different visualizations
-                    tab1, tab2, tab3 = st.tabs(["Summary", "Market Details", "Economic Results"])
-
-                    with tab1:
-                        st.subheader("SUMMARY")
-
-                        # YEARLY SUMMARY TABLE
-                        st.write("##### YEARLY SUMMARY")
-                        yearly_summary_table = data['aggregated']['summary']['yearly_summary_table']
-                        # Format values with units
-                        for row in yearly_summary_table:
-                            if 'Value' in row and isinstance(row['Value'], (int, float)):
-                                value = row['Value']
-                                sign = "+" if value > 0 else ""
-                                row['Value'] = f"{sign}{value:.2f} tūkst. EUR/year"
-                        st.table(yearly_summary_table)
-
-                        # PROJECT LIFETIME SUMMARY TABLE
-                        st.write("##### PROJECT (LIFETIME) SUMMARY")
-                        project_summary_table = data['aggregated']['summary']['project_summary_table']
-                        # Format values with units
-                        for row in project_summary_table:
-                            if 'Value' in row and isinstance(row['Value'], (int, float)):
-                                value = row['Value']
-                                sign = "+" if value > 0 else ""
-                                row['Value'] = f"{sign}{value:.2f} tūkst. EUR"
-                        st.table(project_summary_table)
-
-                        st.write("##### SUPPLEMENTED WITH GRAPHS")
-
-                        col1, col2 = st.columns(2)
-
-                        with col1:
-                            # NET PRESENT VALUE ANALYSIS CHART
-                            npv_data = data['aggregated']['summary']['npv_chart_data']
-
-                            # Create a figure with secondary y-axis
-                            fig_npv = make_subplots(
-                                specs=[[{"secondary_y": True}]]
-                            )
-
-                            # Add bar chart for discounted cash flows
-                            fig_npv.add_trace(
-                                go.Bar(
-                                    x=npv_data['years'],
-                                    y=npv_data['dcfs'],
-                                    name="Discounted Cash Flow",
-                                    marker_color="lightblue",
-                                    opacity=0.7
-                                ),
-                                secondary_y=False,
-                            )
-
-                            # Add line for cumulative NPV
-                            fig_npv.add_trace(
-                                go.Scatter(
-                                    x=npv_data['years'],
-                                    y=npv_data['npv'],
-                                    mode="lines+markers",
-                                    name="Cumulative NPV",
-                                    line=dict(color="red", width=3)
-                                ),
-                                secondary_y=True,
-                            )
-
-                            # Highlight break-even point
-                            if npv_data['break_even_point'] is not None:
-                                break_even_year = npv_data['years'][npv_data['break_even_point']]
-                                break_even_value = npv_data['npv'][npv_data['break_even_point']]
-
-                                fig_npv.add_scatter(
-                                    x=[break_even_year],
-                                    y=[break_even_value],
-                                    mode="markers",
-                                    marker=dict(size=10, color="green"),
-                                    name="Break-even Point",
-                                    secondary_y=True
-                                )
-
-                            # Update layout
-                            fig_npv.update_xaxes(title_text="Year")
-                            fig_npv.update_yaxes(title_text="Discounted Cash Flow (tūkst. EUR)", secondary_y=False)
-                            fig_npv.update_yaxes(title_text="Cumulative NPV (tūkst. EUR)", secondary_y=True)
-                            fig_npv.update_layout(
-                                title="NET PRESENT VALUE ANALYSIS",
-                                hovermode='x unified'
-                            )
-
-                            st.plotly_chart(fig_npv, use_container_width=True)
-
-                        with col2:
-                            # REVENUE vs COST BY PRODUCTS CHART
-                            rev_cost_data = data['aggregated']['summary']['revenue_cost_chart_data']
-                            fig_rev_cost = px.bar(
-                                x=rev_cost_data['products'],
-                                y=rev_cost_data['values'],
-                                labels={"x": "Product", "y": "Value (tūkst. EUR)"},
-                                title="REVENUE vs COST BY PRODUCTS"
-                            )
-
-                            fig_rev_cost.update_traces(hovertemplate='%{y:,.2f}<extra></extra>')
-                            st.plotly_chart(fig_rev_cost, use_container_width=True)
-
-                        col3, col4 = st.columns(2)
-
-                        with col3:
-                            # UTILISATION (% TIME) BY PRODUCTS CHART
-                            util_data = data['aggregated']['summary']['utilisation_chart_data']
-                            fig_util = px.bar(
-                                x=util_data['products'],
-                                y=util_data['values'],
-                                labels={"x": "Product", "y": "Utilisation (%)"},
-                                title="UTILISATION (% TIME) BY PRODUCTS"
-                            )
-
-                            fig_util.update_traces(hovertemplate='%{y:,.2f}<extra></extra>')
-                            st.plotly_chart(fig_util, use_container_width=True)
-
-                    with tab2:
-                        st.subheader("MARKET DETAILS")
-
-                        # Add CSS for all market table styles - MADE MORE COMPACT
-                        st.markdown("""
-                        <style>
-                        /* Common table styles - COMPACT VERSION */
-                        .market-table {
-                            width: 100%;
-                            border-collapse: collapse;
-                            margin-bottom: 0px;
-                            font-size: 12px;
-                        }
-                        .market-table td {
-                            padding: 3px;
-                            text-align: center;
-                        }
-                        .market-table th {
-                            padding: 3px;
-                            text-align: center;
-                            font-weight: bold;
-                        }
-
-                        /* Power market styles */
-                        .power-table td {
-                            background-color: #E0F0F5;
-                        }
-                        .power-header {
-                            font-weight: bold;
-                            background-color: #C5E0E8 !important;
-                        }
-                        .power-direction-header {
-                            background-color: #D5E8EF !important;
-                        }
-                        .power-market-title {
-                            background-color: #3D7890;
-                            color: white;
-                            padding: 5px;
-                            margin: 0;
-                            height: auto;
-                            font-size: 14px;
-                        }
-
-                        /* Energy market styles */
-                        .energy-table td {
-                            background-color: #E6F5EC;
-                        }
-                        .energy-header {
-                            font-weight: bold;
-                            background-color: #D0EAD9 !important;
-                        }
-                        .energy-direction-header {
-                            background-color: #DCF0E2 !important;
-                        }
-                        .energy-market-title {
-                            background-color: #4D9D6A;
-                            color: white;
-                            padding: 5px;
-                            margin: 0;
-                            height: auto;
-                            font-size: 14px;
-                        }
-
-                        /* Trading market styles */
-                        .trading-table td {
-                            background-color: #EFF5D8;
-                        }
-                        .trading-header {
-                            font-weight: bold;
-                            background-color: #E5ECC5 !important;
-                        }
-                        .trading-direction-header {
-                            background-color: #EAEFCE !important;
-                        }
-                        .trading-market-title {
-                            background-color: #8CB63C;
-                            color: white;
-                            padding: 5px;
-                            margin: 0;
-                            height: auto;
-                            font-size: 14px;
-                        }
-
-                        /* Compact rows */
-                        .row-compact {
-                            margin-bottom: 0px !important;
-                            padding: 0px !important;
-                        }
-
-                        /* Remove margin between hr tags */
-                        hr {
-                            margin: 5px 0 !important;
-                        }
-                        </style>
-                        """, unsafe_allow_html=True)
-
-                        # Create subtabs for each market
-                        market_tabs = st.tabs([
-                            "BALANSAVIMO PAJĖGUMŲ RINKA",
-                            "BALANSAVIMO ENERGIJOS RINKA",
-                            "ELEKTROS ENERGIJOS PREKYBA"
-                        ])
-
-                        # Tab 1: Power Balancing Market
-                        with market_tabs[0]:
-                            balansavimo_pajegumu_data = data['aggregated']['markets']['BALANSAVIMO_PAJEGUMU_RINKA']
-
-                            # FCR section
-                            fcr_data = balansavimo_pajegumu_data['FCR']
-                            col1, col2 = st.columns([1, 5])
-
-                            with col1:
-                                st.markdown(
-                                    f"""
-                                    <div class="power-market-title">
-                                    <h4 style="margin:0;">{fcr_data['header']}</h4>
-                                    <small>{fcr_data['description']}</small>
-                                    </div>
-                                    """,
-                                    unsafe_allow_html=True
-                                )
-
-                            with col2:
-                                # Create the FCR table layout with ACTUAL VALUES
-                                st.markdown(
-                                    f"""
-                                    <table class="market-table power-table">
-                                        <tr>
-                                            <th class="power-header">{fcr_data['volume_of_procured_reserves']['header']}</th>
-                                        </tr>
-                                        <tr>
-                                            <td>{fcr_data['volume_of_procured_reserves']['value']:.2f} MW</td>
-                                        </tr>
-                                    </table>
-
-                                    <table class="market-table power-table">
-                                        <tr>
-                                            <th class="power-header">{fcr_data['utilisation']['header']}</th>
-                                        </tr>
-                                        <tr>
-                                            <td>{fcr_data['utilisation']['value']:.2f} %</td>
-                                        </tr>
-                                    </table>
-
-                                    <table class="market-table power-table">
-                                        <tr>
-                                            <th class="power-header">{fcr_data['potential_revenue']['header']}</th>
-                                        </tr>
-                                        <tr>
-                                            <td>{fcr_data['potential_revenue']['value']:.2f} {fcr_data['potential_revenue']['unit']}</td>
-                                        </tr>
-                                    </table>
-
-                                    <table class="market-table power-table">
-                                        <tr>
-                                            <th class="power-header">{fcr_data['bids_selected']['header']}</th>
-                                        </tr>
-                                        <tr>
-                                            <td>{fcr_data['bids_selected']['value']:.2f} %</td>
-                                        </tr>
-                                    </table>
-                                    """,
-                                    unsafe_allow_html=True
-                                )
-
-                            st.markdown("<hr>", unsafe_allow_html=True)
-
-                            # aFRR section
-                            afrr_data = balansavimo_pajegumu_data['aFRR']
-                            col1, col2 = st.columns([1, 5])
-
-                            with col1:
-                                st.markdown(
-                                    f"""
-                                    <div class="power-market-title">
-                                    <h4 style="margin:0;">{afrr_data['header']}</h4>
-                                    <small>{afrr_data['description']}</small>
-                                    </div>
-                                    """,
-                                    unsafe_allow_html=True
-                                )
-
-                            with col2:
-                                st.markdown(
-                                    f"""
-                                    <table class="market-table power-table">
-                                        <tr>
-                                            <th class="power-header" colspan="2">{afrr_data['volume_of_procured_reserves']['header']}</th>
-                                        </tr>
-                                        <tr>
-                                            <th class="power-direction-header">UPWARD</th>
-                                            <th class="power-direction-header">DOWNWARD</th>
-                                        </tr>
-                                        <tr>
-                                            <td>{afrr_data['volume_of_procured_reserves']['upward']['value']:.2f} MW</td>
-                                            <td>{afrr_data['volume_of_procured_reserves']['downward']['value']:.2f} MW</td>
-                                        </tr>
-                                    </table>
-
-                                    <table class="market-table power-table">
-                                        <tr>
-                                            <th class="power-header" colspan="2">{afrr_data['utilisation']['header']}</th>
-                                        </tr>
-                                        <tr>
-                                            <th class="power-direction-header">UPWARD</th>
-                                            <th class="power-direction-header">DOWNWARD</th>
-                                        </tr>
-                                        <tr>
-                                            <td>{afrr_data['utilisation']['upward']['value']:.2f} %</td>
-                                            <td>{afrr_data['utilisation']['downward']['value']:.2f} %</td>
-                                        </tr>
-                                    </table>
-
-                                    <table class="market-table power-table">
-                                        <tr>
-                                            <th class="power-header" colspan="2">{afrr_data['potential_revenue']['header']}</th>
-                                        </tr>
-                                        <tr>
-                                            <th class="power-direction-header">UPWARD</th>
-                                            <th class="power-direction-header">DOWNWARD</th>
-                                        </tr>
-                                        <tr>
-                                            <td>{afrr_data['potential_revenue']['upward']['value']:.2f} {afrr_data['potential_revenue']['upward']['unit']}</td>
-                                            <td>{afrr_data['potential_revenue']['downward']['value']:.2f} {afrr_data['potential_revenue']['downward']['unit']}</td>
-                                        </tr>
-                                    </table>
-
-                                    <table class="market-table power-table">
-                                        <tr>
-                                            <th class="power-header" colspan="2">{afrr_data['bids_selected']['header']}</th>
-                                        </tr>
-                                        <tr>
-                                            <th class="power-direction-header">UPWARD</th>
-                                            <th class="power-direction-header">DOWNWARD</th>
-                                        </tr>
-                                        <tr>
-                                            <td>{afrr_data['bids_selected']['upward']['value']:.2f} %</td>
-                                            <td>{afrr_data['bids_selected']['downward']['value']:.2f} %</td>
-                                        </tr>
-                                    </table>
-                                    """,
-                                    unsafe_allow_html=True
-                                )
-
-                            st.markdown("<hr>", unsafe_allow_html=True)
-
-                            # mFRR section
-                            mfrr_data = balansavimo_pajegumu_data['mFRR']
-                            col1, col2 = st.columns([1, 5])
-
-                            with col1:
-                                st.markdown(
-                                    f"""
-                                    <div class="power-market-title">
-                                    <h4 style="margin:0;">{mfrr_data['header']}</h4>
-                                    <small>{mfrr_data['description']}</small>
-                                    </div>
-                                    """,
-                                    unsafe_allow_html=True
-                                )
-
-                            with col2:
-                                st.markdown(
-                                    f"""
-                                    <table class="market-table power-table">
-                                        <tr>
-                                            <th class="power-header" colspan="2">{mfrr_data['volume_of_procured_reserves']['header']}</th>
-                                        </tr>
-                                        <tr>
-                                            <th class="power-direction-header">UPWARD</th>
-                                            <th class="power-direction-header">DOWNWARD</th>
-                                        </tr>
-                                        <tr>
-                                            <td>{mfrr_data['volume_of_procured_reserves']['upward']['value']:.2f} MW</td>
-                                            <td>{mfrr_data['volume_of_procured_reserves']['downward']['value']:.2f} MW</td>
-                                        </tr>
-                                    </table>
-
-                                    <table class="market-table power-table">
-                                        <tr>
-                                            <th class="power-header" colspan="2">{mfrr_data['utilisation']['header']}</th>
-                                        </tr>
-                                        <tr>
-                                            <th class="power-direction-header">UPWARD</th>
-                                            <th class="power-direction-header">DOWNWARD</th>
-                                        </tr>
-                                        <tr>
-                                            <td>{mfrr_data['utilisation']['upward']['value']:.2f} %</td>
-                                            <td>{mfrr_data['utilisation']['downward']['value']:.2f} %</td>
-                                        </tr>
-                                    </table>
-
-                                    <table class="market-table power-table">
-                                        <tr>
-                                            <th class="power-header" colspan="2">{mfrr_data['potential_revenue']['header']}</th>
-                                        </tr>
-                                        <tr>
-                                            <th class="power-direction-header">UPWARD</th>
-                                            <th class="power-direction-header">DOWNWARD</th>
-                                        </tr>
-                                        <tr>
-                                            <td>{mfrr_data['potential_revenue']['upward']['value']:.2f} {mfrr_data['potential_revenue']['upward']['unit']}</td>
-                                            <td>{mfrr_data['potential_revenue']['downward']['value']:.2f} {mfrr_data['potential_revenue']['downward']['unit']}</td>
-                                        </tr>
-                                    </table>
-
-                                    <table class="market-table power-table">
-                                        <tr>
-                                            <th class="power-header" colspan="2">{mfrr_data['bids_selected']['header']}</th>
-                                        </tr>
-                                        <tr>
-                                            <th class="power-direction-header">UPWARD</th>
-                                            <th class="power-direction-header">DOWNWARD</th>
-                                        </tr>
-                                        <tr>
-                                            <td>{mfrr_data['bids_selected']['upward']['value']:.2f} %</td>
-                                            <td>{mfrr_data['bids_selected']['downward']['value']:.2f} %</td>
-                                        </tr>
-                                    </table>
-                                    """,
-                                    unsafe_allow_html=True
-                                )
-
-                        # Tab 2: Energy Balancing Market
-                        with market_tabs[1]:
-                            balansavimo_energijos_data = data['aggregated']['markets']['BALANSAVIMO_ENERGIJOS_RINKA']
-
-                            # aFRR section
-                            afrr_data = balansavimo_energijos_data['aFRR']
-                            col1, col2 = st.columns([1, 5])
-
-                            with col1:
-                                st.markdown(
-                                    f"""
-                                    <div class="energy-market-title">
-                                    <h4 style="margin:0;">{afrr_data['header']}</h4>
-                                    <small>{afrr_data['description']}</small>
-                                    </div>
-                                    """,
-                                    unsafe_allow_html=True
-                                )
-
-                            with col2:
-                                st.markdown(
-                                    f"""
-                                    <table class="market-table energy-table">
-                                        <tr>
-                                            <th class="energy-header" colspan="2">{afrr_data['volume_of_procured_energy']['header']}</th>
-                                        </tr>
-                                        <tr>
-                                            <th class="energy-direction-header">UPWARD</th>
-                                            <th class="energy-direction-header">DOWNWARD</th>
-                                        </tr>
-                                        <tr>
-                                            <td>{afrr_data['volume_of_procured_energy']['upward']['value']:.2f} MWh</td>
-                                            <td>{afrr_data['volume_of_procured_energy']['downward']['value']:.2f} MWh</td>
-                                        </tr>
-                                    </table>
-
-                                    <table class="market-table energy-table">
-                                        <tr>
-                                            <th class="energy-header" colspan="2">{afrr_data['utilisation']['header']}</th>
-                                        </tr>
-                                        <tr>
-                                            <th class="energy-direction-header">UPWARD</th>
-                                            <th class="energy-direction-header">DOWNWARD</th>
-                                        </tr>
-                                        <tr>
-                                            <td>{afrr_data['utilisation']['upward']['value']:.2f} %</td>
-                                            <td>{afrr_data['utilisation']['downward']['value']:.2f} %</td>
-                                        </tr>
-                                    </table>
-
-                                    <table class="market-table energy-table">
-                                        <tr>
-                                            <th class="energy-header" colspan="2">{afrr_data['potential_revenue']['header']}</th>
-                                        </tr>
-                                        <tr>
-                                            <th class="energy-direction-header">UPWARD</th>
-                                            <th class="energy-direction-header">DOWNWARD</th>
-                                        </tr>
-                                        <tr>
-                                            <td>{afrr_data['potential_revenue']['upward']['value']:.2f} {afrr_data['potential_revenue']['upward']['unit']}</td>
-                                            <td>{afrr_data['potential_revenue']['downward']['value']:.2f} {afrr_data['potential_revenue']['downward']['unit']}</td>
-                                        </tr>
-                                    </table>
-
-                                    <table class="market-table energy-table">
-                                        <tr>
-                                            <th class="energy-header" colspan="2">{afrr_data['bids_selected']['header']}</th>
-                                        </tr>
-                                        <tr>
-                                            <th class="energy-direction-header">UPWARD</th>
-                                            <th class="energy-direction-header">DOWNWARD</th>
-                                        </tr>
-                                        <tr>
-                                            <td>{afrr_data['bids_selected']['upward']['value']:.2f} %</td>
-                                            <td>{afrr_data['bids_selected']['downward']['value']:.2f} %</td>
-                                        </tr>
-                                    </table>
-                                    """,
-                                    unsafe_allow_html=True
-                                )
-
-                            st.markdown("<hr>", unsafe_allow_html=True)
-
-                            # mFRR section
-                            mfrr_data = balansavimo_energijos_data['mFRR']
-                            col1, col2 = st.columns([1, 5])
-
-                            with col1:
-                                st.markdown(
-                                    f"""
-                                    <div class="energy-market-title">
-                                    <h4 style="margin:0;">{mfrr_data['header']}</h4>
-                                    <small>{mfrr_data['description']}</small>
-                                    </div>
-                                    """,
-                                    unsafe_allow_html=True
-                                )
-
-                            with col2:
-                                st.markdown(
-                                    f"""
-                                    <table class="market-table energy-table">
-                                        <tr>
-                                            <th class="energy-header" colspan="2">{mfrr_data['volume_of_procured_energy']['header']}</th>
-                                        </tr>
-                                        <tr>
-                                            <th class="energy-direction-header">UPWARD</th>
-                                            <th class="energy-direction-header">DOWNWARD</th>
-                                        </tr>
-                                        <tr>
-                                            <td>{mfrr_data['volume_of_procured_energy']['upward']['value']:.2f} MWh</td>
-                                            <td>{mfrr_data['volume_of_procured_energy']['downward']['value']:.2f} MWh</td>
-                                        </tr>
-                                    </table>
-
-                                    <table class="market-table energy-table">
-                                        <tr>
-                                            <th class="energy-header" colspan="2">{mfrr_data['utilisation']['header']}</th>
-                                        </tr>
-                                        <tr>
-                                            <th class="energy-direction-header">UPWARD</th>
-                                            <th class="energy-direction-header">DOWNWARD</th>
-                                        </tr>
-                                        <tr>
-                                            <td>{mfrr_data['utilisation']['upward']['value']:.2f} %</td>
-                                            <td>{mfrr_data['utilisation']['downward']['value']:.2f} %</td>
-                                        </tr>
-                                    </table>
-
-                                    <table class="market-table energy-table">
-                                        <tr>
-                                            <th class="energy-header" colspan="2">{mfrr_data['potential_revenue']['header']}</th>
-                                        </tr>
-                                        <tr>
-                                            <th class="energy-direction-header">UPWARD</th>
-                                            <th class="energy-direction-header">DOWNWARD</th>
-                                        </tr>
-                                        <tr>
-                                            <td>{mfrr_data['potential_revenue']['upward']['value']:.2f} {mfrr_data['potential_revenue']['upward']['unit']}</td>
-                                            <td>{mfrr_data['potential_revenue']['downward']['value']:.2f} {mfrr_data['potential_revenue']['downward']['unit']}</td>
-                                        </tr>
-                                    </table>
-
-                                    <table class="market-table energy-table">
-                                        <tr>
-                                            <th class="energy-header" colspan="2">{mfrr_data['bids_selected']['header']}</th>
-                                        </tr>
-                                        <tr>
-                                            <th class="energy-direction-header">UPWARD</th>
-                                            <th class="energy-direction-header">DOWNWARD</th>
-                                        </tr>
-                                        <tr>
-                                            <td>{mfrr_data['bids_selected']['upward']['value']:.2f} %</td>
-                                            <td>{mfrr_data['bids_selected']['downward']['value']:.2f} %</td>
-                                        </tr>
-                                    </table>
-                                    """,
-                                    unsafe_allow_html=True
-                                )
-
-                        # Tab 3: Electricity Trading
-                        with market_tabs[2]:
-                            elektros_energijos_data = data['aggregated']['markets']['ELEKTROS_ENERGIJOS_PREKYBA']
-
-                            # Day Ahead section
-                            if 'Day_Ahead' in elektros_energijos_data:  # Check if Day_Ahead exists
-                                day_ahead_data = elektros_energijos_data['Day_Ahead']
-                                col1, col2 = st.columns([1, 5])
-
-                                with col1:
-                                    st.markdown(
-                                        f"""
-                                        <div class="trading-market-title">
-                                        <h4 style="margin:0;">{day_ahead_data['header']}</h4>
-                                        <small>{day_ahead_data['description']}</small>
-                                        </div>
-                                        """,
-                                        unsafe_allow_html=True
-                                    )
-
-                                with col2:
-                                    st.markdown(
-                                        f"""
-                                        <table class="market-table trading-table">
-                                            <tr>
-                                                <th class="trading-header" colspan="2">{day_ahead_data['volume_of_energy_exchange']['header']}</th>
-                                            </tr>
-                                            <tr>
-                                                <th class="trading-direction-header">PURCHASE</th>
-                                                <th class="trading-direction-header">SALE</th>
-                                            </tr>
-                                            <tr>
-                                                <td>{day_ahead_data['volume_of_energy_exchange']['purchase']['value']:.2f} MWh</td>
-                                                <td>{day_ahead_data['volume_of_energy_exchange']['sale']['value']:.2f} MWh</td>
-                                            </tr>
-                                        </table>
-
-                                        <table class="market-table trading-table">
-                                            <tr>
-                                                <th class="trading-header" colspan="2">{day_ahead_data['percentage_of_time']['header']}</th>
-                                            </tr>
-                                            <tr>
-                                                <th class="trading-direction-header">PURCHASE</th>
-                                                <th class="trading-direction-header">SALE</th>
-                                            </tr>
-                                            <tr>
-                                                <td>{day_ahead_data['percentage_of_time']['purchase']['value']:.2f} %</td>
-                                                <td>{day_ahead_data['percentage_of_time']['sale']['value']:.2f} %</td>
-                                            </tr>
-                                        </table>
-
-                                        <table class="market-table trading-table">
-                                            <tr>
-                                                <th class="trading-header" colspan="2">{day_ahead_data['potential_cost_revenue']['header']}</th>
-                                            </tr>
-                                            <tr>
-                                                <th class="trading-direction-header">COST</th>
-                                                <th class="trading-direction-header">REVENUE</th>
-                                            </tr>
-                                            <tr>
-                                                <td>{day_ahead_data['potential_cost_revenue']['cost']['value']:.2f} {day_ahead_data['potential_cost_revenue']['cost']['unit']}</td>
-                                                <td>{day_ahead_data['potential_cost_revenue']['revenue']['value']:.2f} {day_ahead_data['potential_cost_revenue']['revenue']['unit']}</td>
-                                            </tr>
-                                        </table>
-                                        """,
-                                        unsafe_allow_html=True
-                                    )
-                                st.markdown("<hr>", unsafe_allow_html=True)
-
-                            # Intraday section
-                            if 'Intraday' in elektros_energijos_data:  # Check if Intraday exists
-                                intraday_data = elektros_energijos_data['Intraday']
-                                col1, col2 = st.columns([1, 5])
-
-                                with col1:
-                                    st.markdown(
-                                        f"""
-                                        <div class="trading-market-title">
-                                        <h4 style="margin:0;">{intraday_data['header']}</h4>
-                                        <small>{intraday_data['description']}</small>
-                                        </div>
-                                        """,
-                                        unsafe_allow_html=True
-                                    )
-
-                                with col2:
-                                    st.markdown(
-                                        f"""
-                                        <table class="market-table trading-table">
-                                            <tr>
-                                                <th class="trading-header" colspan="2">{intraday_data['volume_of_energy_exchange']['header']}</th>
-                                            </tr>
-                                            <tr>
-                                                <th class="trading-direction-header">PURCHASE</th>
-                                                <th class="trading-direction-header">SALE</th>
-                                            </tr>
-                                            <tr>
-                                                <td>{intraday_data['volume_of_energy_exchange']['purchase']['value']:.2f} MWh</td>
-                                                <td>{intraday_data['volume_of_energy_exchange']['sale']['value']:.2f} MWh</td>
-                                            </tr>
-                                        </table>
-
-                                        <table class="market-table trading-table">
-                                            <tr>
-                                                <th class="trading-header" colspan="2">{intraday_data['percentage_of_time']['header']}</th>
-                                            </tr>
-                                            <tr>
-                                                <th class="trading-direction-header">PURCHASE</th>
-                                                <th class="trading-direction-header">SALE</th>
-                                            </tr>
-                                            <tr>
-                                                <td>{intraday_data['percentage_of_time']['purchase']['value']:.2f} %</td>
-                                                <td>{intraday_data['percentage_of_time']['sale']['value']:.2f} %</td>
-                                            </tr>
-                                        </table>
-
-                                        <table class="market-table trading-table">
-                                            <tr>
-                                                <th class="trading-header" colspan="2">{intraday_data['potential_cost_revenue']['header']}</th>
-                                            </tr>
-                                            <tr>
-                                                <th class="trading-direction-header">COST</th>
-                                                <th class="trading-direction-header">REVENUE</th>
-                                            </tr>
-                                            <tr>
-                                                <td>{intraday_data['potential_cost_revenue']['cost']['value']:.2f} {intraday_data['potential_cost_revenue']['cost']['unit']}</td>
-                                                <td>{intraday_data['potential_cost_revenue']['revenue']['value']:.2f} {intraday_data['potential_cost_revenue']['revenue']['unit']}</td>
-                                            </tr>
-                                        </table>
-                                        """,
-                                        unsafe_allow_html=True
-                                    )
-
-                    with tab3:
-                        st.subheader("ECONOMIC RESULTS")
-
-                        econ_data = data['aggregated']['economic_results']
-
-                        # Display GROSS REVENUE BY PRODUCT table and chart
-                        st.write("##### GROSS REVENUE BY PRODUCT")
-                        gross_revenue_data = econ_data.get('gross_revenue_by_product', econ_data.get('revenue_table', []))
-                        if gross_revenue_data:
-                            st.table(gross_revenue_data)
-
-                            # Create graph from table data
-                            fig_rev = px.bar(
-                                gross_revenue_data,
-                                x="Product",
-                                y="Value (tūkst. EUR)",
-                                title="GROSS REVENUE BY PRODUCT",
-                                color_discrete_sequence=['#2ecc71']
-                            )
-
-                            fig_rev.update_traces(hovertemplate='%{y:,.2f}<extra></extra>')
-                            st.plotly_chart(fig_rev, use_container_width=True)
-                        else:
-                            st.info("No gross revenue data available")
-
-                        # Display VARIABLE COSTS BY PRODUCT table and chart
-                        st.write("##### VARIABLE COSTS BY PRODUCT")
-                        variable_costs_data = econ_data.get('variable_costs_by_product', [])
-                        if variable_costs_data:
-                            st.table(variable_costs_data)
-
-                            # Create graph from table data
-                            fig_var_cost = px.bar(
-                                variable_costs_data,
-                                x="Product",
-                                y="Value (tūkst. EUR)",
-                                title="VARIABLE COSTS BY PRODUCT",
-                                color_discrete_sequence=['#e74c3c']
-                            )
-
-                            fig_var_cost.update_traces(hovertemplate='%{y:,.2f}<extra></extra>')
-                            st.plotly_chart(fig_var_cost, use_container_width=True)
-                        else:
-                            st.info("No variable costs data available")
-
-                        # Display OTHER COSTS BY PRODUCT table and chart (e.g., aFRRd/mFRRd when negative)
-                        other_costs_data = econ_data.get('other_costs_by_product', [])
-                        if other_costs_data:
-                            st.write("##### OTHER COSTS BY PRODUCT")
-                            st.table(other_costs_data)
-
-                            # Create graph from table data
-                            fig_other_cost = px.bar(
-                                other_costs_data,
-                                x="Product",
-                                y="Value (tūkst. EUR)",
-                                title="OTHER COSTS BY PRODUCT",
-                                color_discrete_sequence=['#f39c12']  # Orange color
-                            )
-
-                            fig_other_cost.update_traces(hovertemplate='%{y:,.2f}<extra></extra>')
-                            st.plotly_chart(fig_other_cost, use_container_width=True)
-
-                        # Display total profit
-                        st.metric("TOTAL ANNUAL PROFIT (before SOH)", f"{econ_data['total_profit']:.2f} tūkst. EUR")
-
-                        # Display yearly results table
-                        st.write("##### YEARLY RESULTS")
-                        st.table(econ_data['yearly_table'])
-
-                        # Plot yearly NPV
-                        fig_yearly_npv = px.line(
-                            econ_data['yearly_table'],
-                            x="YEAR",
-                            y="NPV (tūkst. EUR)",  # Corrected key if it was NPV (tūkst. EUR)
-                            markers=True,
-                            title="NET PRESENT VALUE OVER TIME"
-                        )
-
-                        fig_yearly_npv.update_traces(hovertemplate='%{y:,.2f}<extra></extra>')
-                        st.plotly_chart(fig_yearly_npv, use_container_width=True)
-                else:
-                    # Handle error response - new error handling code
-                    try:
-                        error_data = response.json()
-                        if "detail" in error_data:
-                            # Create a popup with the error message
-                            st.error(f"Calculation failed: {error_data['detail']}")
-                        else:
-                            st.error(f"Request failed with status code: {response.status_code}")
-                    except json.JSONDecodeError:
-                        st.error(f"Request failed with status code: {response.status_code}")
-
-            except requests.exceptions.RequestException as e:
-                st.error(f"Error making request: {str(e)}")
-            except Exception as e:
-                st.error(f"An unexpected error occurred: {str(e)}")
+        # Submit in the background; the job id survives reruns in the session state
+        client = get_backend_client(BE_URL, LOCAL_MODE, P2X_APIM_SECRET)
+        submit_job("beks_jobs", client, "beks", request_body)
+    elif beks_mode == "Batch sweep" and last_run_inputs("beks_batch_run") is not None:
+        # Nothing submitted on this rerun: redraw the last run from memory
+        render_beks_batch(BE_URL, LOCAL_MODE, P2X_APIM_SECRET, *last_run_inputs("beks_batch_run"))
+    elif beks_mode == "Sensitivity" and last_run_inputs("beks_sensitivity_run") is not None:
+        render_sensitivity(BE_URL, LOCAL_MODE, P2X_APIM_SECRET, *last_run_inputs("beks_sensitivity_run"))
+
+    # Show progress or the latest results of this session's BEKS requests
+    if beks_mode == "Single scenario":
+        render_saved_scenarios("beks_jobs", "beks")
+        render_response_diff("beks_jobs", "beks")
+        render_jobs("beks_jobs", render_beks_results, render_partial=render_beks_partial)
+
+
+# Result tab -> the aggregated section it shows, for drawing streamed responses
+BEKS_RESULT_SECTIONS = {
+    "Summary": "summary",
+    "Market Details": "markets",
+    "Economic Results": "economic_results",
+}
+
+
+def render_beks_results(data, from_cache, payload):
+    # Display success message
+    st.success("Request successful! (cached result)" if from_cache else "Request successful!")
+
+    # Add download button for the JSON response
+    st.download_button(
+        label="Download JSON (gzip)",
+        data=payload,  # gzip-compressed bytes as received, not a re-encoded copy
+        file_name="response.json.gz",
+        mime="application/gzip"
+    )
+
+    # VISUALIZATION SECTION
+    st.header("Visualization")
+
+    # Create tabs for different visualizations; only the selected one is built
+    render_beks_tabs("beks_result_tab", data, response_memo("beks_response_memo", data))
+
+
+def render_beks_partial(data, memo):
+    # A response still streaming in; tabs whose section has not arrived yet say so
+    render_beks_tabs("beks_streamed_tab", data, memo, pending_tabs(BEKS_RESULT_SECTIONS, data))
+
+
+def render_beks_tabs(key, data, memo, pending=()):
+    render_tabs(key, [
+        ("Summary", render_beks_summary),
+        ("Market Details", render_beks_market_details),
+        ("Economic Results", render_beks_economic_results),
+    ], data, memo, pending=pending)
+
+
+def render_beks_summary(data, memo):
+    st.subheader("SUMMARY")
+
+    # YEARLY SUMMARY TABLE
+    st.write("##### YEARLY SUMMARY")
+    yearly_summary_table = [dict(row) for row in data['aggregated']['summary']['yearly_summary_table']]
+    # Format values with units (on copies, the same response is re-rendered on reruns)
+    for row in yearly_summary_table:
+        if 'Value' in row and isinstance(row['Value'], (int, float)):
+            value = row['Value']
+            sign = "+" if value > 0 else ""
+            row['Value'] = f"{sign}{value:.2f} tūkst. EUR/year"
+    st.table(yearly_summary_table)
+
+    # PROJECT LIFETIME SUMMARY TABLE
+    st.write("##### PROJECT (LIFETIME) SUMMARY")
+    project_summary_table = [dict(row) for row in data['aggregated']['summary']['project_summary_table']]
+    # Format values with units (on copies, the same response is re-rendered on reruns)
+    for row in project_summary_table:
+        if 'Value' in row and isinstance(row['Value'], (int, float)):
+            value = row['Value']
+            sign = "+" if value > 0 else ""
+            row['Value'] = f"{sign}{value:.2f} tūkst. EUR"
+    st.table(project_summary_table)
+
+    st.write("##### SUPPLEMENTED WITH GRAPHS")
+
+    col1, col2 = st.columns(2)
+
+    with col1:
+        # NET PRESENT VALUE ANALYSIS CHART
+        npv_data = data['aggregated']['summary']['npv_chart_data']
+
+        fig_npv = memo.figure("npv", build_beks_npv_figure, npv_data)
+        st.plotly_chart(fig_npv, use_container_width=True)
+
+    with col2:
+        # REVENUE vs COST BY PRODUCTS CHART
+        rev_cost_data = data['aggregated']['summary']['revenue_cost_chart_data']
+        fig_rev_cost = memo.figure("revenue_cost", build_beks_revenue_cost_figure, rev_cost_data)
+        st.plotly_chart(fig_rev_cost, use_container_width=True)
+
+    col3, col4 = st.columns(2)
+
+    with col3:
+        # UTILISATION (% TIME) BY PRODUCTS CHART
+        util_data = data['aggregated']['summary']['utilisation_chart_data']
+        fig_util = memo.figure("utilisation", build_beks_utilisation_figure, util_data)
+        st.plotly_chart(fig_util, use_container_width=True)
+
+
+def build_beks_npv_figure(npv_data):
+    import plotly.graph_objects as go
+    from plotly.subplots import make_subplots
+    # Create a figure with secondary y-axis
+    fig_npv = make_subplots(
+        specs=[[{"secondary_y": True}]]
+    )
+
+    # Add bar chart for discounted cash flows
+    fig_npv.add_trace(
+        go.Bar(
+            x=npv_data['years'],
+            y=npv_data['dcfs'],
+            name="Discounted Cash Flow",
+            marker_color="lightblue",
+            opacity=0.7
+        ),
+        secondary_y=False,
+    )
+
+    # Add line for cumulative NPV
+    fig_npv.add_trace(
+        go.Scatter(
+            x=npv_data['years'],
+            y=npv_data['npv'],
+            mode="lines+markers",
+            name="Cumulative NPV",
+            line=dict(color="red", width=3)
+        ),
+        secondary_y=True,
+    )
+
+    # Highlight break-even point
+    if npv_data['break_even_point'] is not None:
+        break_even_year = npv_data['years'][npv_data['break_even_point']]
+        break_even_value = npv_data['npv'][npv_data['break_even_point']]
+
+        fig_npv.add_scatter(
+            x=[break_even_year],
+            y=[break_even_value],
+            mode="markers",
+            marker=dict(size=10, color="green"),
+            name="Break-even Point",
+            secondary_y=True
+        )
+
+    # Update layout
+    fig_npv.update_xaxes(title_text="Year")
+    fig_npv.update_yaxes(title_text="Discounted Cash Flow (tūkst. EUR)", secondary_y=False)
+    fig_npv.update_yaxes(title_text="Cumulative NPV (tūkst. EUR)", secondary_y=True)
+    fig_npv.update_layout(
+        title="NET PRESENT VALUE ANALYSIS",
+        hovermode='x unified'
+    )
+    return fig_npv
+
+
+def build_beks_revenue_cost_figure(rev_cost_data):
+    import plotly.express as px
+    fig_rev_cost = px.bar(
+        x=rev_cost_data['products'],
+        y=rev_cost_data['values'],
+        labels={"x": "Product", "y": "Value (tūkst. EUR)"},
+        title="REVENUE vs COST BY PRODUCTS"
+    )
+
+    fig_rev_cost.update_traces(hovertemplate='%{y:,.2f}<extra></extra>')
+    return fig_rev_cost
+
+
+def build_beks_utilisation_figure(util_data):
+    import plotly.express as px
+    fig_util = px.bar(
+        x=util_data['products'],
+        y=util_data['values'],
+        labels={"x": "Product", "y": "Utilisation (%)"},
+        title="UTILISATION (% TIME) BY PRODUCTS"
+    )
+
+    fig_util.update_traces(hovertemplate='%{y:,.2f}<extra></extra>')
+    return fig_util
+
+
+def render_beks_market_details(data, memo):
+    st.subheader("MARKET DETAILS")
+    render_market_tabs("beks_market_tab", data['aggregated']['markets'], BALANCING_AND_TRADING_MARKETS, memo)
+
+
+def render_beks_economic_results(data, memo):
+    st.subheader("ECONOMIC RESULTS")
+
+    econ_data = data['aggregated']['economic_results']
+
+    # Display GROSS REVENUE BY PRODUCT table and chart
+    st.write("##### GROSS REVENUE BY PRODUCT")
+    gross_revenue_data = econ_data.get('gross_revenue_by_product', econ_data.get('revenue_table', []))
+    if gross_revenue_data:
+        st.table(gross_revenue_data)
+
+        # Create graph from table data
+        fig_rev = memo.figure("gross_revenue", build_beks_gross_revenue_figure, gross_revenue_data)
+        st.plotly_chart(fig_rev, use_container_width=True)
+    else:
+        st.info("No gross revenue data available")
+
+    # Display VARIABLE COSTS BY PRODUCT table and chart
+    st.write("##### VARIABLE COSTS BY PRODUCT")
+    variable_costs_data = econ_data.get('variable_costs_by_product', [])
+    if variable_costs_data:
+        st.table(variable_costs_data)
+
+        # Create graph from table data
+        fig_var_cost = memo.figure("variable_costs", build_beks_variable_costs_figure, variable_costs_data)
+        st.plotly_chart(fig_var_cost, use_container_width=True)
+    else:
+        st.info("No variable costs data available")
+
+    # Display OTHER COSTS BY PRODUCT table and chart (e.g., aFRRd/mFRRd when negative)
+    other_costs_data = econ_data.get('other_costs_by_product', [])
+    if other_costs_data:
+        st.write("##### OTHER COSTS BY PRODUCT")
+        st.table(other_costs_data)
+
+        # Create graph from table data
+        fig_other_cost = memo.figure("other_costs", build_beks_other_costs_figure, other_costs_data)
+        st.plotly_chart(fig_other_cost, use_container_width=True)
+
+    # Display total profit
+    st.metric("TOTAL ANNUAL PROFIT (before SOH)", f"{econ_data['total_profit']:.2f} tūkst. EUR")
+
+    # Display yearly results table
+    st.write("##### YEARLY RESULTS")
+    st.table(econ_data['yearly_table'])
+
+    # Plot yearly NPV
+    fig_yearly_npv = memo.figure("yearly_npv", build_beks_yearly_npv_figure, econ_data)
+    st.plotly_chart(fig_yearly_npv, use_container_width=True)
+
+
+def build_beks_gross_revenue_figure(gross_revenue_data):
+    import plotly.express as px
+    fig_rev = px.bar(
+        gross_revenue_data,
+        x="Product",
+        y="Value (tūkst. EUR)",
+        title="GROSS REVENUE BY PRODUCT",
+        color_discrete_sequence=['#2ecc71']
+    )
+
+    fig_rev.update_traces(hovertemplate='%{y:,.2f}<extra></extra>')
+    return fig_rev
+
+
+def build_beks_variable_costs_figure(variable_costs_data):
+    import plotly.express as px
+    fig_var_cost = px.bar(
+        variable_costs_data,
+        x="Product",
+        y="Value (tūkst. EUR)",
+        title="VARIABLE COSTS BY PRODUCT",
+        color_discrete_sequence=['#e74c3c']
+    )
+
+    fig_var_cost.update_traces(hovertemplate='%{y:,.2f}<extra></extra>')
+    return fig_var_cost
+
+
+def build_beks_other_costs_figure(other_costs_data):
+    import plotly.express as px
+    fig_other_cost = px.bar(
+        other_costs_data,
+        x="Product",
+        y="Value (tūkst. EUR)",
+        title="OTHER COSTS BY PRODUCT",
+        color_discrete_sequence=['#f39c12']  # Orange color
+    )
+
+    fig_other_cost.update_traces(hovertemplate='%{y:,.2f}<extra></extra>')
+    return fig_other_cost
+
+
+def build_beks_yearly_npv_figure(econ_data):
+    import plotly.express as px
+    fig_yearly_npv = px.line(
+        econ_data['yearly_table'],
+        x="YEAR",
+        y="NPV (tūkst. EUR)",  # Corrected key if it was NPV (tūkst. EUR)
+        markers=True,
+        title="NET PRESENT VALUE OVER TIME"
+    )
+
+    fig_yearly_npv.update_traces(hovertemplate='%{y:,.2f}<extra></extra>')
+    return fig_yearly_npv
+
+
+def render_beks_batch(BE_URL, LOCAL_MODE, P2X_APIM_SECRET, base_request_body, scenario_rows):
+    if not scenario_rows:
+        st.warning("No batch scenarios defined.")
+        return
+    if len(scenario_rows) > BATCH_MAX_SCENARIOS:
+        st.error(f"The batch has {len(scenario_rows)} scenarios, the maximum is {BATCH_MAX_SCENARIOS}.")
+        return
+
+    # Heatmap axes: the first two parameters that actually vary across the batch
+    swept_keys = list(scenario_rows[0])
+    heatmap_keys = [key for key in swept_keys if len({row[key] for row in scenario_rows}) > 1][:2]
+
+    inputs = (base_request_body, scenario_rows)
+    memo = run_memo("beks_batch_run", inputs)
+    st.header("Batch Results")
+    results = last_run("beks_batch_run", inputs)
+    if results is not None:
+        st.caption(LAST_RUN_NOTE)
+        draw_beks_batch_results(results, heatmap_keys, st.empty(), st.empty(), len(results), memo)
+        return
+
+    request_bodies = [apply_overrides(base_request_body, row) for row in scenario_rows]
+    total = len(request_bodies)
+    progress = st.progress(0.0, text=f"0/{total} scenarios finished")
+    table_placeholder = st.empty()
+    heatmap_placeholder = st.empty()
+
+    client = get_backend_client(BE_URL, LOCAL_MODE, P2X_APIM_SECRET)
+    results = []
+    last_draw = 0.0
+    for done, (index, data, error) in enumerate(run_batch(client, "beks", request_bodies), start=1):
+        row = dict(scenario_rows[index])
+        if error is None:
+            row["NPV (tūkst. EUR)"] = final_npv(data)
+            row["Break-even year"] = break_even_year(data)
+            row["Total annual profit (tūkst. EUR)"] = data.get('aggregated', {}).get('economic_results', {}).get('total_profit')
+            row["Status"] = "OK"
+        else:
+            row["Status"] = f"Error: {str(error)}"
+        results.append(row)
+
+        progress.progress(done / total, text=f"{done}/{total} scenarios finished")
+        # Redraw a few times per second at most; always draw the final state
+        if done == total:
+            draw_beks_batch_results(results, heatmap_keys, table_placeholder, heatmap_placeholder, done, memo)
+        elif time.monotonic() - last_draw > 0.5:
+            draw_beks_batch_results(results, heatmap_keys, table_placeholder, heatmap_placeholder, done)
+            last_draw = time.monotonic()
+    remember_run("beks_batch_run", inputs, results)
+
+
+def draw_beks_batch_results(results, heatmap_keys, table_placeholder, heatmap_placeholder, draw_id, memo=None):
+    # memo is given for the final state only; partial results are drawn once each
+    npv_col = "NPV (tūkst. EUR)"
+    results_df = pd.DataFrame(results)
+    if npv_col in results_df.columns:
+        results_df = results_df.sort_values(npv_col, ascending=False, na_position="last")
+    table_placeholder.dataframe(results_df, use_container_width=True, hide_index=True)
+
+    if len(heatmap_keys) != 2 or npv_col not in results_df.columns:
+        return
+    x_key, y_key = heatmap_keys
+    npv_grid = results_df.dropna(subset=[npv_col]).pivot_table(index=y_key, columns=x_key, values=npv_col,
+                                                               aggfunc="max")
+    if npv_grid.empty:
+        return
+    fig_heatmap = (memo.figure("batch_heatmap", build_beks_batch_heatmap_figure, npv_grid, x_key, y_key, npv_col)
+                   if memo else build_beks_batch_heatmap_figure(npv_grid, x_key, y_key, npv_col))
+    heatmap_placeholder.plotly_chart(fig_heatmap, use_container_width=True, key=f"beks_batch_heatmap_{draw_id}")
+
+
+def build_beks_batch_heatmap_figure(npv_grid, x_key, y_key, npv_col):
+    import plotly.express as px
+    return px.imshow(
+        npv_grid,
+        labels={"x": x_key, "y": y_key, "color": npv_col},
+        text_auto=".1f",
+        aspect="auto",
+        origin="lower",
+        color_continuous_scale="RdYlGn",
+        title=f"NPV HEATMAP ({x_key} x {y_key}, best over other parameters)"
+    )
@@ -0,0 +1,197 @@
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+from unittest import mock
+
+from plotly.basedatatypes import BaseFigure
+from streamlit.testing.v1 import AppTest
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+# No scenario history: the saved-scenario and diff panels must not read the developer's own database
+os.environ["P2X_SCENARIO_DB"] = ""
+
+from backend_client import BackendClient  # noqa: E402
+from response_cache import compress_payload  # noqa: E402
+from stub_backend import build_response  # noqa: E402
+
+# Headless benchmark of the calculator renderers against canned stub responses.
+#
+#   python benchmarks/bench_renderers.py                    compare with the baseline
+#   python benchmarks/bench_renderers.py --runs 50          more reruns per calculator
+#   python benchmarks/bench_renderers.py --update-baseline  record a new baseline
+#
+# Each calculator is submitted once, then the script is rerun with the finished
+# result on screen, which is what every widget interaction after a submit costs.
+
+CALCULATORS = ["beks", "p2h", "p2g", "dsr"]
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "renderer_baseline.json")
+
+# Allowed growth over the baseline before a metric counts as a regression
+TOLERANCES = {
+    "p50_ms": 0.25,
+    "p95_ms": 0.35,
+    "figures": 0.0,
+    "markdown_bytes": 0.05,
+    "payload_bytes": 0.05,
+    "peak_memory_kb": 0.20,
+}
+
+APP_SCRIPT = """
+import sys
+sys.path.insert(0, {root!r})
+from {name}_calculator import render_{name}_calculator
+render_{name}_calculator("http://stub/", False, "test")
+"""
+
+
+class FigureCounter:
+    def __init__(self):
+        self.count = 0
+        self._original_init = BaseFigure.__init__
+
+    def __enter__(self):
+        counter = self
+
+        def counting_init(figure, *args, **kwargs):
+            counter.count += 1
+            counter._original_init(figure, *args, **kwargs)
+
+        BaseFigure.__init__ = counting_init
+        return self
+
+    def __exit__(self, *exc):
+        BaseFigure.__init__ = self._original_init
+
+
+def element_bytes(at):
+    markdown_bytes = 0
+    payload_bytes = 0
+    for node in at.main:
+        proto = getattr(node, "proto", None)
+        if proto is None or not hasattr(proto, "ByteSize"):
+            continue
+        payload_bytes += proto.ByteSize()
+        if getattr(node, "type", None) == "markdown":
+            markdown_bytes += len(proto.body.encode("utf-8"))
+    return markdown_bytes, payload_bytes
+
+
+def submit_and_wait(at, timeout=30):
+    at.run()
+    next(button for button in at.button if button.label == "Submit").click()
+    at.run()
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        at.run()
+        if at.success or at.error or at.exception:
+            break
+        time.sleep(0.05)
+    if at.exception:
+        raise RuntimeError(at.exception[0].value)
+
+
+def bench_calculator(name, runs, years):
+    data = build_response(name, {"number_of_years": years})
+    payload = compress_payload(json.dumps(data).encode("utf-8"))
+    with mock.patch.object(BackendClient, "calculate_with_payload",
+                           lambda self, endpoint, body, **kwargs: (data, False, payload)):
+        at = AppTest.from_string(APP_SCRIPT.format(root=ROOT_DIR, name=name), default_timeout=120)
+        submit_and_wait(at)
+
+        timings = []
+        with FigureCounter() as counter:
+            for _ in range(runs):
+                counter.count = 0
+                start = time.perf_counter()
+                at.run()
+                timings.append((time.perf_counter() - start) * 1000)
+            figures = counter.count
+
+        markdown_bytes, payload_bytes = element_bytes(at)
+
+        # Separate pass: tracemalloc slows the run down too much to time it
+        tracemalloc.start()
+        at.run()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    timings.sort()
+    return {
+        "p50_ms": round(statistics.median(timings), 1),
+        "p95_ms": round(timings[min(len(timings) - 1, int(round(0.95 * (len(timings) - 1))))], 1),
+        "figures": figures,
+        "markdown_bytes": markdown_bytes,
+        "payload_bytes": payload_bytes,
+        "peak_memory_kb": round(peak / 1024),
+    }
+
+
+def find_regressions(results, baseline):
+    regressions = []
+    for name, metrics in results.items():
+        for metric, value in metrics.items():
+            reference = baseline.get(name, {}).get(metric)
+            if reference is None:
+                continue
+            if value > reference * (1 + TOLERANCES[metric]):
+                regressions.append(f"{name}.{metric}: {value} > baseline {reference}")
+    return regressions
+
+
+def print_table(results, baseline):
+    metrics = list(TOLERANCES)
+    print(f"{'calculator':<12}" + "".join(f"{m:>22}" for m in metrics))
+    for name, values in results.items():
+        cells = []
+        for metric in metrics:
+            reference = baseline.get(name, {}).get(metric)
+            cell = f"{values[metric]}"
+            if reference:
+                cell += f" ({(values[metric] - reference) / reference:+.0%})"
+            cells.append(f"{cell:>22}")
+        print(f"{name:<12}" + "".join(cells))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark calculator render time against canned responses")
+    parser.add_argument("calculators", nargs="*", help=f"Subset of {', '.join(CALCULATORS)} (default: all)")
+    parser.add_argument("--runs", type=int, default=20, help="Timed reruns per calculator")
+    parser.add_argument("--years", type=int, default=10, help="number_of_years of the canned responses")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args(argv)
+    unknown = [name for name in args.calculators if name not in CALCULATORS]
+    if unknown:
+        parser.error(f"unknown calculators: {', '.join(unknown)}")
+    calculators = args.calculators or CALCULATORS
+
+    results = {name: bench_calculator(name, args.runs, args.years) for name in calculators}
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    print_table(results, baseline)
+
+    if args.update_baseline:
+        baseline.update(results)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    regressions = find_regressions(results, baseline)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
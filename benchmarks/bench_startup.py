@@ -0,0 +1,91 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+# Cold start benchmark: the first script run of streamlit_app.py in a fresh interpreter.
+#
+#   python benchmarks/bench_startup.py             lazy (current) against eager imports
+#   python benchmarks/bench_startup.py --runs 20   more fresh interpreters per mode
+#
+# "eager" imports the four calculator modules and plotly.express / plotly.subplots up front,
+# as streamlit_app.py did before calculators were loaded on selection. Streamlit itself is
+# imported before the clock starts, as the server has it loaded before any script runs.
+# first_chart_ms is the first figure built after start-up, where plotly is now loaded.
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_PATH = os.path.join(ROOT_DIR, "streamlit_app.py")
+
+MODES = {
+    "eager": ["plotly.express", "plotly.graph_objects", "plotly.subplots", "beks_calculator", "p2h_calculator",
+              "p2g_calculator", "dsr_calculator"],
+    "lazy": [],
+}
+
+# Modules reported as loaded (or not) after the first run
+WATCHED_MODULES = ["pandas", "plotly.express", "plotly.graph_objs._figure", "beks_calculator", "p2h_calculator",
+                   "p2g_calculator", "dsr_calculator"]
+
+CHILD_SCRIPT = """
+import importlib, json, runpy, sys, time
+sys.path.insert(0, {root!r})
+import streamlit
+
+start = time.perf_counter()
+for name in {preload!r}:
+    importlib.import_module(name)
+runpy.run_path({app!r}, run_name="__main__")
+startup_ms = (time.perf_counter() - start) * 1000
+loaded = [name for name in {watched!r} if name in sys.modules]
+
+from beks_calculator import build_beks_npv_figure
+from stub_backend import build_response
+npv_data = build_response("beks", {{}})["aggregated"]["summary"]["npv_chart_data"]
+start = time.perf_counter()
+build_beks_npv_figure(npv_data)
+first_chart_ms = (time.perf_counter() - start) * 1000
+print(json.dumps({{"startup_ms": startup_ms, "first_chart_ms": first_chart_ms, "loaded": loaded}}))
+"""
+
+
+def run_child(preload):
+    script = CHILD_SCRIPT.format(root=ROOT_DIR, preload=preload, app=APP_PATH, watched=WATCHED_MODULES)
+    # No scenario history, warm-up or metrics server: only the imports and the first render are timed
+    env = dict(os.environ, P2X_SCENARIO_DB="", P2X_CACHE_WARMUP="0", P2X_METRICS_PORT="0")
+    completed = subprocess.run([sys.executable, "-c", script], cwd=ROOT_DIR, env=env, capture_output=True,
+                               text=True, check=True)
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def bench_mode(preload, runs):
+    results = [run_child(preload) for _ in range(runs)]
+    return {
+        "startup_p50_ms": round(statistics.median(result["startup_ms"] for result in results), 1),
+        "startup_min_ms": round(min(result["startup_ms"] for result in results), 1),
+        "first_chart_p50_ms": round(statistics.median(result["first_chart_ms"] for result in results), 1),
+        "loaded": results[-1]["loaded"],
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the cold start of streamlit_app.py")
+    parser.add_argument("--runs", type=int, default=7, help="Fresh interpreters per mode")
+    args = parser.parse_args(argv)
+
+    results = {mode: bench_mode(preload, args.runs) for mode, preload in MODES.items()}
+
+    columns = ["startup_p50_ms", "startup_min_ms", "first_chart_p50_ms"]
+    print(f"{'mode':<8}" + "".join(f"{column:>22}" for column in columns) + "  loaded after first run")
+    for mode, values in results.items():
+        print(f"{mode:<8}" + "".join(f"{values[column]:>22}" for column in columns) + "  " +
+              ", ".join(values["loaded"]))
+    eager = results["eager"]["startup_p50_ms"]
+    lazy = results["lazy"]["startup_p50_ms"]
+    print(f"Cold start: {eager - lazy:+.1f} ms faster lazily ({(eager - lazy) / eager:.0%})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,67 @@
+import argparse
+import os
+import statistics
+import sys
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+# No scenario history, so no stale responses are served: every call goes to the stub
+os.environ["P2X_SCENARIO_DB"] = ""
+
+import stub_backend  # noqa: E402
+from backend_client import BackendClient  # noqa: E402
+from warmup import DEFAULT_REQUEST_BODIES  # noqa: E402
+
+# Time to first result with and without section streaming, against the local stub.
+#
+#   python benchmarks/bench_streaming.py                     all calculators, 3 s simulated compute
+#   python benchmarks/bench_streaming.py p2h dsr --latency 10 --pad-kb 2048
+#
+# "first" is when the summary could be drawn: the first streamed section, or the whole response
+# when it is not streamed. The stub spreads its latency over the sections, as a streaming backend
+# that sends each section once it is calculated would.
+
+CALCULATORS = ("beks", "p2h", "p2g", "dsr")
+PORT = 8799
+
+
+def time_call(client, endpoint, streamed):
+    started = time.perf_counter()
+    first = []
+
+    def on_section(path, value):
+        if not first:
+            first.append(time.perf_counter() - started)
+
+    client.calculate_with_payload(endpoint, DEFAULT_REQUEST_BODIES.get(endpoint, {}), use_cache=False,
+                                  on_section=on_section if streamed else None)
+    total = time.perf_counter() - started
+    return (first[0] if first else total), total
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark time to first result with section streaming")
+    parser.add_argument("calculators", nargs="*", help=f"Subset of {', '.join(CALCULATORS)} (default: all)")
+    parser.add_argument("--runs", type=int, default=3, help="Calls per calculator and mode")
+    parser.add_argument("--latency", type=float, default=3.0, help="Simulated backend compute in seconds")
+    parser.add_argument("--pad-kb", type=int, default=0, help="Extra payload added to each response")
+    args = parser.parse_args(argv)
+
+    config = stub_backend.parse_args(["--port", str(PORT), "--quiet", "--latency", str(args.latency),
+                                      "--pad-kb", str(args.pad_kb)])
+    stub_backend.serve_in_background(config)
+    client = BackendClient(f"http://127.0.0.1:{PORT}/")
+
+    print(f"{'calculator':<12}{'mode':<10}{'first_p50_ms':>16}{'total_p50_ms':>16}")
+    for endpoint in args.calculators or CALCULATORS:
+        for mode, streamed in (("plain", False), ("streamed", True)):
+            timings = [time_call(client, endpoint, streamed) for _ in range(args.runs)]
+            first = statistics.median(timing[0] for timing in timings) * 1000
+            total = statistics.median(timing[1] for timing in timings) * 1000
+            print(f"{endpoint:<12}{mode:<10}{first:>16.1f}{total:>16.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,129 @@
+import copy
+
+import numpy as np
+import pandas as pd
+
+# Request inputs that only enter the discounted cash flow, not the optimisation itself.
+# A request that differs from an earlier one only in these can be recalculated locally.
+FINANCE_PARAMETERS = ("discount_rate", "number_of_years")
+
+YEAR_COLUMN = "YEAR"
+CF_COLUMN = "CF (tūkst. EUR)"
+DCF_COLUMN = "DCF (tūkst. EUR)"
+NPV_COLUMN = "NPV (tūkst. EUR)"
+
+
+def is_finance_only_change(base_request_body, request_body):
+    changed = {key for key in set(base_request_body) | set(request_body)
+               if base_request_body.get(key) != request_body.get(key)}
+    return bool(changed) and changed <= set(FINANCE_PARAMETERS)
+
+
+def final_npv(data):
+    # Last point of the response's NPV curve, as shown in comparison tables and stored with scenarios
+    npv = data.get("aggregated", {}).get("summary", {}).get("npv_chart_data", {}).get("npv") or []
+    return npv[-1] if npv else None
+
+
+def break_even_year(data):
+    npv_data = data.get("aggregated", {}).get("summary", {}).get("npv_chart_data", {})
+    index = npv_data.get("break_even_point")
+    years = npv_data.get("years") or []
+    if isinstance(index, int) and 0 <= index < len(years):
+        return years[index]
+    return None
+
+
+def discount(cash_flows, discount_rate):
+    # Year 0 is the investment year and is not discounted
+    factors = (1 + discount_rate / 100) ** -np.arange(len(cash_flows))
+    dcfs = cash_flows * factors
+    return dcfs, np.cumsum(dcfs)
+
+
+def break_even_point(npv):
+    # First year after the investment year with a non-negative NPV
+    hits = np.flatnonzero(npv[1:] >= 0)
+    return int(hits[0]) + 1 if hits.size else None
+
+
+def base_cash_flows(aggregated, base_discount_rate):
+    # Undiscounted yearly cash flows of a response: the CF column when the yearly table has
+    # one, otherwise the DCFs of the NPV chart undone with the discount rate they were made with
+    yearly_table = aggregated.get("economic_results", {}).get("yearly_table") or aggregated.get("yearly")
+    if yearly_table and CF_COLUMN in yearly_table[0]:
+        return pd.DataFrame(yearly_table)[CF_COLUMN].to_numpy(dtype=float)
+    dcfs = np.asarray(aggregated["summary"]["npv_chart_data"]["dcfs"], dtype=float)
+    return dcfs * (1 + base_discount_rate / 100) ** np.arange(len(dcfs))
+
+
+def recalculate_yearly_table(yearly_table, cash_flows, dcfs, npv, number_of_years):
+    yearly_df = pd.DataFrame(yearly_table).iloc[:number_of_years + 1].reset_index(drop=True)
+    for column, values in ((CF_COLUMN, cash_flows), (DCF_COLUMN, dcfs), (NPV_COLUMN, npv)):
+        if column in yearly_df.columns:
+            yearly_df[column] = np.round(values, 2)
+    return yearly_df.to_dict("records")
+
+
+def recalculate_response(data, base_request_body, request_body):
+    # Returns a copy of a response for the finance inputs of request_body, or None when it cannot be
+    # recalculated locally and the backend has to run it. The optimisation results are reused as they
+    # are; only the NPV curve, break-even point, yearly tables and lifetime totals change. Only horizons
+    # the response covers can be recalculated: later years would have to be made up.
+    base_discount_rate = float(base_request_body["discount_rate"])
+    base_years = int(base_request_body["number_of_years"])
+    discount_rate = float(request_body["discount_rate"])
+    number_of_years = int(request_body["number_of_years"])
+
+    data = copy.deepcopy(data)
+    aggregated = data["aggregated"]
+    cash_flows = base_cash_flows(aggregated, base_discount_rate)
+    rows = number_of_years + 1
+    if rows > len(cash_flows):
+        return None
+    cash_flows = cash_flows[:rows]
+    dcfs, npv = discount(cash_flows, discount_rate)
+
+    summary = aggregated.get("summary", {})
+    if "npv_chart_data" in summary:
+        summary["npv_chart_data"] = {
+            "years": list(range(rows)),
+            "dcfs": np.round(dcfs, 2).tolist(),
+            "npv": np.round(npv, 2).tolist(),
+            "break_even_point": break_even_point(npv)
+        }
+    # Lifetime totals are annual figures times the horizon. A summary table without a row labelled
+    # NPV cannot be brought up to date, so it is left to the backend instead of showing the old NPV.
+    years_ratio = number_of_years / base_years
+    project_summary_table = summary.get("project_summary_table", [])
+    if project_summary_table and not any(row.get("Metric") == "NPV" for row in project_summary_table):
+        return None
+    for row in project_summary_table:
+        if row.get("Metric") == "NPV":
+            row["Value"] = round(float(npv[-1]), 2)
+        elif row.get("Metric") == "Total profit" and isinstance(row.get("Value"), (int, float)):
+            row["Value"] = round(row["Value"] * years_ratio, 2)
+
+    # CAPEX and OPEX in the profit breakdown are project totals; CAPEX does not depend on the horizon
+    profit_data = summary.get("profit_breakdown_chart_data")
+    if profit_data and isinstance(profit_data.get("opex"), (int, float)):
+        profit_data["opex"] = round(profit_data["opex"] * years_ratio, 2)
+
+    econ_data = aggregated.get("economic_results", {})
+    if econ_data.get("soh_data"):
+        econ_data["soh_data"] = econ_data["soh_data"][:rows]
+    if econ_data.get("yearly_table"):
+        econ_data["yearly_table"] = recalculate_yearly_table(econ_data["yearly_table"], cash_flows, dcfs, npv,
+                                                             number_of_years)
+    if aggregated.get("yearly"):
+        aggregated["yearly"] = recalculate_yearly_table(aggregated["yearly"], cash_flows, dcfs, npv, number_of_years)
+
+    comparison = aggregated.get("comparison")
+    if comparison:
+        # Only keys the response already has are updated
+        if "number_of_years" in comparison:
+            comparison["number_of_years"] = number_of_years
+        for item in comparison.values():
+            if isinstance(item, dict) and isinstance(item.get("total"), (int, float)):
+                item["total"] = round(item["total"] * years_ratio, 2)
+    return data
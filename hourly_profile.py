@@ -0,0 +1,149 @@
+import io
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+# DSR power profiles: one row per hour (24) or per quarter-hour (96), edited as a single table
+# or imported from CSV / pasted spreadsheet columns, and checked for all periods at once.
+PROFILE_POINTS = {24: "Hourly (24)", 96: "Quarter-hourly (96)"}
+PERIOD_COLUMN = "Period"
+# Request key -> table column
+PROFILE_COLUMNS = {
+    "hourly_power": "Power (MW)",
+    "hourly_min_power": "Min power (MW)",
+    "hourly_max_power": "Max power (MW)",
+}
+# Headerless imports: request keys by number of value columns
+IMPORT_LAYOUTS = {
+    1: ("hourly_power",),
+    2: ("hourly_min_power", "hourly_max_power"),
+    3: ("hourly_power", "hourly_min_power", "hourly_max_power"),
+}
+MAX_LISTED_PERIODS = 8  # Periods named in one validation message
+
+
+def period_labels(points):
+    step = 24 * 60 // points
+    return [f"{minute // 60:02d}:{minute % 60:02d}" for minute in range(0, 24 * 60, step)]
+
+
+def default_profile(points, q_avg, q_min, q_max):
+    # Flat profile at the form's power limits
+    return pd.DataFrame({
+        PERIOD_COLUMN: period_labels(points),
+        PROFILE_COLUMNS["hourly_power"]: np.full(points, float(q_avg)),
+        PROFILE_COLUMNS["hourly_min_power"]: np.full(points, float(q_min)),
+        PROFILE_COLUMNS["hourly_max_power"]: np.full(points, float(q_max)),
+    })
+
+
+def _import_columns(header):
+    # Header names -> request keys; unrecognised columns (hour, time, ...) are ignored
+    columns = {}
+    for index, name in enumerate(header):
+        name = str(name).strip().lower()
+        if "min" in name:
+            columns["hourly_min_power"] = index
+        elif "max" in name:
+            columns["hourly_max_power"] = index
+        elif "power" in name or "galia" in name:
+            columns["hourly_power"] = index
+    return columns
+
+
+def read_profile(text, base_profile):
+    # CSV or pasted spreadsheet columns, one row per period: power; min and max; or power, min and max.
+    # An optional header names the columns, a leading hour/time column is skipped. Separators may be
+    # tab, semicolon, comma or spaces, decimal commas are accepted. Columns not in the import come
+    # from base_profile(points), built for the imported number of periods.
+    text = (text or "").strip()
+    if not text:
+        raise ValueError("The profile is empty")
+    separator = next((sep for sep in ("\t", ";", ",") if sep in text), r"\s+")
+    raw = pd.read_csv(io.StringIO(text), sep=separator, header=None, dtype=str, engine="python",
+                      skipinitialspace=True)
+    values = raw.apply(lambda column: pd.to_numeric(column.str.strip().str.replace(",", ".", regex=False),
+                                                    errors="coerce"))
+    if values.iloc[0].isna().all():
+        columns = _import_columns(raw.iloc[0])
+        values = values.iloc[1:].reset_index(drop=True)
+        if not columns:
+            raise ValueError("The header names no power, min or max column")
+    else:
+        # Text columns (times) and a leading period number column hold no values
+        values = values.dropna(axis=1, how="all")
+        first = values.iloc[:, 0].to_numpy()
+        if values.shape[1] > 1 and (np.array_equal(first, np.arange(len(first))) or
+                                    np.array_equal(first, np.arange(1, len(first) + 1))):
+            values = values.iloc[:, 1:]
+        if values.shape[1] not in IMPORT_LAYOUTS:
+            raise ValueError(f"Expected 1 to 3 value columns, got {values.shape[1]}")
+        columns = {key: index for index, key in enumerate(IMPORT_LAYOUTS[values.shape[1]])}
+        values.columns = range(values.shape[1])
+
+    points = len(values)
+    if points not in PROFILE_POINTS:
+        raise ValueError(f"Expected 24 hourly or 96 quarter-hourly rows, got {points}")
+    profile = base_profile(points)
+    for key, index in columns.items():
+        column = values.iloc[:, index]
+        if column.isna().any():
+            rows = ", ".join(map(str, np.flatnonzero(column.isna().to_numpy())[:MAX_LISTED_PERIODS] + 1))
+            raise ValueError(f"Non-numeric {PROFILE_COLUMNS[key]} values in rows {rows}")
+        profile[PROFILE_COLUMNS[key]] = column.to_numpy(dtype=float)
+    return profile
+
+
+def validate_profile(profile, q_min, q_max, use_power, use_min_max):
+    # All periods are compared at once; returns one message per violated rule
+    power, low, high = (profile[column].to_numpy(dtype=float) for column in PROFILE_COLUMNS.values())
+    checks = []
+    if use_power:
+        checks += [
+            (np.isnan(power), "Power is missing"),
+            (power < q_min, f"Power is below Q_min ({q_min} MW)"),
+            (power > q_max, f"Power is above Q_max ({q_max} MW)"),
+        ]
+    if use_min_max:
+        checks += [
+            (np.isnan(low) | np.isnan(high), "Min or max power is missing"),
+            (low < q_min, f"Min power is below Q_min ({q_min} MW)"),
+            (high > q_max, f"Max power is above Q_max ({q_max} MW)"),
+            (low > high, "Min power is above max power"),
+        ]
+    if use_power and use_min_max:
+        checks += [
+            (power < low, "Power is below the min power"),
+            (power > high, "Power is above the max power"),
+        ]
+    periods = profile[PERIOD_COLUMN].to_numpy()
+    messages = []
+    for mask, message in checks:
+        if mask.any():
+            listed = ", ".join(periods[mask][:MAX_LISTED_PERIODS])
+            more = ", ..." if mask.sum() > MAX_LISTED_PERIODS else ""
+            messages.append(f"{message}: {listed}{more} ({mask.sum()} of {len(periods)} periods)")
+    return messages
+
+
+def profile_request(profile, use_power, use_min_max):
+    # Request fields keyed by period number ("0".."23" or "0".."95"), as the backend expects
+    request = {}
+    for key, column in PROFILE_COLUMNS.items():
+        if use_power if key == "hourly_power" else use_min_max:
+            request[key] = dict(zip(map(str, range(len(profile))), profile[column].astype(float).tolist()))
+    return request
+
+
+def render_profile_editor(points, q_avg, q_min, q_max):
+    # One table widget for all periods instead of a number input per value
+    number_column = st.column_config.NumberColumn(min_value=0.0, step=0.1, format="%.2f", required=True)
+    return st.data_editor(
+        default_profile(points, q_avg, q_min, q_max),
+        column_config={PERIOD_COLUMN: st.column_config.TextColumn(disabled=True),
+                       **{column: number_column for column in PROFILE_COLUMNS.values()}},
+        hide_index=True,
+        use_container_width=True,
+        key=f"dsr_profile_editor_{points}"
+    )
@@ -0,0 +1,338 @@
+import json
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import requests
+import streamlit as st
+
+from backend_client import BackendError
+from dcf import is_finance_only_change, recalculate_response
+from metrics import metrics
+from resilience import CircuitOpenError, StaleResponse
+from response_cache import compress_payload, decode_payload, make_cache_key
+from result_views import ResponseMemo
+from scenario_store import SIZE_PARAMETERS, scenario_store
+from scheduler import PRIORITY_INTERACTIVE, current_session_id, scheduler
+from section_stream import assemble_sections
+
+# Background execution of calculator requests
+JOB_MAX_WORKERS = 8  # Process-wide, shared by all sessions
+JOB_RETENTION_SECONDS = 60 * 60  # Finished jobs are forgotten after this
+JOB_POLL_INTERVAL = 2  # Seconds between checks while a session has running jobs
+JOB_HISTORY_PER_CALCULATOR = 10  # Job ids kept per calculator in a session
+# Requests that differ from an earlier result of the session only in discount_rate / number_of_years
+# are recalculated from that result instead of being sent to the backend
+LOCAL_FINANCE_RECALCULATION = True
+
+
+class Job:
+    def __init__(self, job_id, endpoint, request_body, future, local=False, sections=None):
+        self.job_id = job_id
+        self.endpoint = endpoint
+        self.request_body = request_body
+        self.future = future
+        self.local = local
+        # (path, value) of the response sections streamed in so far, appended by the worker
+        self.sections = [] if sections is None else sections
+        self.submitted_at = time.time()
+        self.finished_at = None
+
+    @property
+    def status(self):
+        if not self.future.done():
+            return "running" if self.future.running() else "queued"
+        if self.future.exception() is not None:
+            return "failed"
+        return "stale" if self.stale is not None else "done"
+
+    @property
+    def stale(self):
+        # The StaleResponse of a finished job that got a saved response instead of a fresh one
+        if not self.future.done() or self.future.exception() is not None:
+            return None
+        from_cache = self.future.result()[1]
+        return from_cache if isinstance(from_cache, StaleResponse) else None
+
+    @property
+    def pending(self):
+        # Still calculating, including the background refresh of a stale result
+        if not self.future.done():
+            return True
+        stale = self.stale
+        return stale is not None and stale.refresh is not None and not stale.refresh.done()
+
+    @property
+    def streaming(self):
+        # Running, with part of a streamed response already received
+        return bool(self.sections) and not self.future.done()
+
+    @property
+    def label(self):
+        submitted = time.strftime("%H:%M:%S", time.localtime(self.submitted_at))
+        status = "recalculated locally" if self.local else self.status
+        return f"{self.endpoint.upper()} submitted {submitted} ({status})"
+
+
+class JobManager:
+    def __init__(self, max_workers=JOB_MAX_WORKERS, retention_seconds=JOB_RETENTION_SECONDS):
+        self.retention_seconds = retention_seconds
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="calculator-job")
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, client, endpoint, request_body, session_id=None):
+        self.prune()
+        job_id = uuid.uuid4().hex
+        sections = []
+        future = self._executor.submit(self._run, client, endpoint, request_body, session_id, job_id,
+                                       time.perf_counter(), sections.append)
+        job = Job(job_id, endpoint, request_body, future, sections=sections)
+        future.add_done_callback(lambda _: setattr(job, "finished_at", time.time()))
+        with self._lock:
+            self._jobs[job_id] = job
+        return job_id
+
+    @staticmethod
+    def _run(client, endpoint, request_body, session_id, job_id, submitted_at, add_section):
+        metrics.observe("queue", endpoint, time.perf_counter() - submitted_at)
+        # The job id tags the admission ticket so the session can show its place in the queue
+        return client.calculate_with_payload(endpoint, request_body, priority=PRIORITY_INTERACTIVE,
+                                             session_id=session_id, tag=job_id,
+                                             on_section=lambda path, value: add_section((path, value)))
+
+    def add_result(self, endpoint, request_body, result, local=True):
+        # Registers an already available result as a finished job: a local recalculation, or a
+        # stored scenario (local=False, it is a backend response)
+        self.prune()
+        future = Future()
+        future.set_result(result)
+        job = Job(uuid.uuid4().hex, endpoint, request_body, future, local=local)
+        job.finished_at = time.time()
+        with self._lock:
+            self._jobs[job.job_id] = job
+        return job.job_id
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def prune(self):
+        cutoff = time.time() - self.retention_seconds
+        with self._lock:
+            expired = [job_id for job_id, job in self._jobs.items()
+                       if job.finished_at is not None and job.finished_at < cutoff]
+            for job_id in expired:
+                del self._jobs[job_id]
+
+
+# Process-wide job manager; sessions only keep job ids in st.session_state
+job_manager = JobManager()
+
+
+def queue_job(session_key, job_id):
+    # A job already in the list moves to the end, where it becomes the one shown
+    job_ids = st.session_state.setdefault(session_key, [])
+    if job_id in job_ids:
+        job_ids.remove(job_id)
+    job_ids.append(job_id)
+    del job_ids[:-JOB_HISTORY_PER_CALCULATOR]
+
+
+def find_finance_base(session_key, endpoint, request_body):
+    # Newest successful backend result of this session that differs only in finance inputs
+    for job_id in reversed(st.session_state.get(session_key, [])):
+        job = job_manager.get(job_id)
+        if (job is not None and not job.local and job.status == "done" and job.endpoint == endpoint
+                and is_finance_only_change(job.request_body, request_body)):
+            return job
+    return None
+
+
+def find_same_request(session_key, endpoint, request_body):
+    # Newest job of this session for exactly this request that is still running or has a fresh result
+    for job_id in reversed(st.session_state.get(session_key, [])):
+        job = job_manager.get(job_id)
+        if (job is not None and job.endpoint == endpoint and job.request_body == request_body
+                and job.status not in ("failed", "stale")):
+            return job
+    return None
+
+
+def submit_job(session_key, client, endpoint, request_body):
+    # Submitting unchanged inputs shows the result already in the session instead of recalculating
+    same = find_same_request(session_key, endpoint, request_body)
+    if same is not None:
+        queue_job(session_key, same.job_id)
+        return
+    base = find_finance_base(session_key, endpoint, request_body) if LOCAL_FINANCE_RECALCULATION else None
+    job_id = None
+    if base is not None:
+        data, _, _ = base.future.result()
+        try:
+            data = recalculate_response(data, base.request_body, request_body)
+        except (KeyError, IndexError, TypeError, ValueError, ZeroDivisionError):
+            # The response lacks the yearly cash flows; let the backend calculate it
+            data = None
+        if data is not None:
+            json_bytes = json.dumps(data, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+            job_id = job_manager.add_result(endpoint, request_body, (data, False, compress_payload(json_bytes)))
+    if job_id is None:
+        job_id = job_manager.submit(client, endpoint, request_body, current_session_id())
+    queue_job(session_key, job_id)
+
+
+def render_saved_scenarios(session_key, endpoint):
+    # Past backend results of this calculator, from every session; opening one shows the stored
+    # response as the newest job without running the optimisation again
+    if not scenario_store.enabled:
+        return
+    with st.expander("Saved scenarios"):
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            provider = st.selectbox("Provider", ["All", "ESO", "Litgrid"], key=f"{endpoint}_saved_provider")
+        with col2:
+            sector = st.selectbox("Sector", ["All", "Paslaugų", "Energetikos", "Pramonės", "Telkėjas", "Kita"],
+                                  key=f"{endpoint}_saved_sector")
+        with col3:
+            size_min = st.number_input(f"{SIZE_PARAMETERS[endpoint]} from", value=None, min_value=0.0,
+                                       key=f"{endpoint}_saved_size_min")
+        with col4:
+            size_max = st.number_input(f"{SIZE_PARAMETERS[endpoint]} to", value=None, min_value=0.0,
+                                       key=f"{endpoint}_saved_size_max")
+
+        scenarios = scenario_store.search(endpoint, None if provider == "All" else provider,
+                                          None if sector == "All" else sector, size_min, size_max)
+        if not scenarios:
+            st.info("No saved scenarios match the filters.")
+            return
+        for scenario in scenarios:
+            scenario["created_at"] = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(scenario["created_at"]))
+        st.dataframe(scenarios, use_container_width=True, hide_index=True, column_config={
+            "id": "Scenario", "created_at": "Saved", "provider": "Provider", "sector": "Sector",
+            "size": SIZE_PARAMETERS[endpoint], "npv": "NPV (tūkst. EUR)", "cache_key": None
+        })
+
+        scenario_id = st.selectbox("Scenario", [scenario["id"] for scenario in scenarios],
+                                   key=f"{endpoint}_saved_scenario")
+        if st.button("Open", key=f"{endpoint}_saved_open"):
+            stored = scenario_store.load(scenario_id)
+            if stored is None:
+                st.error("The scenario is no longer stored.")
+                return
+            _, request_body, payload = stored
+            result = (decode_payload(payload), True, payload)
+            queue_job(session_key, job_manager.add_result(endpoint, request_body, result, local=False))
+
+
+def replace_refreshed_jobs(session_key, jobs):
+    # A stale job whose background refresh has finished gets the fresh result as a new, newest job
+    for job in jobs:
+        stale = job.stale
+        if stale is not None and stale.refreshed and not stale.replaced:
+            stale.replaced = True
+            # Decoded again: a refresh started while the circuit was open is shared by sessions
+            _, from_cache, payload = stale.refresh.result()
+            result = (decode_payload(payload), from_cache, payload)
+            queue_job(session_key, job_manager.add_result(job.endpoint, job.request_body, result, local=False))
+
+
+def render_stale_notice(stale):
+    saved = time.strftime("%Y-%m-%d %H:%M", time.localtime(stale.saved_at))
+    if stale.refresh is None:
+        refresh = "Submit again to retry."
+    elif not stale.refresh.done():
+        refresh = "A fresh calculation is running in the background and will replace this result."
+    elif stale.refresh.exception() is not None:
+        refresh = f"The background calculation failed too: {stale.refresh.exception()}"
+    else:
+        refresh = "The fresh result is listed under submitted scenarios."
+    st.warning(f"Stale result: this is the response saved {saved}, shown because {stale.reason}. {refresh}")
+
+
+def render_job_error(error):
+    if isinstance(error, CircuitOpenError):
+        st.error(f"Calculation not sent: {error}.")
+    elif isinstance(error, BackendError):
+        if error.detail:
+            st.error(f"Calculation failed: {error.detail}")
+        else:
+            st.error(f"Request failed with status code: {error.status_code}")
+    elif isinstance(error, requests.exceptions.RequestException):
+        st.error(f"Error making request: {str(error)}")
+    else:
+        st.error(f"An unexpected error occurred: {str(error)}")
+
+
+def render_streamed_sections(job, render_partial):
+    # The newest running job's response as far as it has been streamed in. Its figures are memoised
+    # per job: a section does not change once it has arrived.
+    sections = list(job.sections)
+    st.caption(f"Showing the first {len(sections)} section(s) of the response while the rest is calculated.")
+    render_partial(assemble_sections(sections), ResponseMemo(make_cache_key("streamed", job.job_id)))
+
+
+@st.fragment(run_every=JOB_POLL_INTERVAL)
+def poll_pending_jobs(job_ids, render_partial=None):
+    # Reruns only this fragment until every job is finished, then the whole app once
+    jobs = [job_manager.get(job_id) for job_id in job_ids]
+    pending = [job for job in jobs if job is not None and job.pending]
+    if not pending:
+        st.rerun()
+    st.info(f"Processing {len(pending)} request(s)... Results will appear here when ready, "
+            f"you can keep editing the form in the meantime.")
+    positions = [position for position in (scheduler.position(job.job_id) for job in pending) if position]
+    if positions:
+        st.caption(f"{len(positions)} request(s) waiting for a backend slot, next one at position {min(positions)} "
+                   f"of {scheduler.waiting()} in the queue.")
+    streaming = next((job for job in reversed(pending) if job.streaming), None)
+    if render_partial is not None and streaming is not None:
+        render_streamed_sections(streaming, render_partial)
+
+
+def render_jobs(session_key, render_results, render_error=render_job_error, render_partial=None):
+    # render_partial(data, memo), when given, draws a response that is still streaming in
+    # Drop ids of jobs the manager has already forgotten
+    jobs = [job_manager.get(job_id) for job_id in st.session_state.get(session_key, [])]
+    jobs = [job for job in jobs if job is not None]
+    st.session_state[session_key] = [job.job_id for job in jobs]
+    if not jobs:
+        return
+    replace_refreshed_jobs(session_key, jobs)
+    jobs = [job for job in map(job_manager.get, st.session_state[session_key]) if job is not None]
+
+    pending = [job for job in jobs if job.pending]
+    if pending:
+        poll_pending_jobs([job.job_id for job in pending], render_partial)
+
+    if len(jobs) > 1:
+        with st.expander(f"Submitted scenarios ({len(jobs)})"):
+            st.table([{"Scenario": job.label} for job in reversed(jobs)])
+
+    finished = [job for job in reversed(jobs) if job.future.done()]
+    # While a response streams in, the fragment above shows it instead of an older result; drawing
+    # both could repeat identical charts
+    if not finished or (render_partial is not None and any(job.streaming for job in pending)):
+        return
+
+    # The newest finished job is shown unless the user picks another one
+    selected = finished[0]
+    if len(finished) > 1:
+        # Options are job ids: widget values are deep-copied, and a job holds its future's lock
+        jobs_by_id = {job.job_id: job for job in finished}
+        selected_id = st.selectbox("Show results for", list(jobs_by_id),
+                                   format_func=lambda job_id: jobs_by_id[job_id].label)
+        selected = jobs_by_id[selected_id]
+
+    if selected.local:
+        st.info("Only discount_rate / number_of_years changed, so the previous optimisation was reused and "
+                "the cash flows were re-discounted locally.")
+    try:
+        data, from_cache, payload = selected.future.result()
+        if isinstance(from_cache, StaleResponse):
+            render_stale_notice(from_cache)
+        with metrics.timer("render", selected.endpoint):
+            render_results(data, from_cache, payload)
+    except Exception as e:
+        render_error(e)
@@ -0,0 +1,191 @@
+import functools
+import html
+
+import streamlit as st
+
+from result_views import render_tabs
+
+# Schema-driven rendering of aggregated.markets. Each market becomes one HTML fragment
+# (built once per response and cached), styled by a single shared <style> block.
+
+MARKET_CSS = """
+<style>
+.market-table { width: 100%; border-collapse: collapse; margin-bottom: 0px; font-size: 12px; }
+.market-table td { padding: 3px; text-align: center; }
+.market-table th { padding: 3px; text-align: center; font-weight: bold; }
+.market-row { display: flex; gap: 1rem; align-items: flex-start; }
+.market-row-title { flex: 1; min-width: 0; }
+.market-row-tables { flex: 5; min-width: 0; }
+.power-table td { background-color: #E0F0F5; }
+.power-header { font-weight: bold; background-color: #C5E0E8 !important; }
+.power-direction-header { background-color: #D5E8EF !important; }
+.power-market-title { background-color: #3D7890; color: white; padding: 5px; margin: 0; height: auto; font-size: 14px; }
+.energy-table td { background-color: #E6F5EC; }
+.energy-header { font-weight: bold; background-color: #D0EAD9 !important; }
+.energy-direction-header { background-color: #DCF0E2 !important; }
+.energy-market-title { background-color: #4D9D6A; color: white; padding: 5px; margin: 0; height: auto; font-size: 14px; }
+.trading-table td { background-color: #EFF5D8; }
+.trading-header { font-weight: bold; background-color: #E5ECC5 !important; }
+.trading-direction-header { background-color: #EAEFCE !important; }
+.trading-market-title { background-color: #8CB63C; color: white; padding: 5px; margin: 0; height: auto; font-size: 14px; }
+.hydrogen-table td { background-color: #F0E6FF; }
+.hydrogen-header { font-weight: bold; background-color: #E6D9FF !important; }
+.hydrogen-market-title { background-color: #8A63D2; color: white; padding: 5px; margin: 0; height: auto; font-size: 14px; }
+hr { margin: 5px 0 !important; }
+</style>
+"""
+
+# Column pairs of two-way tables: (key in the response, column header)
+DIRECTIONS = [("upward", "UPWARD"), ("downward", "DOWNWARD")]
+PURCHASE_SALE = [("purchase", "PURCHASE"), ("sale", "SALE")]
+COST_REVENUE = [("cost", "COST"), ("revenue", "REVENUE")]
+
+# Default section titles when the response omits them: section key -> (header, description)
+SECTION_TITLES = {
+    "FCR": ("FCR", "FREQUENCY CONTAINMENT RESERVE"),
+    "aFRR": ("aFRR", "AUTOMATIC FREQUENCY RESTORATION RESERVE"),
+    "mFRR": ("mFRR", "MANUAL FREQUENCY RESTORATION RESERVE"),
+}
+
+# Market specs. "tables" lists (field, default header, unit, columns) per section: a field
+# holding a "value" is a single cell, otherwise one cell per column present in the response.
+# A unit of None takes the unit from the response. "sections" of None renders every section
+# in response order.
+POWER_MARKET = {
+    "style": "power",
+    "sections": ["FCR", "aFRR", "mFRR"],
+    "tables": [
+        ("volume_of_procured_reserves", "VOLUME OF PROCURED RESERVES", "MW", DIRECTIONS),
+        ("utilisation", "UTILISATION (% OF TIME)", "%", DIRECTIONS),
+        ("potential_revenue", "POTENTIAL REVENUE", None, DIRECTIONS),
+        ("bids_selected", "% OF BIDS SELECTED", "%", DIRECTIONS),
+    ],
+    "missing": "Balansavimo pajėgumų rinkos duomenų nėra.",
+    "empty": "Nėra duomenų apie balansavimo pajėgumų rinką.",
+}
+
+ENERGY_MARKET = {
+    "style": "energy",
+    "sections": ["aFRR", "mFRR"],
+    "tables": [
+        ("volume_of_procured_energy", "VOLUME OF PROCURED ENERGY", "MWh", DIRECTIONS),
+        ("utilisation", "UTILISATION (% OF TIME)", "%", DIRECTIONS),
+        ("potential_revenue", "POTENTIAL REVENUE", None, DIRECTIONS),
+        ("bids_selected", "% OF BIDS SELECTED", "%", DIRECTIONS),
+    ],
+    "missing": "Balansavimo energijos rinkos duomenų nėra.",
+    "empty": "Nėra duomenų apie balansavimo energijos rinką.",
+}
+
+TRADING_MARKET = {
+    "style": "trading",
+    "sections": None,
+    "tables": [
+        ("volume_of_energy_exchange", "VOLUME OF ENERGY EXCHANGE", "MWh", PURCHASE_SALE),
+        ("percentage_of_time", "% OF TIME", "%", PURCHASE_SALE),
+        ("potential_cost_revenue", "COST & REVENUE", None, COST_REVENUE),
+    ],
+    "missing": "Elektros energijos prekybos duomenų nėra.",
+    "empty": "Nėra elektros energijos prekybos duomenų.",
+}
+
+# P2G reports energy volumes in GWh and buys electricity only
+P2G_ENERGY_MARKET = dict(ENERGY_MARKET, tables=[
+    ("volume_of_procured_energy", "VOLUME OF PROCURED ENERGY", "GWh", DIRECTIONS),
+] + ENERGY_MARKET["tables"][1:])
+
+P2G_TRADING_MARKET = dict(TRADING_MARKET, sections=["Day_Ahead"], tables=[
+    ("volume_of_energy_exchange", "VOLUME", "GWh", [("purchase", "PURCHASE")]),
+    ("percentage_of_time", "% OF TIME", "%", [("purchase", "PURCHASE")]),
+    ("potential_cost_revenue", "COST", None, [("cost", "COST")]),
+])
+
+HYDROGEN_MARKET = {
+    "style": "hydrogen",
+    "sections": ["Hydrogen_Sales"],
+    "tables": [
+        ("volume_of_h2_sold", "VOLUME SOLD", "kg", None),
+        ("potential_cost_revenue", "REVENUE", None, [("revenue", "REVENUE")]),
+    ],
+    "missing": "Vandenilio prekybos duomenų nėra.",
+    "empty": "Vandenilio prekybos duomenų nėra.",
+}
+
+# Market tabs per calculator: (key in aggregated.markets, tab label, market spec)
+BALANCING_AND_TRADING_MARKETS = [
+    ("BALANSAVIMO_PAJEGUMU_RINKA", "BALANSAVIMO PAJĖGUMŲ RINKA", POWER_MARKET),
+    ("BALANSAVIMO_ENERGIJOS_RINKA", "BALANSAVIMO ENERGIJOS RINKA", ENERGY_MARKET),
+    ("ELEKTROS_ENERGIJOS_PREKYBA", "ELEKTROS ENERGIJOS PREKYBA", TRADING_MARKET),
+]
+P2G_MARKETS = [
+    ("BALANSAVIMO_PAJEGUMU_RINKA", "BALANSAVIMO PAJĖGUMŲ RINKA", POWER_MARKET),
+    ("BALANSAVIMO_ENERGIJOS_RINKA", "BALANSAVIMO ENERGIJOS RINKA", P2G_ENERGY_MARKET),
+    ("ELEKTROS_ENERGIJOS_PREKYBA", "ELEKTROS ENERGIJOS PREKYBA", P2G_TRADING_MARKET),
+    ("VANDENILIO_PREKYBA", "VANDENILIO PREKYBA", HYDROGEN_MARKET),
+]
+
+
+# Shown for a cell whose value the response does not include, rather than a made-up zero
+MISSING_VALUE = "–"
+
+
+def _cell(item, unit):
+    if not item or item.get("value") is None:
+        return MISSING_VALUE
+    return f"{item['value']:.2f} {html.escape(unit or item.get('unit', 'tūkst. EUR'))}"
+
+
+def build_table_html(field, header, unit, columns, style):
+    header = html.escape(field.get("header", header))
+    if "value" in field:
+        return (f'<table class="market-table {style}-table"><tr><th class="{style}-header">{header}</th></tr>'
+                f'<tr><td>{_cell(field, unit)}</td></tr></table>')
+    present = [(key, label) for key, label in columns or [] if key in field]
+    if not present:
+        return (f'<table class="market-table {style}-table"><tr><th class="{style}-header" colspan="2">{header}</th></tr>'
+                f'<tr><td colspan="2">Nėra duomenų</td></tr></table>')
+    if len(present) == 1:
+        return (f'<table class="market-table {style}-table"><tr><th class="{style}-header">{header}</th></tr>'
+                f'<tr><td>{_cell(field[present[0][0]], unit)}</td></tr></table>')
+    span = len(present)
+    labels = "".join(f'<th class="{style}-direction-header">{label}</th>' for _, label in present)
+    cells = "".join(f"<td>{_cell(field[key], unit)}</td>" for key, _ in present)
+    return (f'<table class="market-table {style}-table"><tr><th class="{style}-header" colspan="{span}">{header}</th></tr>'
+            f"<tr>{labels}</tr><tr>{cells}</tr></table>")
+
+
+def build_section_html(section_key, section, spec):
+    style = spec["style"]
+    default_header, default_description = SECTION_TITLES.get(section_key, (section_key.replace("_", " "), ""))
+    title = (f'<div class="{style}-market-title"><h4 style="margin:0;">'
+             f'{html.escape(section.get("header", default_header))}</h4>'
+             f'<small>{html.escape(section.get("description", default_description))}</small></div>')
+    tables = "".join(build_table_html(section.get(field, {}), header, unit, columns, style)
+                     for field, header, unit, columns in spec["tables"])
+    return (f'<div class="market-row"><div class="market-row-title">{title}</div>'
+            f'<div class="market-row-tables">{tables}</div></div>')
+
+
+def build_market_html(market_data, spec):
+    # One fragment per market, no newlines so markdown keeps it as a single HTML block
+    section_keys = spec["sections"] if spec["sections"] is not None else list(market_data)
+    sections = [build_section_html(key, market_data[key], spec) for key in section_keys if key in market_data]
+    return "<hr>".join(sections)
+
+
+def render_market(market_key, spec, markets_data, memo):
+    if market_key not in markets_data:
+        st.info(spec["missing"])
+        return
+    fragment = memo.html(f"market:{market_key}", build_market_html, markets_data[market_key], spec)
+    if fragment:
+        st.markdown(fragment, unsafe_allow_html=True)
+    else:
+        st.info(spec["empty"])
+
+
+def render_market_tabs(key, markets_data, markets, memo):
+    # Styles go out once per page; each market tab is a single cached markdown element
+    st.markdown(MARKET_CSS, unsafe_allow_html=True)
+    render_tabs(key, [(label, functools.partial(render_market, market_key, spec))
+                      for market_key, label, spec in markets], markets_data, memo)
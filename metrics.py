@@ -0,0 +1,204 @@
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import streamlit as st
+
+from resilience import breaker_rows
+
+# Hot-path instrumentation: stage timers, byte counters and cache hit/miss counters per endpoint.
+# Shown in the debug panel (P2X_DEBUG_PANEL=1 or ?debug=1), served as Prometheus text on
+# P2X_METRICS_PORT and, with P2X_METRICS_LOG=1, logged as one JSON line per calculation.
+METRICS_SAMPLE_SIZE = 1024  # Recent durations kept per timer for the percentiles
+METRICS_PORT = int(os.environ.get("P2X_METRICS_PORT", "0"))  # 0 disables the /metrics endpoint
+METRICS_LOG = os.environ.get("P2X_METRICS_LOG", "0") == "1"
+DEBUG_PANEL = os.environ.get("P2X_DEBUG_PANEL", "0") == "1"
+QUANTILES = (0.5, 0.95, 0.99)
+
+# Stages of one submission, in the order they happen
+STAGES = {
+    "page": "Whole script run of the calculator page (form and results)",
+    "queue": "Job waiting for a free worker",
+    "admission": "Backend call waiting for the scheduler (rate limit, concurrency, priority)",
+    "calculate": "Backend call including cache lookup, from the worker's point of view",
+    "serialize": "Request body to JSON",
+    "wait": "Request sent until response headers (network and backend compute)",
+    "backend": "Compute time reported by the backend (Server-Timing)",
+    "first_section": "Response headers until the first section of a streamed response (NDJSON)",
+    "download": "Reading the response body",
+    "fetch": "Successful backend call, request sent until the response is read",
+    "decode": "Decompressing and parsing the JSON",
+    "render": "Drawing the selected results tab",
+}
+
+logger = logging.getLogger("p2x.metrics")
+if METRICS_LOG:
+    logger.setLevel(logging.INFO)
+    if not logger.handlers:
+        logger.addHandler(logging.StreamHandler())
+
+
+class Metrics:
+    def __init__(self, sample_size=METRICS_SAMPLE_SIZE):
+        self.sample_size = sample_size
+        self._timers = {}  # (stage, endpoint) -> [count, total seconds, recent durations]
+        self._counters = {}  # (name, endpoint) -> value
+        self._lock = threading.Lock()
+
+    def observe(self, stage, endpoint, seconds):
+        with self._lock:
+            timer = self._timers.get((stage, endpoint))
+            if timer is None:
+                timer = self._timers[(stage, endpoint)] = [0, 0.0, deque(maxlen=self.sample_size)]
+            timer[0] += 1
+            timer[1] += seconds
+            timer[2].append(seconds)
+
+    def increment(self, name, endpoint, amount=1):
+        with self._lock:
+            self._counters[(name, endpoint)] = self._counters.get((name, endpoint), 0) + amount
+
+    @contextmanager
+    def timer(self, stage, endpoint, stages=None):
+        # stages, when given, collects this request's durations for its log line
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            self.observe(stage, endpoint, elapsed)
+            if stages is not None:
+                stages[stage] = elapsed
+
+    def quantile(self, stage, endpoint, q):
+        # Over the recent durations of one timer; None before its first observation
+        with self._lock:
+            timer = self._timers.get((stage, endpoint))
+            recent = sorted(timer[2]) if timer is not None else None
+        if not recent:
+            return None
+        return recent[min(len(recent) - 1, int(q * len(recent)))]
+
+    def timer_rows(self):
+        with self._lock:
+            timers = [(key, count, total, sorted(recent)) for key, (count, total, recent) in self._timers.items()]
+        order = list(STAGES)
+        timers.sort(key=lambda t: (t[0][1], order.index(t[0][0]) if t[0][0] in order else len(order)))
+        rows = []
+        for (stage, endpoint), count, total, recent in timers:
+            row = {"endpoint": endpoint, "stage": stage, "count": count, "mean_ms": total / count * 1000}
+            for q in QUANTILES:
+                row[f"p{int(q * 100)}_ms"] = recent[min(len(recent) - 1, int(q * len(recent)))] * 1000
+            rows.append(row)
+        return rows
+
+    def counter_rows(self):
+        with self._lock:
+            counters = sorted(self._counters.items())
+        return [{"endpoint": endpoint, "counter": name, "value": value} for (name, endpoint), value in counters]
+
+    def prometheus_text(self):
+        lines = ["# HELP p2x_stage_seconds Duration of each submission stage",
+                 "# TYPE p2x_stage_seconds summary"]
+        for row in self.timer_rows():
+            labels = f'stage="{row["stage"]}",endpoint="{row["endpoint"]}"'
+            for q in QUANTILES:
+                lines.append(f'p2x_stage_seconds{{{labels},quantile="{q}"}} {row[f"p{int(q * 100)}_ms"] / 1000:.6f}')
+            lines.append(f"p2x_stage_seconds_sum{{{labels}}} {row['mean_ms'] * row['count'] / 1000:.6f}")
+            lines.append(f"p2x_stage_seconds_count{{{labels}}} {row['count']}")
+        counter_rows = self.counter_rows()
+        for name in sorted({row["counter"] for row in counter_rows}):
+            lines.append(f"# TYPE p2x_{name}_total counter")
+            for row in counter_rows:
+                if row["counter"] == name:
+                    lines.append(f'p2x_{name}_total{{endpoint="{row["endpoint"]}"}} {row["value"]}')
+        return "\n".join(lines) + "\n"
+
+    def log_calculation(self, endpoint, from_cache, stages, request_body, payload):
+        if not METRICS_LOG:
+            return
+        logger.info(json.dumps({
+            "event": "calculate", "endpoint": endpoint, "cache": "hit" if from_cache else "miss",
+            "stages_ms": {stage: round(seconds * 1000, 2) for stage, seconds in stages.items()},
+            "request_bytes": len(json.dumps(request_body)), "response_bytes": len(payload),
+            "json_bytes": gzip_size(payload)
+        }))
+
+    def clear(self):
+        with self._lock:
+            self._timers.clear()
+            self._counters.clear()
+
+
+def gzip_size(payload):
+    # Uncompressed size from the gzip trailer (modulo 4 GiB), without decompressing
+    return int.from_bytes(payload[-4:], "little") if len(payload) >= 4 else 0
+
+
+def parse_server_timing(header):
+    # Sum of the durations in a Server-Timing header ("compute;dur=812.5, db;dur=3"), in seconds
+    total = None
+    for entry in (header or "").split(","):
+        for param in entry.split(";")[1:]:
+            name, _, value = param.strip().partition("=")
+            if name == "dur":
+                try:
+                    total = (total or 0.0) + float(value) / 1000
+                except ValueError:
+                    pass
+    return total
+
+
+# Process-wide metrics shared by every calculator and every Streamlit session
+metrics = Metrics()
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = metrics.prometheus_text().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_metrics_server(port=METRICS_PORT, host="0.0.0.0"):
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    return server
+
+
+def render_debug_panel():
+    if not (DEBUG_PANEL or st.query_params.get("debug") == "1"):
+        return
+    with st.sidebar.expander("Debug: performance", expanded=True):
+        st.caption("Process-wide, since the server started. p50/p95/p99 over the last "
+                   f"{METRICS_SAMPLE_SIZE} samples per stage.")
+        timer_rows = metrics.timer_rows()
+        if timer_rows:
+            st.dataframe(timer_rows, hide_index=True, use_container_width=True,
+                         column_config={key: st.column_config.NumberColumn(format="%.1f")
+                                        for key in ("mean_ms", "p50_ms", "p95_ms", "p99_ms")})
+        counter_rows = metrics.counter_rows()
+        if counter_rows:
+            st.dataframe(counter_rows, hide_index=True, use_container_width=True)
+        breakers = breaker_rows()
+        if breakers:
+            st.caption("Circuit breakers")
+            st.dataframe(breakers, hide_index=True, use_container_width=True)
+        with st.popover("Stages"):
+            st.table([{"Stage": stage, "Measures": text} for stage, text in STAGES.items()])
+        if st.button("Reset metrics"):
+            metrics.clear()
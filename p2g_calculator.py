@@ -1,16 +1,25 @@
 import streamlit as st
-import requests
-import json
-import plotly.express as px
-from plotly.subplots import make_subplots
-import plotly.graph_objects as go
 import pandas as pd
 
+from backend_client import get_backend_client
+from batch_runner import apply_overrides, run_batch
+from dcf import final_npv
+from job_manager import render_jobs, render_saved_scenarios, submit_job
+from market_tables import P2G_MARKETS, render_market_tabs
+from response_diff import render_response_diff
+from result_views import (LAST_RUN_NOTE, last_run, last_run_inputs, pending_tabs, remember_run, render_tabs,
+                          response_memo, run_memo)
+from sensitivity import render_sensitivity, render_sensitivity_inputs
+
 
 def render_p2g_calculator(BE_URL, LOCAL_MODE, P2X_APIM_SECRET):
     st.header("P2G Demo")
     st.write("Fill in the form below to submit a request to the P2G API.")
 
+    # One electrolyzer technology per request, or all of them side by side
+    electrolyzer_options = ["SOEC", "AEL", "PEM"]
+    p2g_mode = st.radio("Mode", ["Single technology", "Compare technologies", "Sensitivity"], horizontal=True, key="p2g_mode")
+
     # Create form for P2G input parameters
     with st.form("p2g_input_form"):
         st.header("Input Parameters")
@@ -34,12 +43,15 @@ def render_p2g_calculator(BE_URL, LOCAL_MODE, P2X_APIM_SECRET):
         )
 
         # Electrolyzer technology selection
-        electrolyzer_tech = st.radio(
-            "Kokia elektrolizerio technologija:",
-            ["SOEC", "AEL", "PEM"],
-            horizontal=True,
-            key="p2g_electrolyzer_tech"
-        )
+        if p2g_mode != "Compare technologies":
+            electrolyzer_tech = st.radio(
+                "Kokia elektrolizerio technologija:",
+                electrolyzer_options,
+                horizontal=True,
+                key="p2g_electrolyzer_tech"
+            )
+        else:
+            electrolyzer_tech = electrolyzer_options[0]
 
         # Create columns for a more compact layout
         col1, col2 = st.columns(2)
@@ -118,6 +130,9 @@ def render_p2g_calculator(BE_URL, LOCAL_MODE, P2X_APIM_SECRET):
         with col11:
             p_mfrrd_bsp = st.number_input("mFRRd", value=0.0, step=1.0, key="p2g_mfrrd_energy")
 
+        if p2g_mode == "Sensitivity":
+            sensitivity_parameters, sensitivity_percent = render_sensitivity_inputs("p2g")
+
         # Submit button
         submit_button = st.form_submit_button("Submit")
 
@@ -165,370 +180,359 @@ def render_p2g_calculator(BE_URL, LOCAL_MODE, P2X_APIM_SECRET):
             "produktai": produktai
         }
 
+        if p2g_mode == "Compare technologies":
+            # One request per technology is sent; they differ only in electrolyzer_tech
+            with st.expander(f"Request Bodies ({len(electrolyzer_options)} technologies)"):
+                for tech in electrolyzer_options:
+                    st.write(f"**{tech}**")
+                    st.json(apply_overrides(request_body, {"electrolyzer_tech": tech}), expanded=False)
+            render_p2g_tech_comparison(BE_URL, LOCAL_MODE, P2X_APIM_SECRET, request_body, electrolyzer_options)
+            return
+
         with st.expander("Request Body"):
             st.json(request_body)
+        if p2g_mode == "Sensitivity":
+            render_sensitivity(BE_URL, LOCAL_MODE, P2X_APIM_SECRET, "p2g", request_body, sensitivity_parameters,
+                               sensitivity_percent)
+            return
+
+        # Submit in the background; the job id survives reruns in the session state
+        client = get_backend_client(BE_URL, LOCAL_MODE, P2X_APIM_SECRET)
+        submit_job("p2g_jobs", client, "p2g", request_body)
+    elif p2g_mode == "Compare technologies" and last_run_inputs("p2g_tech_run") is not None:
+        # Nothing submitted on this rerun: redraw the last run from memory
+        render_p2g_tech_comparison(BE_URL, LOCAL_MODE, P2X_APIM_SECRET, *last_run_inputs("p2g_tech_run"))
+    elif p2g_mode == "Sensitivity" and last_run_inputs("p2g_sensitivity_run") is not None:
+        render_sensitivity(BE_URL, LOCAL_MODE, P2X_APIM_SECRET, *last_run_inputs("p2g_sensitivity_run"))
+
+    # Show progress or the latest results of this session's P2G requests
+    if p2g_mode == "Single technology":
+        render_saved_scenarios("p2g_jobs", "p2g")
+        render_response_diff("p2g_jobs", "p2g")
+        render_jobs("p2g_jobs", render_p2g_results, render_partial=render_p2g_partial)
+
+
+TECH_COLORS = {"SOEC": "#8A63D2", "AEL": "#2ecc71", "PEM": "#3498db"}
+
+
+def render_p2g_tech_comparison(BE_URL, LOCAL_MODE, P2X_APIM_SECRET, base_request_body, technologies):
+    # All technologies run at once, so the comparison takes about as long as one backend call
+    inputs = (base_request_body, technologies)
+    memo = run_memo("p2g_tech_run", inputs)
+    st.header("Technology Comparison")
+    stored = last_run("p2g_tech_run", inputs)
+    if stored is not None:
+        st.caption(LAST_RUN_NOTE)
+        rows, econ_by_tech = stored
+        draw_p2g_tech_comparison(rows, econ_by_tech, [st.empty() for _ in range(4)], len(rows), memo)
+        return
+
+    request_bodies = [apply_overrides(base_request_body, {"electrolyzer_tech": tech}) for tech in technologies]
+    total = len(request_bodies)
+    progress = st.progress(0.0, text=f"0/{total} technologies finished")
+    placeholders = [st.empty() for _ in range(4)]
+
+    client = get_backend_client(BE_URL, LOCAL_MODE, P2X_APIM_SECRET)
+    results = {}
+    rows = []
+    for done, (index, data, error) in enumerate(run_batch(client, "p2g", request_bodies, max_workers=total),
+                                                start=1):
+        tech = technologies[index]
+        row = {"Technology": tech}
+        if error is None:
+            results[tech] = data.get("aggregated", {}).get("economic_results", {})
+            row["NPV (tūkst. EUR)"] = final_npv(data)
+            row["Total annual profit (tūkst. EUR)"] = results[tech].get("total_profit")
+            row["Status"] = "OK"
+        else:
+            row["Status"] = f"Error: {str(error)}"
+        rows.append(row)
+
+        progress.progress(done / total, text=f"{done}/{total} technologies finished")
+        # Keep the technology order stable so colours and legends do not jump between redraws
+        ordered = {tech: results[tech] for tech in technologies if tech in results}
+        rows.sort(key=lambda r: technologies.index(r["Technology"]))
+        draw_p2g_tech_comparison(rows, ordered, placeholders, done, memo if done == total else None)
+    remember_run("p2g_tech_run", inputs, (rows, ordered))
+
+
+def draw_p2g_tech_comparison(rows, econ_by_tech, placeholders, draw_id, memo=None):
+    # placeholders: table, SOH, yearly NPV and variable costs; memo is given for the final state only
+    table_placeholder, soh_placeholder, npv_placeholder, costs_placeholder = placeholders
+    table_placeholder.dataframe(pd.DataFrame(rows), use_container_width=True, hide_index=True)
+    for placeholder, chart_id, build in ((soh_placeholder, "soh", build_p2g_tech_soh_figure),
+                                         (npv_placeholder, "npv", build_p2g_tech_yearly_npv_figure),
+                                         (costs_placeholder, "costs", build_p2g_tech_variable_costs_figure)):
+        figure = memo.figure(f"tech_{chart_id}", build, econ_by_tech) if memo else build(econ_by_tech)
+        placeholder.plotly_chart(figure, use_container_width=True, key=f"p2g_tech_{chart_id}_{draw_id}")
+
+
+def build_p2g_tech_soh_figure(econ_by_tech):
+    import plotly.graph_objects as go
+    fig_soh = go.Figure()
+    for tech, econ_data in econ_by_tech.items():
+        soh_df = pd.DataFrame(econ_data.get("soh_data") or [])
+        if "YEAR" in soh_df.columns and "SOH (%)" in soh_df.columns:
+            fig_soh.add_trace(go.Scatter(x=soh_df["YEAR"], y=soh_df["SOH (%)"], mode='lines+markers', name=tech,
+                                         line=dict(color=TECH_COLORS.get(tech)),
+                                         hovertemplate='%{y:,.2f}<extra></extra>'))
+    fig_soh.update_layout(title="ELECTROLYZER STATE OF HEALTH OVER TIME", xaxis_title="YEAR", yaxis_title="SOH (%)")
+    return fig_soh
+
+
+def build_p2g_tech_yearly_npv_figure(econ_by_tech):
+    import plotly.graph_objects as go
+    fig_npv = go.Figure()
+    for tech, econ_data in econ_by_tech.items():
+        yearly_df = pd.DataFrame(econ_data.get("yearly_table") or [])
+        if "YEAR" in yearly_df.columns and "NPV (tūkst. EUR)" in yearly_df.columns:
+            fig_npv.add_trace(go.Scatter(x=yearly_df["YEAR"], y=yearly_df["NPV (tūkst. EUR)"], mode='lines+markers',
+                                         name=tech, line=dict(color=TECH_COLORS.get(tech)),
+                                         hovertemplate='%{y:,.2f}<extra></extra>'))
+    fig_npv.update_layout(title="NET PRESENT VALUE OVER TIME", xaxis_title="YEAR", yaxis_title="NPV (tūkst. EUR)")
+    return fig_npv
+
+
+def build_p2g_tech_variable_costs_figure(econ_by_tech):
+    import plotly.graph_objects as go
+    fig_cost = go.Figure()
+    for tech, econ_data in econ_by_tech.items():
+        costs_df = pd.DataFrame(econ_data.get("variable_costs_by_product") or [])
+        if "Product" in costs_df.columns and "Value (tūkst. EUR)" in costs_df.columns:
+            fig_cost.add_trace(go.Bar(x=costs_df["Product"], y=costs_df["Value (tūkst. EUR)"], name=tech,
+                                      marker_color=TECH_COLORS.get(tech),
+                                      hovertemplate='%{y:,.2f}<extra></extra>'))
+    fig_cost.update_layout(title="VARIABLE COSTS BY PRODUCT", barmode='group', yaxis_title="Value (tūkst. EUR)")
+    return fig_cost
+
+
+# Result tab -> the aggregated section it shows, for drawing streamed responses
+P2G_RESULT_SECTIONS = {
+    "Summary": "summary",
+    "Market Details": "markets",
+    "Economic Results": "economic_results",
+}
+
+
+def render_p2g_results(data, from_cache, payload):
+    st.success("Request successful! (cached result)" if from_cache else "Request successful!")
+    st.download_button(
+        label="Download JSON (gzip)",
+        data=payload,  # gzip-compressed bytes as received, not a re-encoded copy
+        file_name="p2g_response.json.gz",
+        mime="application/gzip"
+    )
+
+    st.header("Visualization")
+    render_p2g_tabs("p2g_result_tab", data, response_memo("p2g_response_memo", data))
+
+
+def render_p2g_partial(data, memo):
+    # A response still streaming in; tabs whose section has not arrived yet say so
+    render_p2g_tabs("p2g_streamed_tab", data, memo, pending_tabs(P2G_RESULT_SECTIONS, data))
+
+
+def render_p2g_tabs(key, data, memo, pending=()):
+    render_tabs(key, [
+        ("Summary", render_p2g_summary),
+        ("Market Details", render_p2g_market_details),
+        ("Economic Results", render_p2g_economic_results),
+    ], data, memo, pending=pending)
+
+
+def render_p2g_summary(data, memo):
+    st.subheader("SUMMARY")
+    if "aggregated" in data and "summary" in data["aggregated"]:
+        summary = data["aggregated"]["summary"]
+        st.write("##### YEARLY SUMMARY")
+        yearly_summary_table = [dict(row) for row in summary.get('yearly_summary_table', [])]
+        # Format values with units (on copies, the same response is re-rendered on reruns)
+        for row in yearly_summary_table:
+            if 'Value' in row and isinstance(row['Value'], (int, float)):
+                value = row['Value']
+                sign = "+" if value > 0 else ""
+                row['Value'] = f"{sign}{value:.2f} tūkst. EUR/year"
+        st.table(yearly_summary_table)
+        st.write("##### PROJECT (LIFETIME) SUMMARY")
+        project_summary_table = [dict(row) for row in summary.get('project_summary_table', [])]
+        # Format values with units (on copies, the same response is re-rendered on reruns)
+        for row in project_summary_table:
+            if 'Value' in row and isinstance(row['Value'], (int, float)):
+                value = row['Value']
+                sign = "+" if value > 0 else ""
+                row['Value'] = f"{sign}{value:.2f} tūkst. EUR"
+        st.table(project_summary_table)
+        st.write("##### SUPPLEMENTED WITH GRAPHS")
 
-        with st.spinner("Processing request..."):
-            try:
-                # Build headers for local mode
-                headers = {}
-                if LOCAL_MODE:
-                    headers["P2X-APIM-Secret"] = P2X_APIM_SECRET
-
-                # response = requests.post(f"{BE_URL}p2g", json=request_body)
-                response = requests.post(f"{BE_URL}p2g", data={"parameters": json.dumps(request_body)}, headers=headers)
-                if response.status_code == 200:
-                    data = response.json()
-                    st.success("Request successful!")
-                    st.download_button(
-                        label="Download JSON",
-                        data=json.dumps(data, indent=2),
-                        file_name="p2g_response.json",
-                        mime="application/json"
-                    )
-
-                    st.header("Visualization")
-                    tab1, tab2, tab3 = st.tabs(["Summary", "Market Details", "Economic Results"])
-
-                    with tab1:
-                        st.subheader("SUMMARY")
-                        if "aggregated" in data and "summary" in data["aggregated"]:
-                            summary = data["aggregated"]["summary"]
-                            st.write("##### YEARLY SUMMARY")
-                            yearly_summary_table = summary.get('yearly_summary_table', [])
-                            # Format values with units
-                            for row in yearly_summary_table:
-                                if 'Value' in row and isinstance(row['Value'], (int, float)):
-                                    value = row['Value']
-                                    sign = "+" if value > 0 else ""
-                                    row['Value'] = f"{sign}{value:.2f} tūkst. EUR/year"
-                            st.table(yearly_summary_table)
-                            st.write("##### PROJECT (LIFETIME) SUMMARY")
-                            project_summary_table = summary.get('project_summary_table', [])
-                            # Format values with units
-                            for row in project_summary_table:
-                                if 'Value' in row and isinstance(row['Value'], (int, float)):
-                                    value = row['Value']
-                                    sign = "+" if value > 0 else ""
-                                    row['Value'] = f"{sign}{value:.2f} tūkst. EUR"
-                            st.table(project_summary_table)
-                            st.write("##### SUPPLEMENTED WITH GRAPHS")
-
-                            col1, col2 = st.columns(2)
-                            with col1:
-                                npv_data = summary.get('npv_chart_data', {})
-                                if npv_data and 'years' in npv_data and 'dcfs' in npv_data and 'npv' in npv_data:
-                                    fig_npv = make_subplots(specs=[[{"secondary_y": True}]])
-                                    fig_npv.add_trace(go.Bar(x=npv_data['years'], y=npv_data['dcfs'],
-                                                             name="Discounted Cash Flow", marker_color="lightblue",
-                                                             opacity=0.7),
-                                                      secondary_y=False)
-                                    fig_npv.add_trace(go.Scatter(x=npv_data['years'], y=npv_data['npv'],
-                                                                 mode="lines+markers", name="Cumulative NPV",
-                                                                 line=dict(color="red", width=3)), secondary_y=True)
-                                    if npv_data.get('break_even_point') is not None and \
-                                            isinstance(npv_data['break_even_point'], int) and \
-                                            0 <= npv_data['break_even_point'] < len(npv_data['years']):
-                                        break_even_year = npv_data['years'][npv_data['break_even_point']]
-                                        break_even_value = npv_data['npv'][npv_data['break_even_point']]
-                                        fig_npv.add_scatter(x=[break_even_year], y=[break_even_value], mode="markers",
-                                                            marker=dict(size=10, color="green"),
-                                                            name="Break-even Point",
-                                                            secondary_y=True)
-                                    fig_npv.update_xaxes(title_text="Year")
-                                    fig_npv.update_yaxes(title_text="Discounted Cash Flow (tūkst. EUR)",
-                                                         secondary_y=False)
-                                    fig_npv.update_yaxes(title_text="Cumulative NPV (tūkst. EUR)", secondary_y=True)
-                                    fig_npv.update_layout(title="NET PRESENT VALUE ANALYSIS", hovermode='x unified')
-                                    st.plotly_chart(fig_npv, use_container_width=True)
-                                else:
-                                    st.info("NPV chart data is incomplete or missing key fields.")
-
-                            with col2:
-                                rev_cost_data = summary.get('revenue_cost_chart_data', {})
-                                if rev_cost_data and 'products' in rev_cost_data and 'values' in rev_cost_data:
-                                    fig_rev_cost = px.bar(x=rev_cost_data['products'], y=rev_cost_data['values'],
-                                                          labels={"x": "Product", "y": "Value (tūkst. EUR)"},
-                                                          title="REVENUE vs COST BY PRODUCTS")
-                                    colors = ['red' if v < 0 else 'green' for v in rev_cost_data['values']]
-                                    fig_rev_cost.update_traces(marker_color=colors,
-                                                               hovertemplate='%{y:,.2f}<extra></extra>')
-                                    st.plotly_chart(fig_rev_cost, use_container_width=True)
-                                else:
-                                    st.info("Revenue/Cost chart data is incomplete or missing key fields.")
-
-                            col3, col4 = st.columns(2)
-                            with col3:
-                                util_data = summary.get('utilisation_chart_data', {})
-                                if util_data and util_data.get('products') and util_data.get('values'):
-                                    fig_util = px.bar(
-                                        x=util_data['products'],
-                                        y=util_data['values'],
-                                        labels={"x": "Product", "y": "Utilisation (%)"},
-                                        title="UTILISATION (% TIME) BY PRODUCTS"
-                                    )
-                                    fig_util.update_traces(hovertemplate='%{y:,.2f}<extra></extra>')
-                                    st.plotly_chart(fig_util, use_container_width=True)
-                                else:
-                                    st.info("Utilisation chart data is incomplete or missing key fields.")
-
-                    with tab2:
-                        st.subheader("MARKET DETAILS")
-                        st.markdown("""
-                        <style>
-                        .market-table { width: 100%; border-collapse: collapse; margin-bottom: 0px; font-size: 12px; }
-                        .market-table td { padding: 3px; text-align: center; }
-                        .market-table th { padding: 3px; text-align: center; font-weight: bold; }
-                        .power-table td { background-color: #E0F0F5; }
-                        .power-header { font-weight: bold; background-color: #C5E0E8 !important; }
-                        .power-direction-header { background-color: #D5E8EF !important; }
-                        .power-market-title { background-color: #3D7890; color: white; padding: 5px; margin: 0; height: auto; font-size: 14px; }
-                        .energy-table td { background-color: #E6F5EC; }
-                        .energy-header { font-weight: bold; background-color: #D0EAD9 !important; }
-                        .energy-direction-header { background-color: #DCF0E2 !important; }
-                        .energy-market-title { background-color: #4D9D6A; color: white; padding: 5px; margin: 0; height: auto; font-size: 14px; }
-                        .trading-table td { background-color: #EFF5D8; }
-                        .trading-header { font-weight: bold; background-color: #E5ECC5 !important; }
-                        .trading-direction-header { background-color: #EAEFCE !important; }
-                        .trading-market-title { background-color: #8CB63C; color: white; padding: 5px; margin: 0; height: auto; font-size: 14px; }
-                        .hydrogen-table td { background-color: #F0E6FF; }
-                        .hydrogen-header { font-weight: bold; background-color: #E6D9FF !important; }
-                        .hydrogen-market-title { background-color: #8A63D2; color: white; padding: 5px; margin: 0; height: auto; font-size: 14px; }
-                        .row-compact { margin-bottom: 0px !important; padding: 0px !important; }
-                        hr { margin: 5px 0 !important; }
-                        </style>
-                        """, unsafe_allow_html=True)
-
-                        if "aggregated" in data and "markets" in data["aggregated"]:
-                            markets_data = data["aggregated"]["markets"]
-
-                            market_tabs_p2g = st.tabs([
-                                "BALANSAVIMO PAJĖGUMŲ RINKA",
-                                "BALANSAVIMO ENERGIJOS RINKA",
-                                "ELEKTROS ENERGIJOS PREKYBA",
-                                "VANDENILIO PREKYBA"
-                            ])
-
-                            # Tab 1: Power Balancing Market (P2G) - Same as other calculators
-                            with market_tabs_p2g[0]:
-                                if 'BALANSAVIMO_PAJEGUMU_RINKA' in markets_data:
-                                    balansavimo_pajegumu_data = markets_data['BALANSAVIMO_PAJEGUMU_RINKA']
-
-                                    # FCR section
-                                    if 'FCR' in balansavimo_pajegumu_data:
-                                        fcr_data = balansavimo_pajegumu_data['FCR']
-                                        col1, col2 = st.columns([1, 5])
-                                        with col1:
-                                            st.markdown(
-                                                f"""<div class="power-market-title"><h4 style="margin:0;">{fcr_data.get('header', 'FCR')}</h4><small>{fcr_data.get('description', 'FREQUENCY CONTAINMENT RESERVE')}</small></div>""",
-                                                unsafe_allow_html=True)
-                                        with col2:
-                                            st.markdown(
-                                                f"""<table class="market-table power-table"><tr><th class="power-header">{fcr_data.get('volume_of_procured_reserves', {}).get('header', 'VOLUME OF PROCURED RESERVES')}</th></tr><tr><td>{fcr_data.get('volume_of_procured_reserves', {}).get('value', 0):.2f} MW</td></tr></table>""" +
-                                                f"""<table class="market-table power-table"><tr><th class="power-header">{fcr_data.get('utilisation', {}).get('header', 'UTILISATION (% OF TIME)')}</th></tr><tr><td>{fcr_data.get('utilisation', {}).get('value', 0.0):.2f} %</td></tr></table>""" +
-                                                f"""<table class="market-table power-table"><tr><th class="power-header">{fcr_data.get('potential_revenue', {}).get('header', 'POTENTIAL REVENUE')}</th></tr><tr><td>{fcr_data.get('potential_revenue', {}).get('value', 0.0):.2f} tūkst. EUR</td></tr></table>""" +
-                                                f"""<table class="market-table power-table"><tr><th class="power-header">{fcr_data.get('bids_selected', {}).get('header', '% OF BIDS SELECTED')}</th></tr><tr><td>{fcr_data.get('bids_selected', {}).get('value', 0.0):.2f} %</td></tr></table>""",
-                                                unsafe_allow_html=True)
-                                        st.markdown("<hr>", unsafe_allow_html=True)
-
-                                    # aFRR section
-                                    if 'aFRR' in balansavimo_pajegumu_data:
-                                        afrr_data = balansavimo_pajegumu_data['aFRR']
-                                        col1, col2 = st.columns([1, 5])
-                                        with col1:
-                                            st.markdown(
-                                                f"""<div class="power-market-title"><h4 style="margin:0;">{afrr_data.get('header', 'aFRR')}</h4><small>{afrr_data.get('description', 'AUTOMATIC FREQUENCY RESTORATION RESERVE')}</small></div>""",
-                                                unsafe_allow_html=True)
-                                        with col2:
-                                            st.markdown(
-                                                f"""<table class="market-table power-table"><tr><th class="power-header" colspan="2">{afrr_data.get('volume_of_procured_reserves', {}).get('header', 'VOLUME OF PROCURED RESERVES')}</th></tr><tr><th class="power-direction-header">UPWARD</th><th class="power-direction-header">DOWNWARD</th></tr><tr><td>{afrr_data.get('volume_of_procured_reserves', {}).get('upward', {}).get('value', 0):.2f} MW</td><td>{afrr_data.get('volume_of_procured_reserves', {}).get('downward', {}).get('value', 0):.2f} MW</td></tr></table>""" +
-                                                f"""<table class="market-table power-table"><tr><th class="power-header" colspan="2">{afrr_data.get('utilisation', {}).get('header', 'UTILISATION (% OF TIME)')}</th></tr><tr><th class="power-direction-header">UPWARD</th><th class="power-direction-header">DOWNWARD</th></tr><tr><td>{afrr_data.get('utilisation', {}).get('upward', {}).get('value', 0.0):.2f} %</td><td>{afrr_data.get('utilisation', {}).get('downward', {}).get('value', 0.0):.2f} %</td></tr></table>""" +
-                                                f"""<table class="market-table power-table"><tr><th class="power-header" colspan="2">{afrr_data.get('potential_revenue', {}).get('header', 'POTENTIAL REVENUE')}</th></tr><tr><th class="power-direction-header">UPWARD</th><th class="power-direction-header">DOWNWARD</th></tr><tr><td>{afrr_data.get('potential_revenue', {}).get('upward', {}).get('value', 0.0):.2f} tūkst. EUR</td><td>{afrr_data.get('potential_revenue', {}).get('downward', {}).get('value', 0.0):.2f} tūkst. EUR</td></tr></table>""" +
-                                                f"""<table class="market-table power-table"><tr><th class="power-header" colspan="2">{afrr_data.get('bids_selected', {}).get('header', '% OF BIDS SELECTED')}</th></tr><tr><th class="power-direction-header">UPWARD</th><th class="power-direction-header">DOWNWARD</th></tr><tr><td>{afrr_data.get('bids_selected', {}).get('upward', {}).get('value', 0.0):.2f} %</td><td>{afrr_data.get('bids_selected', {}).get('downward', {}).get('value', 0.0):.2f} %</td></tr></table>""",
-                                                unsafe_allow_html=True)
-                                        st.markdown("<hr>", unsafe_allow_html=True)
-
-                                    # mFRR section
-                                    if 'mFRR' in balansavimo_pajegumu_data:
-                                        mfrr_data = balansavimo_pajegumu_data['mFRR']
-                                        col1, col2 = st.columns([1, 5])
-                                        with col1:
-                                            st.markdown(
-                                                f"""<div class="power-market-title"><h4 style="margin:0;">{mfrr_data.get('header', 'mFRR')}</h4><small>{mfrr_data.get('description', 'MANUAL FREQUENCY RESTORATION RESERVE')}</small></div>""",
-                                                unsafe_allow_html=True)
-                                        with col2:
-                                            st.markdown(
-                                                f"""<table class="market-table power-table"><tr><th class="power-header" colspan="2">{mfrr_data.get('volume_of_procured_reserves', {}).get('header', 'VOLUME OF PROCURED RESERVES')}</th></tr><tr><th class="power-direction-header">UPWARD</th><th class="power-direction-header">DOWNWARD</th></tr><tr><td>{mfrr_data.get('volume_of_procured_reserves', {}).get('upward', {}).get('value', 0):.2f} MW</td><td>{mfrr_data.get('volume_of_procured_reserves', {}).get('downward', {}).get('value', 0):.2f} MW</td></tr></table>""" +
-                                                f"""<table class="market-table power-table"><tr><th class="power-header" colspan="2">{mfrr_data.get('utilisation', {}).get('header', 'UTILISATION (% OF TIME)')}</th></tr><tr><th class="power-direction-header">UPWARD</th><th class="power-direction-header">DOWNWARD</th></tr><tr><td>{mfrr_data.get('utilisation', {}).get('upward', {}).get('value', 0.0):.2f} %</td><td>{mfrr_data.get('utilisation', {}).get('downward', {}).get('value', 0.0):.2f} %</td></tr></table>""" +
-                                                f"""<table class="market-table power-table"><tr><th class="power-header" colspan="2">{mfrr_data.get('potential_revenue', {}).get('header', 'POTENTIAL REVENUE')}</th></tr><tr><th class="power-direction-header">UPWARD</th><th class="power-direction-header">DOWNWARD</th></tr><tr><td>{mfrr_data.get('potential_revenue', {}).get('upward', {}).get('value', 0.0):.2f} tūkst. EUR</td><td>{mfrr_data.get('potential_revenue', {}).get('downward', {}).get('value', 0.0):.2f} tūkst. EUR</td></tr></table>""" +
-                                                f"""<table class="market-table power-table"><tr><th class="power-header" colspan="2">{mfrr_data.get('bids_selected', {}).get('header', '% OF BIDS SELECTED')}</th></tr><tr><th class="power-direction-header">UPWARD</th><th class="power-direction-header">DOWNWARD</th></tr><tr><td>{mfrr_data.get('bids_selected', {}).get('upward', {}).get('value', 0.0):.2f} %</td><td>{mfrr_data.get('bids_selected', {}).get('downward', {}).get('value', 0.0):.2f} %</td></tr></table>""",
-                                                unsafe_allow_html=True)
-                                else:
-                                    st.info("Balansavimo pajėgumų rinkos duomenų nėra.")
-
-                            # Tab 2: Energy Balancing Market (P2G) - Same as other calculators
-                            with market_tabs_p2g[1]:
-                                if 'BALANSAVIMO_ENERGIJOS_RINKA' in markets_data:
-                                    balansavimo_energijos_data = markets_data['BALANSAVIMO_ENERGIJOS_RINKA']
-
-                                    # aFRR section
-                                    if 'aFRR' in balansavimo_energijos_data:
-                                        afrr_data = balansavimo_energijos_data['aFRR']
-                                        col1, col2 = st.columns([1, 5])
-                                        with col1:
-                                            st.markdown(
-                                                f"""<div class="energy-market-title"><h4 style="margin:0;">{afrr_data.get('header', 'aFRR')}</h4><small>{afrr_data.get('description', 'AUTOMATIC FREQUENCY RESTORATION RESERVE')}</small></div>""",
-                                                unsafe_allow_html=True)
-                                        with col2:
-                                            st.markdown(
-                                                f"""<table class="market-table energy-table"><tr><th class="energy-header" colspan="2">{afrr_data.get('volume_of_procured_energy', {}).get('header', 'VOLUME OF PROCURED ENERGY')}</th></tr><tr><th class="energy-direction-header">UPWARD</th><th class="energy-direction-header">DOWNWARD</th></tr><tr><td>{afrr_data.get('volume_of_procured_energy', {}).get('upward', {}).get('value', 0.0):.2f} GWh</td><td>{afrr_data.get('volume_of_procured_energy', {}).get('downward', {}).get('value', 0.0):.2f} GWh</td></tr></table>""" +
-                                                f"""<table class="market-table energy-table"><tr><th class="energy-header" colspan="2">{afrr_data.get('utilisation', {}).get('header', 'UTILISATION (% OF TIME)')}</th></tr><tr><th class="energy-direction-header">UPWARD</th><th class="energy-direction-header">DOWNWARD</th></tr><tr><td>{afrr_data.get('utilisation', {}).get('upward', {}).get('value', 0.0):.2f} %</td><td>{afrr_data.get('utilisation', {}).get('downward', {}).get('value', 0.0):.2f} %</td></tr></table>""" +
-                                                f"""<table class="market-table energy-table"><tr><th class="energy-header" colspan="2">{afrr_data.get('potential_revenue', {}).get('header', 'POTENTIAL REVENUE')}</th></tr><tr><th class="energy-direction-header">UPWARD</th><th class="energy-direction-header">DOWNWARD</th></tr><tr><td>{afrr_data.get('potential_revenue', {}).get('upward', {}).get('value', 0.0):.2f} tūkst. EUR</td><td>{afrr_data.get('potential_revenue', {}).get('downward', {}).get('value', 0.0):.2f} tūkst. EUR</td></tr></table>""" +
-                                                f"""<table class="market-table energy-table"><tr><th class="energy-header" colspan="2">{afrr_data.get('bids_selected', {}).get('header', '% OF BIDS SELECTED')}</th></tr><tr><th class="energy-direction-header">UPWARD</th><th class="energy-direction-header">DOWNWARD</th></tr><tr><td>{afrr_data.get('bids_selected', {}).get('upward', {}).get('value', 0.0):.2f} %</td><td>{afrr_data.get('bids_selected', {}).get('downward', {}).get('value', 0.0):.2f} %</td></tr></table>""",
-                                                unsafe_allow_html=True)
-                                        st.markdown("<hr>", unsafe_allow_html=True)
-
-                                    # mFRR section
-                                    if 'mFRR' in balansavimo_energijos_data:
-                                        mfrr_data = balansavimo_energijos_data['mFRR']
-                                        col1, col2 = st.columns([1, 5])
-                                        with col1:
-                                            st.markdown(
-                                                f"""<div class="energy-market-title"><h4 style="margin:0;">{mfrr_data.get('header', 'mFRR')}</h4><small>{mfrr_data.get('description', 'MANUAL FREQUENCY RESTORATION RESERVE')}</small></div>""",
-                                                unsafe_allow_html=True)
-                                        with col2:
-                                            st.markdown(
-                                                f"""<table class="market-table energy-table"><tr><th class="energy-header" colspan="2">{mfrr_data.get('volume_of_procured_energy', {}).get('header', 'VOLUME OF PROCURED ENERGY')}</th></tr><tr><th class="energy-direction-header">UPWARD</th><th class="energy-direction-header">DOWNWARD</th></tr><tr><td>{mfrr_data.get('volume_of_procured_energy', {}).get('upward', {}).get('value', 0.0):.2f} GWh</td><td>{mfrr_data.get('volume_of_procured_energy', {}).get('downward', {}).get('value', 0.0):.2f} GWh</td></tr></table>""" +
-                                                f"""<table class="market-table energy-table"><tr><th class="energy-header" colspan="2">{mfrr_data.get('utilisation', {}).get('header', 'UTILISATION (% OF TIME)')}</th></tr><tr><th class="energy-direction-header">UPWARD</th><th class="energy-direction-header">DOWNWARD</th></tr><tr><td>{mfrr_data.get('utilisation', {}).get('upward', {}).get('value', 0.0):.2f} %</td><td>{mfrr_data.get('utilisation', {}).get('downward', {}).get('value', 0.0):.2f} %</td></tr></table>""" +
-                                                f"""<table class="market-table energy-table"><tr><th class="energy-header" colspan="2">{mfrr_data.get('potential_revenue', {}).get('header', 'POTENTIAL REVENUE')}</th></tr><tr><th class="energy-direction-header">UPWARD</th><th class="energy-direction-header">DOWNWARD</th></tr><tr><td>{mfrr_data.get('potential_revenue', {}).get('upward', {}).get('value', 0.0):.2f} tūkst. EUR</td><td>{mfrr_data.get('potential_revenue', {}).get('downward', {}).get('value', 0.0):.2f} tūkst. EUR</td></tr></table>""" +
-                                                f"""<table class="market-table energy-table"><tr><th class="energy-header" colspan="2">{mfrr_data.get('bids_selected', {}).get('header', '% OF BIDS SELECTED')}</th></tr><tr><th class="energy-direction-header">UPWARD</th><th class="energy-direction-header">DOWNWARD</th></tr><tr><td>{mfrr_data.get('bids_selected', {}).get('upward', {}).get('value', 0.0):.2f} %</td><td>{mfrr_data.get('bids_selected', {}).get('downward', {}).get('value', 0.0):.2f} %</td></tr></table>""",
-                                                unsafe_allow_html=True)
-                                else:
-                                    st.info("Balansavimo energijos rinkos duomenų nėra.")
-
-                            # Tab 3: Electricity Trading (P2G)
-                            with market_tabs_p2g[2]:
-                                if 'ELEKTROS_ENERGIJOS_PREKYBA' in markets_data:
-                                    elektros_energijos_data = markets_data['ELEKTROS_ENERGIJOS_PREKYBA']
-
-                                    # Day Ahead section
-                                    if 'Day_Ahead' in elektros_energijos_data:
-                                        day_ahead_data = elektros_energijos_data['Day_Ahead']
-                                        col1, col2 = st.columns([1, 5])
-                                        with col1:
-                                            st.markdown(
-                                                f"""<div class="trading-market-title"><h4 style="margin:0;">{day_ahead_data.get('header', 'Day Ahead')}</h4><small>{day_ahead_data.get('description', 'Electricity procurement for hydrogen production')}</small></div>""",
-                                                unsafe_allow_html=True)
-                                        with col2:
-                                            voee = day_ahead_data.get('volume_of_energy_exchange', {})
-                                            pot = day_ahead_data.get('percentage_of_time', {})
-                                            pcr = day_ahead_data.get('potential_cost_revenue', {})
-
-                                            st.markdown(
-                                                f"""<table class="market-table trading-table"><tr><th class="trading-header">{voee.get('header', 'VOLUME')}</th></tr><tr><td>{voee.get('purchase', {}).get('value', 0.0):.2f} GWh</td></tr></table>""" +
-                                                f"""<table class="market-table trading-table"><tr><th class="trading-header">{pot.get('header', '% OF TIME')}</th></tr><tr><td>{pot.get('purchase', {}).get('value', 0.0):.2f} %</td></tr></table>""" +
-                                                f"""<table class="market-table trading-table"><tr><th class="trading-header">{pcr.get('header', 'COST')}</th></tr><tr><td>{pcr.get('cost', {}).get('value', 0.0):.2f} tūkst. EUR</td></tr></table>""",
-                                                unsafe_allow_html=True)
-                                else:
-                                    st.info("Elektros energijos prekybos duomenų nėra.")
-
-                            # Tab 4: Hydrogen Trading (P2G specific)
-                            with market_tabs_p2g[3]:
-                                if 'VANDENILIO_PREKYBA' in markets_data:
-                                    vandenilio_data = markets_data['VANDENILIO_PREKYBA']
-
-                                    if 'Hydrogen_Sales' in vandenilio_data:
-                                        hydrogen_data = vandenilio_data['Hydrogen_Sales']
-                                        col1, col2 = st.columns([1, 5])
-                                        with col1:
-                                            st.markdown(
-                                                f"""<div class="hydrogen-market-title"><h4 style="margin:0;">{hydrogen_data.get('header', 'Hydrogen Sales')}</h4><small>{hydrogen_data.get('description', 'Revenue from selling produced hydrogen')}</small></div>""",
-                                                unsafe_allow_html=True)
-                                        with col2:
-                                            vhs = hydrogen_data.get('volume_of_h2_sold', {})
-                                            pcr = hydrogen_data.get('potential_cost_revenue', {})
-
-                                            st.markdown(
-                                                f"""<table class="market-table hydrogen-table"><tr><th class="hydrogen-header">{vhs.get('header', 'VOLUME SOLD')}</th></tr><tr><td>{vhs.get('value', 0.0):.2f} kg</td></tr></table>""" +
-                                                f"""<table class="market-table hydrogen-table"><tr><th class="hydrogen-header">{pcr.get('header', 'REVENUE')}</th></tr><tr><td>{pcr.get('revenue', {}).get('value', 0.0):.2f} tūkst. EUR</td></tr></table>""",
-                                                unsafe_allow_html=True)
-                                else:
-                                    st.info("Vandenilio prekybos duomenų nėra.")
-
-                    with tab3:
-                        st.subheader("ECONOMIC RESULTS")
-
-                        if "aggregated" in data and "economic_results" in data["aggregated"]:
-                            econ_data = data["aggregated"]["economic_results"]
-
-                            # Row 1: Gross Revenue and Variable Costs side by side
-                            col1, col2 = st.columns(2)
-
-                            with col1:
-                                st.write("##### GROSS REVENUE BY PRODUCT (SOH-adjusted)")
-                                if "gross_revenue_by_product" in econ_data and econ_data["gross_revenue_by_product"]:
-                                    st.table(econ_data["gross_revenue_by_product"])
-                                    fig_rev = px.bar(
-                                        econ_data["gross_revenue_by_product"], x="Product", y="Value (tūkst. EUR)",
-                                        title="GROSS REVENUE BY PRODUCT"
-                                    )
-                                    fig_rev.update_traces(marker_color='#2ecc71', hovertemplate='%{y:,.2f}<extra></extra>')
-                                    st.plotly_chart(fig_rev, use_container_width=True)
-                                else:
-                                    st.info("No revenue data available")
-
-                            with col2:
-                                st.write("##### VARIABLE COSTS BY PRODUCT (SOH-adjusted)")
-                                if "variable_costs_by_product" in econ_data and econ_data["variable_costs_by_product"]:
-                                    st.table(econ_data["variable_costs_by_product"])
-                                    fig_cost = px.bar(
-                                        econ_data["variable_costs_by_product"], x="Product", y="Value (tūkst. EUR)",
-                                        title="VARIABLE COSTS BY PRODUCT"
-                                    )
-                                    fig_cost.update_traces(marker_color='#e74c3c', hovertemplate='%{y:,.2f}<extra></extra>')
-                                    st.plotly_chart(fig_cost, use_container_width=True)
-                                else:
-                                    st.info("No cost data available")
-
-                            # Row 2: Yearly Results
-                            st.write("##### YEARLY RESULTS")
-                            if "yearly_table" in econ_data and econ_data["yearly_table"]:
-                                yearly_df = pd.DataFrame(econ_data["yearly_table"])
-                                st.table(yearly_df)
-
-                                # NPV line chart
-                                if "YEAR" in yearly_df.columns and "NPV (tūkst. EUR)" in yearly_df.columns:
-                                    fig_yearly_npv = px.line(
-                                        yearly_df, x="YEAR", y="NPV (tūkst. EUR)", markers=True,
-                                        title="NET PRESENT VALUE OVER TIME"
-                                    )
-                                    fig_yearly_npv.update_traces(hovertemplate='%{y:,.2f}<extra></extra>')
-                                    st.plotly_chart(fig_yearly_npv, use_container_width=True)
-                            else:
-                                st.info("No yearly results data available.")
-
-                            # SOH visualization from separate soh_data
-                            if "soh_data" in econ_data and econ_data["soh_data"]:
-                                soh_df = pd.DataFrame(econ_data["soh_data"])
-                                if "YEAR" in soh_df.columns and "SOH (%)" in soh_df.columns:
-                                    fig_soh = px.line(
-                                        soh_df, x="YEAR", y="SOH (%)", markers=True,
-                                        title="ELECTROLYZER STATE OF HEALTH OVER TIME"
-                                    )
-                                    fig_soh.update_traces(hovertemplate='%{y:,.2f}<extra></extra>')
-                                    st.plotly_chart(fig_soh, use_container_width=True)
-                        else:
-                            st.info("Economic results data not found.")
-                else:
-                    try:
-                        error_data = response.json()
-                        if "detail" in error_data:
-                            st.error(f"Calculation failed: {error_data['detail']}")
-                        else:
-                            st.error(f"Request failed with status code: {response.status_code}")
-                    except json.JSONDecodeError:
-                        st.error(f"Request failed with status code: {response.status_code}")
-            except requests.exceptions.RequestException as e:
-                st.error(f"Error making request: {str(e)}")
-            except Exception as e:
-                st.error(f"An unexpected error occurred: {str(e)}")
+        col1, col2 = st.columns(2)
+        with col1:
+            npv_data = summary.get('npv_chart_data', {})
+            if npv_data and 'years' in npv_data and 'dcfs' in npv_data and 'npv' in npv_data:
+                fig_npv = memo.figure("npv", build_p2g_npv_figure, npv_data)
+                st.plotly_chart(fig_npv, use_container_width=True)
+            else:
+                st.info("NPV chart data is incomplete or missing key fields.")
+
+        with col2:
+            rev_cost_data = summary.get('revenue_cost_chart_data', {})
+            if rev_cost_data and 'products' in rev_cost_data and 'values' in rev_cost_data:
+                fig_rev_cost = memo.figure("revenue_cost", build_p2g_revenue_cost_figure, rev_cost_data)
+                st.plotly_chart(fig_rev_cost, use_container_width=True)
+            else:
+                st.info("Revenue/Cost chart data is incomplete or missing key fields.")
+
+        col3, col4 = st.columns(2)
+        with col3:
+            util_data = summary.get('utilisation_chart_data', {})
+            if util_data and util_data.get('products') and util_data.get('values'):
+                fig_util = memo.figure("utilisation", build_p2g_utilisation_figure, util_data)
+                st.plotly_chart(fig_util, use_container_width=True)
+            else:
+                st.info("Utilisation chart data is incomplete or missing key fields.")
+
+
+def build_p2g_npv_figure(npv_data):
+    import plotly.graph_objects as go
+    from plotly.subplots import make_subplots
+    fig_npv = make_subplots(specs=[[{"secondary_y": True}]])
+    fig_npv.add_trace(go.Bar(x=npv_data['years'], y=npv_data['dcfs'],
+                             name="Discounted Cash Flow", marker_color="lightblue",
+                             opacity=0.7),
+                      secondary_y=False)
+    fig_npv.add_trace(go.Scatter(x=npv_data['years'], y=npv_data['npv'],
+                                 mode="lines+markers", name="Cumulative NPV",
+                                 line=dict(color="red", width=3)), secondary_y=True)
+    if npv_data.get('break_even_point') is not None and \
+            isinstance(npv_data['break_even_point'], int) and \
+            0 <= npv_data['break_even_point'] < len(npv_data['years']):
+        break_even_year = npv_data['years'][npv_data['break_even_point']]
+        break_even_value = npv_data['npv'][npv_data['break_even_point']]
+        fig_npv.add_scatter(x=[break_even_year], y=[break_even_value], mode="markers",
+                            marker=dict(size=10, color="green"),
+                            name="Break-even Point",
+                            secondary_y=True)
+    fig_npv.update_xaxes(title_text="Year")
+    fig_npv.update_yaxes(title_text="Discounted Cash Flow (tūkst. EUR)",
+                         secondary_y=False)
+    fig_npv.update_yaxes(title_text="Cumulative NPV (tūkst. EUR)", secondary_y=True)
+    fig_npv.update_layout(title="NET PRESENT VALUE ANALYSIS", hovermode='x unified')
+    return fig_npv
+
+
+def build_p2g_revenue_cost_figure(rev_cost_data):
+    import plotly.express as px
+    fig_rev_cost = px.bar(x=rev_cost_data['products'], y=rev_cost_data['values'],
+                          labels={"x": "Product", "y": "Value (tūkst. EUR)"},
+                          title="REVENUE vs COST BY PRODUCTS")
+    colors = ['red' if v < 0 else 'green' for v in rev_cost_data['values']]
+    fig_rev_cost.update_traces(marker_color=colors,
+                               hovertemplate='%{y:,.2f}<extra></extra>')
+    return fig_rev_cost
+
+
+def build_p2g_utilisation_figure(util_data):
+    import plotly.express as px
+    fig_util = px.bar(
+        x=util_data['products'],
+        y=util_data['values'],
+        labels={"x": "Product", "y": "Utilisation (%)"},
+        title="UTILISATION (% TIME) BY PRODUCTS"
+    )
+    fig_util.update_traces(hovertemplate='%{y:,.2f}<extra></extra>')
+    return fig_util
+
+
+def render_p2g_market_details(data, memo):
+    st.subheader("MARKET DETAILS")
+    if "aggregated" in data and "markets" in data["aggregated"]:
+        render_market_tabs("p2g_market_tab", data["aggregated"]["markets"], P2G_MARKETS, memo)
+
+
+def render_p2g_economic_results(data, memo):
+    st.subheader("ECONOMIC RESULTS")
+
+    if "aggregated" in data and "economic_results" in data["aggregated"]:
+        econ_data = data["aggregated"]["economic_results"]
+
+        # Row 1: Gross Revenue and Variable Costs side by side
+        col1, col2 = st.columns(2)
+
+        with col1:
+            st.write("##### GROSS REVENUE BY PRODUCT (SOH-adjusted)")
+            if "gross_revenue_by_product" in econ_data and econ_data["gross_revenue_by_product"]:
+                st.table(econ_data["gross_revenue_by_product"])
+                fig_rev = memo.figure("gross_revenue", build_p2g_gross_revenue_figure, econ_data)
+                st.plotly_chart(fig_rev, use_container_width=True)
+            else:
+                st.info("No revenue data available")
+
+        with col2:
+            st.write("##### VARIABLE COSTS BY PRODUCT (SOH-adjusted)")
+            if "variable_costs_by_product" in econ_data and econ_data["variable_costs_by_product"]:
+                st.table(econ_data["variable_costs_by_product"])
+                fig_cost = memo.figure("variable_costs", build_p2g_variable_costs_figure, econ_data)
+                st.plotly_chart(fig_cost, use_container_width=True)
+            else:
+                st.info("No cost data available")
+
+        # Row 2: Yearly Results
+        st.write("##### YEARLY RESULTS")
+        if "yearly_table" in econ_data and econ_data["yearly_table"]:
+            yearly_df = pd.DataFrame(econ_data["yearly_table"])
+            st.table(yearly_df)
+
+            # NPV line chart
+            if "YEAR" in yearly_df.columns and "NPV (tūkst. EUR)" in yearly_df.columns:
+                fig_yearly_npv = memo.figure("yearly_npv", build_p2g_yearly_npv_figure, yearly_df)
+                st.plotly_chart(fig_yearly_npv, use_container_width=True)
+        else:
+            st.info("No yearly results data available.")
+
+        # SOH visualization from separate soh_data
+        if "soh_data" in econ_data and econ_data["soh_data"]:
+            soh_df = pd.DataFrame(econ_data["soh_data"])
+            if "YEAR" in soh_df.columns and "SOH (%)" in soh_df.columns:
+                fig_soh = memo.figure("soh", build_p2g_soh_figure, soh_df)
+                st.plotly_chart(fig_soh, use_container_width=True)
+    else:
+        st.info("Economic results data not found.")
+
+
+def build_p2g_gross_revenue_figure(econ_data):
+    import plotly.express as px
+    fig_rev = px.bar(
+        econ_data["gross_revenue_by_product"], x="Product", y="Value (tūkst. EUR)",
+        title="GROSS REVENUE BY PRODUCT"
+    )
+    fig_rev.update_traces(marker_color='#2ecc71', hovertemplate='%{y:,.2f}<extra></extra>')
+    return fig_rev
+
+
+def build_p2g_variable_costs_figure(econ_data):
+    import plotly.express as px
+    fig_cost = px.bar(
+        econ_data["variable_costs_by_product"], x="Product", y="Value (tūkst. EUR)",
+        title="VARIABLE COSTS BY PRODUCT"
+    )
+    fig_cost.update_traces(marker_color='#e74c3c', hovertemplate='%{y:,.2f}<extra></extra>')
+    return fig_cost
+
+
+def build_p2g_yearly_npv_figure(yearly_df):
+    import plotly.express as px
+    fig_yearly_npv = px.line(
+        yearly_df, x="YEAR", y="NPV (tūkst. EUR)", markers=True,
+        title="NET PRESENT VALUE OVER TIME"
+    )
+    fig_yearly_npv.update_traces(hovertemplate='%{y:,.2f}<extra></extra>')
+    return fig_yearly_npv
+
+
+def build_p2g_soh_figure(soh_df):
+    import plotly.express as px
+    fig_soh = px.line(
+        soh_df, x="YEAR", y="SOH (%)", markers=True,
+        title="ELECTROLYZER STATE OF HEALTH OVER TIME"
+    )
+    fig_soh.update_traces(hovertemplate='%{y:,.2f}<extra></extra>')
+    return fig_soh
@@ -1,11 +1,16 @@
 import streamlit as st
-import requests
-import json
-import plotly.express as px
-from plotly.subplots import make_subplots
-import plotly.graph_objects as go
+import time
 import pandas as pd
 
+from backend_client import get_backend_client
+from batch_runner import apply_overrides, run_batch
+from job_manager import render_jobs, render_saved_scenarios, submit_job
+from market_tables import BALANCING_AND_TRADING_MARKETS, render_market_tabs
+from response_diff import render_response_diff
+from result_views import (LAST_RUN_NOTE, last_run, last_run_inputs, pending_tabs, remember_run, render_tabs,
+                          response_memo, run_memo)
+from sensitivity import render_sensitivity, render_sensitivity_inputs
+
 
 def render_p2h_calculator(BE_URL, LOCAL_MODE, P2X_APIM_SECRET):
     st.header("P2H Demo")
@@ -26,6 +31,8 @@ def render_p2h_calculator(BE_URL, LOCAL_MODE, P2X_APIM_SECRET):
 
         return text.lower()
 
+    # One county per request, or the same project run for every county side by side
+    p2h_mode = st.radio("Mode", ["Single county", "All counties", "Sensitivity"], horizontal=True, key="p2h_mode")
 
     # Create form for P2H input parameters
     with st.form("p2h_input_form"):
@@ -54,7 +61,10 @@ def render_p2h_calculator(BE_URL, LOCAL_MODE, P2X_APIM_SECRET):
             "Alytus", "Kaunas", "Klaipėda", "Marijampolė", "Panevėžys",
             "Šiauliai", "Tauragė", "Telšiai", "Utena", "Vilnius"
         ]
-        county = st.selectbox("Apskritis (County)", county_options, index=1, key="p2h_county")  # Default to Kaunas
+        if p2h_mode != "All counties":
+            county = st.selectbox("Apskritis (County)", county_options, index=1, key="p2h_county")  # Default to Kaunas
+        else:
+            county = county_options[1]
 
         # Create columns for a more compact layout
         col1, col2 = st.columns(2)
@@ -151,6 +161,9 @@ def render_p2h_calculator(BE_URL, LOCAL_MODE, P2X_APIM_SECRET):
         with col13:
             p_mfrrd_bsp = st.number_input("mFRRd", value=0.0, step=1.0, key="p2h_mfrrd_energy_thresh")
 
+        if p2h_mode == "Sensitivity":
+            sensitivity_parameters, sensitivity_percent = render_sensitivity_inputs("p2h")
+
         # Submit button
         submit_button = st.form_submit_button("Submit")
 
@@ -184,610 +197,585 @@ def render_p2h_calculator(BE_URL, LOCAL_MODE, P2X_APIM_SECRET):
             "Q_yearly": q_yearly, "produktai": produktai
         }
 
+        if p2h_mode == "All counties":
+            counties = [(c, convert_lt_chars(c)) for c in county_options]
+            # One request per county is sent; they differ only in County
+            with st.expander(f"Request Bodies ({len(counties)} counties)"):
+                for label, value in counties:
+                    st.write(f"**{label}**")
+                    st.json(apply_overrides(request_body, {"County": value}), expanded=False)
+            render_p2h_county_comparison(BE_URL, LOCAL_MODE, P2X_APIM_SECRET, request_body, counties)
+            return
+
         with st.expander("Request Body"):
             st.json(request_body)
+        if p2h_mode == "Sensitivity":
+            render_sensitivity(BE_URL, LOCAL_MODE, P2X_APIM_SECRET, "p2h", request_body, sensitivity_parameters,
+                               sensitivity_percent)
+            return
+
+        # Submit in the background; the job id survives reruns in the session state
+        client = get_backend_client(BE_URL, LOCAL_MODE, P2X_APIM_SECRET)
+        submit_job("p2h_jobs", client, "p2h", request_body)
+    elif p2h_mode == "All counties" and last_run_inputs("p2h_county_run") is not None:
+        # Nothing submitted on this rerun: redraw the last run from memory
+        render_p2h_county_comparison(BE_URL, LOCAL_MODE, P2X_APIM_SECRET, *last_run_inputs("p2h_county_run"))
+    elif p2h_mode == "Sensitivity" and last_run_inputs("p2h_sensitivity_run") is not None:
+        render_sensitivity(BE_URL, LOCAL_MODE, P2X_APIM_SECRET, *last_run_inputs("p2h_sensitivity_run"))
+
+    # Show progress or the latest results of this session's P2H requests
+    if p2h_mode == "Single county":
+        render_saved_scenarios("p2h_jobs", "p2h")
+        render_response_diff("p2h_jobs", "p2h")
+        render_jobs("p2h_jobs", render_p2h_results, render_partial=render_p2h_partial)
+
+
+# Comparison totals collected per county: (key in aggregated.comparison, column)
+COUNTY_COMPARISON_COLUMNS = [
+    ("tik katilas", "Tik katilas (tūkst. EUR)"),
+    ("katilas + šilumos siurblys", "Katilas + šilumos siurblys (tūkst. EUR)"),
+    ("skirtumas", "Skirtumas (tūkst. EUR)"),
+    ("benefits", "Benefits (tūkst. EUR)"),
+]
+COUNTY_RANK_COLUMN = "Benefits (tūkst. EUR)"
+
+
+def render_p2h_county_comparison(BE_URL, LOCAL_MODE, P2X_APIM_SECRET, base_request_body, counties):
+    # counties is a list of (label, County value sent to the backend)
+    inputs = (base_request_body, counties)
+    memo = run_memo("p2h_county_run", inputs)
+    st.header("County Comparison")
+    results = last_run("p2h_county_run", inputs)
+    if results is not None:
+        st.caption(LAST_RUN_NOTE)
+        draw_p2h_county_comparison(results, st.empty(), st.empty(), len(results), memo)
+        return
+
+    request_bodies = [apply_overrides(base_request_body, {"County": value}) for _, value in counties]
+    total = len(request_bodies)
+    progress = st.progress(0.0, text=f"0/{total} counties finished")
+    table_placeholder = st.empty()
+    chart_placeholder = st.empty()
+
+    client = get_backend_client(BE_URL, LOCAL_MODE, P2X_APIM_SECRET)
+    results = []
+    last_draw = 0.0
+    for done, (index, data, error) in enumerate(run_batch(client, "p2h", request_bodies), start=1):
+        row = {"Apskritis": counties[index][0]}
+        if error is None:
+            comparison = data.get('aggregated', {}).get('comparison', {})
+            for key, column in COUNTY_COMPARISON_COLUMNS:
+                row[column] = (comparison.get(key) or {}).get('total')
+            row["Status"] = "OK"
+        else:
+            row["Status"] = f"Error: {str(error)}"
+        results.append(row)
+
+        progress.progress(done / total, text=f"{done}/{total} counties finished")
+        # Redraw a few times per second at most; always draw the final state
+        if done == total:
+            draw_p2h_county_comparison(results, table_placeholder, chart_placeholder, done, memo)
+        elif time.monotonic() - last_draw > 0.5:
+            draw_p2h_county_comparison(results, table_placeholder, chart_placeholder, done)
+            last_draw = time.monotonic()
+    remember_run("p2h_county_run", inputs, results)
+
+
+def draw_p2h_county_comparison(results, table_placeholder, chart_placeholder, draw_id, memo=None):
+    # memo is given for the final state only; partial results are drawn once each
+    results_df = pd.DataFrame(results)
+    if COUNTY_RANK_COLUMN not in results_df.columns:
+        table_placeholder.dataframe(results_df, use_container_width=True, hide_index=True)
+        return
+    results_df = results_df.sort_values(COUNTY_RANK_COLUMN, ascending=False, na_position="last")
+    results_df.insert(0, "Rank", results_df[COUNTY_RANK_COLUMN].rank(ascending=False, method="min").astype("Int64"))
+    table_placeholder.dataframe(results_df, use_container_width=True, hide_index=True)
+
+    ranked_df = results_df.dropna(subset=[COUNTY_RANK_COLUMN])
+    if ranked_df.empty:
+        return
+    fig_counties = (memo.figure("county_comparison", build_p2h_county_comparison_figure, ranked_df) if memo
+                    else build_p2h_county_comparison_figure(ranked_df))
+    chart_placeholder.plotly_chart(fig_counties, use_container_width=True, key=f"p2h_county_comparison_{draw_id}")
+
+
+def build_p2h_county_comparison_figure(ranked_df):
+    import plotly.graph_objects as go
+    fig_counties = go.Figure()
+    colors = ['red', 'lightcoral', 'lightgreen', 'green']
+    for (_, column), color in zip(COUNTY_COMPARISON_COLUMNS, colors):
+        fig_counties.add_trace(go.Bar(
+            name=column.replace(" (tūkst. EUR)", ""),
+            x=ranked_df["Apskritis"],
+            y=ranked_df[column],
+            marker_color=color,
+            hovertemplate='%{y:,.2f} tūkst. EUR<extra></extra>'
+        ))
+
+    fig_counties.update_layout(
+        title="P2H COMPARISON BY COUNTY (Project Lifetime, ranked by benefits)",
+        barmode='group',
+        xaxis_title="Apskritis",
+        yaxis_title="Cost/Benefit (tūkst. EUR)",
+        yaxis=dict(zeroline=True, zerolinecolor='black', zerolinewidth=2),
+        showlegend=True
+    )
+    return fig_counties
+
+
+# Result tab -> the aggregated section it shows, for drawing streamed responses
+P2H_RESULT_SECTIONS = {
+    "Summary": "summary",
+    "Market Details": "markets",
+    "Economic Results": "economic_results",
+    "Comparison": "comparison",
+}
+
+
+def render_p2h_results(data, from_cache, payload):
+    st.success("Request successful! (cached result)" if from_cache else "Request successful!")
+    st.download_button(
+        label="Download JSON (gzip)",
+        data=payload,  # gzip-compressed bytes as received, not a re-encoded copy
+        file_name="p2h_response.json.gz",
+        mime="application/gzip"
+    )
+
+    st.header("Visualization")
+    render_p2h_tabs("p2h_result_tab", data, response_memo("p2h_response_memo", data))
+
+
+def render_p2h_partial(data, memo):
+    # A response still streaming in; tabs whose section has not arrived yet say so
+    render_p2h_tabs("p2h_streamed_tab", data, memo, pending_tabs(P2H_RESULT_SECTIONS, data))
+
+
+def render_p2h_tabs(key, data, memo, pending=()):
+    render_tabs(key, [
+        ("Summary", render_p2h_summary),
+        ("Market Details", render_p2h_market_details),
+        ("Economic Results", render_p2h_economic_results),
+        ("Comparison", render_p2h_comparison),
+    ], data, memo, pending=pending)
+
+
+def render_p2h_summary(data, memo):
+    st.subheader("SUMMARY")
+    if "aggregated" in data and "summary" in data["aggregated"]:
+        summary = data["aggregated"]["summary"]
+        st.write("##### YEARLY SUMMARY")
+        yearly_summary_table = [dict(row) for row in summary.get('yearly_summary_table', [])]
+        # Format values with units (on copies, the same response is re-rendered on reruns)
+        for row in yearly_summary_table:
+            if 'Value' in row and isinstance(row['Value'], (int, float)):
+                row['Value'] = f"{row['Value']:.2f} tūkst. EUR/year"
+        st.table(yearly_summary_table)
+        st.write("##### PROJECT (LIFETIME) SUMMARY")
+        project_summary_table = [dict(row) for row in summary.get('project_summary_table', [])]
+        # Format values with units (on copies, the same response is re-rendered on reruns)
+        for row in project_summary_table:
+            if 'Value' in row and isinstance(row['Value'], (int, float)):
+                row['Value'] = f"{row['Value']:.2f} tūkst. EUR"
+        st.table(project_summary_table)
+        st.write("##### SUPPLEMENTED WITH GRAPHS")
+        col1, col2 = st.columns(2)
+        with col1:
+            npv_data = summary.get('npv_chart_data', {})
+            if npv_data and 'years' in npv_data and 'dcfs' in npv_data and 'npv' in npv_data:
+                fig_npv = memo.figure("npv", build_p2h_npv_figure, npv_data)
+                st.plotly_chart(fig_npv, use_container_width=True)
+            else:
+                st.info("NPV chart data is incomplete or missing key fields.")
+        with col2:
+            util_data = summary.get('utilisation_chart_data', {})
+            if util_data and util_data.get('products') and util_data.get('values'):
+                fig_util = memo.figure("utilisation", build_p2h_utilisation_figure, util_data)
+                st.plotly_chart(fig_util, use_container_width=True)
+            else:
+                st.info("Utilisation chart data is incomplete or missing key fields.")
+
+        # Row 2: PROJECT FINANCIAL BREAKDOWN and REVENUE vs COST BY PRODUCTS
+        col3, col4 = st.columns(2)
+
+        with col3:
+            # PROJECT FINANCIAL BREAKDOWN (stacked bar)
+            if 'yearly' in data.get('aggregated', {}) and 'comparison' in data.get('aggregated', {}):
+                yearly = data['aggregated']['yearly']
+                comparison = data['aggregated']['comparison']
+                number_of_years = len(yearly) - 1 if len(yearly) > 1 else 1
+
+                # Get values
+                capex = yearly[0].get('CAPEX (tūkst. EUR)', 0) if yearly else 0
+                opex_annual = yearly[1].get('OPEX (tūkst. EUR)', 0) if len(yearly) > 1 else 0
+                opex_total = opex_annual * number_of_years
+                savings_total = comparison['skirtumas']['total']
+
+                # Calculate balancing revenue (only balancing market products)
+                balancing_revenue = 0
+                if 'economic_results' in data['aggregated'] and 'gross_revenue_by_product' in data['aggregated']['economic_results']:
+                    for row in data['aggregated']['economic_results']['gross_revenue_by_product']:
+                        product = row.get('Product', '')
+                        if any(x in product for x in ['aFRR', 'mFRR', 'FCR']):
+                            balancing_revenue += row.get('Value (tūkst. EUR)', 0)
+                balancing_revenue_total = balancing_revenue * number_of_years
+
+                fig_profit = memo.figure("financial_breakdown", build_p2h_financial_breakdown_figure,
+                                         capex, opex_total, savings_total, balancing_revenue_total)
+                st.plotly_chart(fig_profit, use_container_width=True)
+            else:
+                st.info("Financial breakdown data not available.")
 
-        with st.spinner("Processing request..."):
-            try:
-                # Build headers for local mode
-                headers = {}
-                if LOCAL_MODE:
-                    headers["P2X-APIM-Secret"] = P2X_APIM_SECRET
-
-                # response = requests.post(f"{BE_URL}p2h", json=request_body)
-                response = requests.post(f"{BE_URL}p2h", data={"parameters": json.dumps(request_body)}, headers=headers)
-                if response.status_code == 200:
-                    data = response.json()
-                    st.success("Request successful!")
-                    st.download_button(
-                        label="Download JSON",
-                        data=json.dumps(data, indent=2),
-                        file_name="p2h_response.json",
-                        mime="application/json"
-                    )
-
-                    st.header("Visualization")
-                    tab1, tab2, tab3, tab4 = st.tabs(["Summary", "Market Details", "Economic Results", "Comparison"])
-
-                    with tab1:
-                        st.subheader("SUMMARY")
-                        if "aggregated" in data and "summary" in data["aggregated"]:
-                            summary = data["aggregated"]["summary"]
-                            st.write("##### YEARLY SUMMARY")
-                            yearly_summary_table = summary.get('yearly_summary_table', [])
-                            # Format values with units
-                            for row in yearly_summary_table:
-                                if 'Value' in row and isinstance(row['Value'], (int, float)):
-                                    row['Value'] = f"{row['Value']:.2f} tūkst. EUR/year"
-                            st.table(yearly_summary_table)
-                            st.write("##### PROJECT (LIFETIME) SUMMARY")
-                            project_summary_table = summary.get('project_summary_table', [])
-                            # Format values with units
-                            for row in project_summary_table:
-                                if 'Value' in row and isinstance(row['Value'], (int, float)):
-                                    row['Value'] = f"{row['Value']:.2f} tūkst. EUR"
-                            st.table(project_summary_table)
-                            st.write("##### SUPPLEMENTED WITH GRAPHS")
-                            col1, col2 = st.columns(2)
-                            with col1:
-                                npv_data = summary.get('npv_chart_data', {})
-                                if npv_data and 'years' in npv_data and 'dcfs' in npv_data and 'npv' in npv_data:
-                                    fig_npv = make_subplots(specs=[[{"secondary_y": True}]])
-                                    fig_npv.add_trace(go.Bar(x=npv_data['years'], y=npv_data['dcfs'],
-                                                             name="Discounted Cash Flow", marker_color="lightblue",
-                                                             opacity=0.7),
-                                                      secondary_y=False)
-                                    fig_npv.add_trace(go.Scatter(x=npv_data['years'], y=npv_data['npv'],
-                                                                 mode="lines+markers", name="Cumulative NPV",
-                                                                 line=dict(color="red", width=3)), secondary_y=True)
-                                    if npv_data.get('break_even_point') is not None and \
-                                            isinstance(npv_data['break_even_point'], int) and \
-                                            0 <= npv_data['break_even_point'] < len(npv_data['years']):
-                                        break_even_year = npv_data['years'][npv_data['break_even_point']]
-                                        break_even_value = npv_data['npv'][npv_data['break_even_point']]
-                                        fig_npv.add_scatter(x=[break_even_year], y=[break_even_value], mode="markers",
-                                                            marker=dict(size=10, color="green"),
-                                                            name="Break-even Point",
-                                                            secondary_y=True)
-                                    fig_npv.update_xaxes(title_text="Year")
-                                    fig_npv.update_yaxes(title_text="Discounted Cash Flow (tūkst. EUR)",
-                                                         secondary_y=False)
-                                    fig_npv.update_yaxes(title_text="Cumulative NPV (tūkst. EUR)", secondary_y=True)
-                                    fig_npv.update_layout(title="NET PRESENT VALUE ANALYSIS", hovermode='x unified')
-                                    st.plotly_chart(fig_npv, use_container_width=True)
-                                else:
-                                    st.info("NPV chart data is incomplete or missing key fields.")
-                            with col2:
-                                util_data = summary.get('utilisation_chart_data', {})
-                                if util_data and util_data.get('products') and util_data.get('values'):
-                                    fig_util = px.bar(
-                                        x=util_data['products'],
-                                        y=util_data['values'],
-                                        labels={"x": "Product", "y": "Utilisation (%)"},
-                                        title="UTILISATION (% TIME) BY PRODUCTS"
-                                    )
-                                    fig_util.update_traces(hovertemplate='%{y:,.2f}<extra></extra>')
-                                    st.plotly_chart(fig_util, use_container_width=True)
-                                else:
-                                    st.info("Utilisation chart data is incomplete or missing key fields.")
-
-                            # Row 2: PROJECT FINANCIAL BREAKDOWN and REVENUE vs COST BY PRODUCTS
-                            col3, col4 = st.columns(2)
-
-                            with col3:
-                                # PROJECT FINANCIAL BREAKDOWN (stacked bar)
-                                if 'yearly' in data.get('aggregated', {}) and 'comparison' in data.get('aggregated', {}):
-                                    yearly = data['aggregated']['yearly']
-                                    comparison = data['aggregated']['comparison']
-                                    number_of_years = len(yearly) - 1 if len(yearly) > 1 else 1
-
-                                    # Get values
-                                    capex = yearly[0].get('CAPEX (tūkst. EUR)', 0) if yearly else 0
-                                    opex_annual = yearly[1].get('OPEX (tūkst. EUR)', 0) if len(yearly) > 1 else 0
-                                    opex_total = opex_annual * number_of_years
-                                    savings_total = comparison['skirtumas']['total']
-
-                                    # Calculate balancing revenue (only balancing market products)
-                                    balancing_revenue = 0
-                                    if 'economic_results' in data['aggregated'] and 'gross_revenue_by_product' in data['aggregated']['economic_results']:
-                                        for row in data['aggregated']['economic_results']['gross_revenue_by_product']:
-                                            product = row.get('Product', '')
-                                            if any(x in product for x in ['aFRR', 'mFRR', 'FCR']):
-                                                balancing_revenue += row.get('Value (tūkst. EUR)', 0)
-                                    balancing_revenue_total = balancing_revenue * number_of_years
-
-                                    fig_profit = go.Figure()
-
-                                    # Positive values (above zero)
-                                    fig_profit.add_trace(go.Bar(
-                                        name='Sutaupymai',
-                                        x=['Project'],
-                                        y=[savings_total],
-                                        marker_color='lightgreen',
-                                        hovertemplate='%{y:,.2f} tūkst. EUR<extra></extra>',
-                                        base=0
-                                    ))
-                                    fig_profit.add_trace(go.Bar(
-                                        name='Pajamos iš balansavimo',
-                                        x=['Project'],
-                                        y=[balancing_revenue_total],
-                                        marker_color='green',
-                                        hovertemplate='%{y:,.2f} tūkst. EUR<extra></extra>',
-                                        base=[savings_total]
-                                    ))
-
-                                    # Negative values (below zero)
-                                    fig_profit.add_trace(go.Bar(
-                                        name='CAPEX',
-                                        x=['Project'],
-                                        y=[-capex],
-                                        marker_color='lightcoral',
-                                        hovertemplate='%{y:,.2f} tūkst. EUR<extra></extra>',
-                                        base=0
-                                    ))
-                                    fig_profit.add_trace(go.Bar(
-                                        name='OPEX',
-                                        x=['Project'],
-                                        y=[-opex_total],
-                                        marker_color='red',
-                                        hovertemplate='%{y:,.2f} tūkst. EUR<extra></extra>',
-                                        base=[-capex]
-                                    ))
-
-                                    fig_profit.update_layout(
-                                        title="PROJECT FINANCIAL BREAKDOWN",
-                                        barmode='relative',
-                                        yaxis_title="Value (tūkst. EUR)",
-                                        yaxis=dict(zeroline=True, zerolinecolor='black', zerolinewidth=2),
-                                        showlegend=True
-                                    )
-                                    st.plotly_chart(fig_profit, use_container_width=True)
-                                else:
-                                    st.info("Financial breakdown data not available.")
-
-                            with col4:
-                                # REVENUE vs COST BY PRODUCTS (using total_finance) - PROJECT LIFETIME
-                                if 'total_finance' in data.get('aggregated', {}) and 'comparison' in data.get('aggregated', {}) and 'yearly' in data.get('aggregated', {}):
-                                    total_finance = data['aggregated']['total_finance']
-                                    comparison = data['aggregated']['comparison']
-                                    yearly = data['aggregated']['yearly']
-                                    number_of_years = len(yearly) - 1 if len(yearly) > 1 else 1
-
-                                    products = []
-                                    values = []
-
-                                    # Costs from total_finance (negative values) - PROJECT LIFETIME
-                                    # Note: perkama DA excluded (shown in PROJECT FINANCIAL BREAKDOWN)
-                                    cost_products = ['perkama ID']
-                                    for prod in cost_products:
-                                        val = total_finance.get(prod, 0) * number_of_years
-                                        if abs(val) > 0.001:  # Filter near-zero
-                                            products.append(prod)
-                                            values.append(val)
-
-                                    # Revenue - each balancing product separately - PROJECT LIFETIME
-                                    balancing_products = ['FCR CAP', 'aFRRu CAP', 'aFRRd CAP', 'mFRRu CAP', 'mFRRd CAP',
-                                                          'parduodama ID', 'aFRRu', 'aFRRd', 'mFRRu', 'mFRRd']
-                                    for prod in balancing_products:
-                                        val = total_finance.get(prod, 0) * number_of_years
-                                        if abs(val) > 0.001:  # Filter near-zero
-                                            products.append(prod)
-                                            values.append(val)
-
-                                    # Sutaupymai (Savings) - PROJECT LIFETIME
-                                    sutaupymai_val = -comparison['skirtumas']['total']
-                                    if abs(sutaupymai_val) > 0.001:
-                                        products.append('Sutaupymai')
-                                        values.append(sutaupymai_val)
-
-                                    if products:
-                                        fig_rev_cost = px.bar(
-                                            x=products, y=values,
-                                            labels={"x": "Product", "y": "Value (tūkst. EUR)"},
-                                            title="REVENUE vs COST BY PRODUCTS"
-                                        )
-                                        colors = ['red' if v < 0 else 'green' for v in values]
-                                        fig_rev_cost.update_traces(marker_color=colors, hovertemplate='%{y:,.2f}<extra></extra>')
-                                        st.plotly_chart(fig_rev_cost, use_container_width=True)
-                                    else:
-                                        st.info("No revenue/cost data available.")
-                                else:
-                                    st.info("Finance data not found.")
-
-                    with tab2:
-                        st.subheader("MARKET DETAILS")
-                        st.markdown("""
-                        <style>
-                        .market-table { width: 100%; border-collapse: collapse; margin-bottom: 0px; font-size: 12px; }
-                        .market-table td { padding: 3px; text-align: center; }
-                        .market-table th { padding: 3px; text-align: center; font-weight: bold; }
-                        .power-table td { background-color: #E0F0F5; }
-                        .power-header { font-weight: bold; background-color: #C5E0E8 !important; }
-                        .power-direction-header { background-color: #D5E8EF !important; }
-                        .power-market-title { background-color: #3D7890; color: white; padding: 5px; margin: 0; height: auto; font-size: 14px; }
-                        .energy-table td { background-color: #E6F5EC; }
-                        .energy-header { font-weight: bold; background-color: #D0EAD9 !important; }
-                        .energy-direction-header { background-color: #DCF0E2 !important; }
-                        .energy-market-title { background-color: #4D9D6A; color: white; padding: 5px; margin: 0; height: auto; font-size: 14px; }
-                        .trading-table td { background-color: #EFF5D8; }
-                        .trading-header { font-weight: bold; background-color: #E5ECC5 !important; }
-                        .trading-direction-header { background-color: #EAEFCE !important; }
-                        .trading-market-title { background-color: #8CB63C; color: white; padding: 5px; margin: 0; height: auto; font-size: 14px; }
-                        .row-compact { margin-bottom: 0px !important; padding: 0px !important; }
-                        hr { margin: 5px 0 !important; }
-                        </style>
-                        """, unsafe_allow_html=True)
-
-                        if "aggregated" in data and "markets" in data["aggregated"]:
-                            markets_data = data["aggregated"]["markets"]
-
-                            market_tabs_p2h = st.tabs([
-                                "BALANSAVIMO PAJĖGUMŲ RINKA",
-                                "BALANSAVIMO ENERGIJOS RINKA",
-                                "ELEKTROS ENERGIJOS PREKYBA"
-                            ])
-
-                            # Tab 1: Power Balancing Market (P2H)
-                            with market_tabs_p2h[0]:
-                                if 'BALANSAVIMO_PAJEGUMU_RINKA' in markets_data:
-                                    balansavimo_pajegumu_data = markets_data['BALANSAVIMO_PAJEGUMU_RINKA']
-                                    processed_something_in_power = False
-                                    # FCR section
-                                    if 'FCR' in balansavimo_pajegumu_data:
-                                        fcr_data = balansavimo_pajegumu_data['FCR']
-                                        col1, col2 = st.columns([1, 5])
-                                        with col1:
-                                            st.markdown(
-                                                f"""<div class="power-market-title"><h4 style="margin:0;">{fcr_data.get('header', 'FCR')}</h4><small>{fcr_data.get('description', 'FREQUENCY CONTAINMENT RESERVE')}</small></div>""",
-                                                unsafe_allow_html=True)
-                                        with col2:
-                                            st.markdown(
-                                                f"""<table class="market-table power-table"><tr><th class="power-header">{fcr_data.get('volume_of_procured_reserves', {}).get('header', 'VOLUME OF PROCURED RESERVES')}</th></tr><tr><td>{fcr_data.get('volume_of_procured_reserves', {}).get('value', 0):.2f} MW</td></tr></table>""" +
-                                                f"""<table class="market-table power-table"><tr><th class="power-header">{fcr_data.get('utilisation', {}).get('header', 'UTILISATION (% OF TIME)')}</th></tr><tr><td>{fcr_data.get('utilisation', {}).get('value', 0.0):.2f} %</td></tr></table>""" +
-                                                f"""<table class="market-table power-table"><tr><th class="power-header">{fcr_data.get('potential_revenue', {}).get('header', 'POTENTIAL REVENUE')}</th></tr><tr><td>{fcr_data.get('potential_revenue', {}).get('value', 0.0):.2f} tūkst. EUR</td></tr></table>""" +
-                                                f"""<table class="market-table power-table"><tr><th class="power-header">{fcr_data.get('bids_selected', {}).get('header', '% OF BIDS SELECTED')}</th></tr><tr><td>{fcr_data.get('bids_selected', {}).get('value', 0.0):.2f} %</td></tr></table>""",
-                                                unsafe_allow_html=True)
-                                        st.markdown("<hr>", unsafe_allow_html=True)
-                                        processed_something_in_power = True
-                                    # aFRR section
-                                    if 'aFRR' in balansavimo_pajegumu_data:
-                                        afrr_data = balansavimo_pajegumu_data['aFRR']
-                                        col1, col2 = st.columns([1, 5])
-                                        with col1:
-                                            st.markdown(
-                                                f"""<div class="power-market-title"><h4 style="margin:0;">{afrr_data.get('header', 'aFRR')}</h4><small>{afrr_data.get('description', 'AUTOMATIC FREQUENCY RESTORATION RESERVE')}</small></div>""",
-                                                unsafe_allow_html=True)
-                                        with col2:
-                                            st.markdown(
-                                                f"""<table class="market-table power-table"><tr><th class="power-header" colspan="2">{afrr_data.get('volume_of_procured_reserves', {}).get('header', 'VOLUME OF PROCURED RESERVES')}</th></tr><tr><th class="power-direction-header">UPWARD</th><th class="power-direction-header">DOWNWARD</th></tr><tr><td>{afrr_data.get('volume_of_procured_reserves', {}).get('upward', {}).get('value', 0):.2f} MW</td><td>{afrr_data.get('volume_of_procured_reserves', {}).get('downward', {}).get('value', 0):.2f} MW</td></tr></table>""" +
-                                                f"""<table class="market-table power-table"><tr><th class="power-header" colspan="2">{afrr_data.get('utilisation', {}).get('header', 'UTILISATION (% OF TIME)')}</th></tr><tr><th class="power-direction-header">UPWARD</th><th class="power-direction-header">DOWNWARD</th></tr><tr><td>{afrr_data.get('utilisation', {}).get('upward', {}).get('value', 0.0):.2f} %</td><td>{afrr_data.get('utilisation', {}).get('downward', {}).get('value', 0.0):.2f} %</td></tr></table>""" +
-                                                f"""<table class="market-table power-table"><tr><th class="power-header" colspan="2">{afrr_data.get('potential_revenue', {}).get('header', 'POTENTIAL REVENUE')}</th></tr><tr><th class="power-direction-header">UPWARD</th><th class="power-direction-header">DOWNWARD</th></tr><tr><td>{afrr_data.get('potential_revenue', {}).get('upward', {}).get('value', 0.0):.2f} tūkst. EUR</td><td>{afrr_data.get('potential_revenue', {}).get('downward', {}).get('value', 0.0):.2f} tūkst. EUR</td></tr></table>""" +
-                                                f"""<table class="market-table power-table"><tr><th class="power-header" colspan="2">{afrr_data.get('bids_selected', {}).get('header', '% OF BIDS SELECTED')}</th></tr><tr><th class="power-direction-header">UPWARD</th><th class="power-direction-header">DOWNWARD</th></tr><tr><td>{afrr_data.get('bids_selected', {}).get('upward', {}).get('value', 0.0):.2f} %</td><td>{afrr_data.get('bids_selected', {}).get('downward', {}).get('value', 0.0):.2f} %</td></tr></table>""",
-                                                unsafe_allow_html=True)
-                                        st.markdown("<hr>", unsafe_allow_html=True)
-                                        processed_something_in_power = True
-                                    # mFRR section
-                                    if 'mFRR' in balansavimo_pajegumu_data:
-                                        mfrr_data = balansavimo_pajegumu_data['mFRR']
-                                        col1, col2 = st.columns([1, 5])
-                                        with col1:
-                                            st.markdown(
-                                                f"""<div class="power-market-title"><h4 style="margin:0;">{mfrr_data.get('header', 'mFRR')}</h4><small>{mfrr_data.get('description', 'MANUAL FREQUENCY RESTORATION RESERVE')}</small></div>""",
-                                                unsafe_allow_html=True)
-                                        with col2:
-                                            st.markdown(
-                                                f"""<table class="market-table power-table"><tr><th class="power-header" colspan="2">{mfrr_data.get('volume_of_procured_reserves', {}).get('header', 'VOLUME OF PROCURED RESERVES')}</th></tr><tr><th class="power-direction-header">UPWARD</th><th class="power-direction-header">DOWNWARD</th></tr><tr><td>{mfrr_data.get('volume_of_procured_reserves', {}).get('upward', {}).get('value', 0):.2f} MW</td><td>{mfrr_data.get('volume_of_procured_reserves', {}).get('downward', {}).get('value', 0):.2f} MW</td></tr></table>""" +
-                                                f"""<table class="market-table power-table"><tr><th class="power-header" colspan="2">{mfrr_data.get('utilisation', {}).get('header', 'UTILISATION (% OF TIME)')}</th></tr><tr><th class="power-direction-header">UPWARD</th><th class="power-direction-header">DOWNWARD</th></tr><tr><td>{mfrr_data.get('utilisation', {}).get('upward', {}).get('value', 0.0):.2f} %</td><td>{mfrr_data.get('utilisation', {}).get('downward', {}).get('value', 0.0):.2f} %</td></tr></table>""" +
-                                                f"""<table class="market-table power-table"><tr><th class="power-header" colspan="2">{mfrr_data.get('potential_revenue', {}).get('header', 'POTENTIAL REVENUE')}</th></tr><tr><th class="power-direction-header">UPWARD</th><th class="power-direction-header">DOWNWARD</th></tr><tr><td>{mfrr_data.get('potential_revenue', {}).get('upward', {}).get('value', 0.0):.2f} tūkst. EUR</td><td>{mfrr_data.get('potential_revenue', {}).get('downward', {}).get('value', 0.0):.2f} tūkst. EUR</td></tr></table>""" +
-                                                f"""<table class="market-table power-table"><tr><th class="power-header" colspan="2">{mfrr_data.get('bids_selected', {}).get('header', '% OF BIDS SELECTED')}</th></tr><tr><th class="power-direction-header">UPWARD</th><th class="power-direction-header">DOWNWARD</th></tr><tr><td>{mfrr_data.get('bids_selected', {}).get('upward', {}).get('value', 0.0):.2f} %</td><td>{mfrr_data.get('bids_selected', {}).get('downward', {}).get('value', 0.0):.2f} %</td></tr></table>""",
-                                                unsafe_allow_html=True)
-                                        # No <hr> after the last item if it's mFRR
-                                        processed_something_in_power = True
-                                    if not processed_something_in_power:
-                                        st.info("Nėra duomenų apie balansavimo pajėgumų rinką.")
-                                else:
-                                    st.info("Balansavimo pajėgumų rinkos duomenų nėra.")
-
-                            # Tab 2: Energy Balancing Market (P2H)
-                            with market_tabs_p2h[1]:
-                                if 'BALANSAVIMO_ENERGIJOS_RINKA' in markets_data:
-                                    balansavimo_energijos_data = markets_data['BALANSAVIMO_ENERGIJOS_RINKA']
-                                    processed_something_in_energy = False
-                                    # aFRR section
-                                    if 'aFRR' in balansavimo_energijos_data:
-                                        afrr_data = balansavimo_energijos_data['aFRR']
-                                        col1, col2 = st.columns([1, 5])
-                                        with col1:
-                                            st.markdown(
-                                                f"""<div class="energy-market-title"><h4 style="margin:0;">{afrr_data.get('header', 'aFRR')}</h4><small>{afrr_data.get('description', 'AUTOMATIC FREQUENCY RESTORATION RESERVE')}</small></div>""",
-                                                unsafe_allow_html=True)
-                                        with col2:
-                                            st.markdown(
-                                                f"""<table class="market-table energy-table"><tr><th class="energy-header" colspan="2">{afrr_data.get('volume_of_procured_energy', {}).get('header', 'VOLUME OF PROCURED ENERGY')}</th></tr><tr><th class="energy-direction-header">UPWARD</th><th class="energy-direction-header">DOWNWARD</th></tr><tr><td>{afrr_data.get('volume_of_procured_energy', {}).get('upward', {}).get('value', 0.0):.2f} MWh</td><td>{afrr_data.get('volume_of_procured_energy', {}).get('downward', {}).get('value', 0.0):.2f} MWh</td></tr></table>""" +
-                                                f"""<table class="market-table energy-table"><tr><th class="energy-header" colspan="2">{afrr_data.get('utilisation', {}).get('header', 'UTILISATION (% OF TIME)')}</th></tr><tr><th class="energy-direction-header">UPWARD</th><th class="energy-direction-header">DOWNWARD</th></tr><tr><td>{afrr_data.get('utilisation', {}).get('upward', {}).get('value', 0.0):.2f} %</td><td>{afrr_data.get('utilisation', {}).get('downward', {}).get('value', 0.0):.2f} %</td></tr></table>""" +
-                                                f"""<table class="market-table energy-table"><tr><th class="energy-header" colspan="2">{afrr_data.get('potential_revenue', {}).get('header', 'POTENTIAL REVENUE')}</th></tr><tr><th class="energy-direction-header">UPWARD</th><th class="energy-direction-header">DOWNWARD</th></tr><tr><td>{afrr_data.get('potential_revenue', {}).get('upward', {}).get('value', 0.0):.2f} tūkst. EUR</td><td>{afrr_data.get('potential_revenue', {}).get('downward', {}).get('value', 0.0):.2f} tūkst. EUR</td></tr></table>""" +
-                                                f"""<table class="market-table energy-table"><tr><th class="energy-header" colspan="2">{afrr_data.get('bids_selected', {}).get('header', '% OF BIDS SELECTED')}</th></tr><tr><th class="energy-direction-header">UPWARD</th><th class="energy-direction-header">DOWNWARD</th></tr><tr><td>{afrr_data.get('bids_selected', {}).get('upward', {}).get('value', 0.0):.2f} %</td><td>{afrr_data.get('bids_selected', {}).get('downward', {}).get('value', 0.0):.2f} %</td></tr></table>""",
-                                                unsafe_allow_html=True)
-                                        st.markdown("<hr>", unsafe_allow_html=True)
-                                        processed_something_in_energy = True
-                                    # mFRR section
-                                    if 'mFRR' in balansavimo_energijos_data:
-                                        mfrr_data = balansavimo_energijos_data['mFRR']
-                                        col1, col2 = st.columns([1, 5])
-                                        with col1:
-                                            st.markdown(
-                                                f"""<div class="energy-market-title"><h4 style="margin:0;">{mfrr_data.get('header', 'mFRR')}</h4><small>{mfrr_data.get('description', 'MANUAL FREQUENCY RESTORATION RESERVE')}</small></div>""",
-                                                unsafe_allow_html=True)
-                                        with col2:
-                                            st.markdown(
-                                                f"""<table class="market-table energy-table"><tr><th class="energy-header" colspan="2">{mfrr_data.get('volume_of_procured_energy', {}).get('header', 'VOLUME OF PROCURED ENERGY')}</th></tr><tr><th class="energy-direction-header">UPWARD</th><th class="energy-direction-header">DOWNWARD</th></tr><tr><td>{mfrr_data.get('volume_of_procured_energy', {}).get('upward', {}).get('value', 0.0):.2f} MWh</td><td>{mfrr_data.get('volume_of_procured_energy', {}).get('downward', {}).get('value', 0.0):.2f} MWh</td></tr></table>""" +
-                                                f"""<table class="market-table energy-table"><tr><th class="energy-header" colspan="2">{mfrr_data.get('utilisation', {}).get('header', 'UTILISATION (% OF TIME)')}</th></tr><tr><th class="energy-direction-header">UPWARD</th><th class="energy-direction-header">DOWNWARD</th></tr><tr><td>{mfrr_data.get('utilisation', {}).get('upward', {}).get('value', 0.0):.2f} %</td><td>{mfrr_data.get('utilisation', {}).get('downward', {}).get('value', 0.0):.2f} %</td></tr></table>""" +
-                                                f"""<table class="market-table energy-table"><tr><th class="energy-header" colspan="2">{mfrr_data.get('potential_revenue', {}).get('header', 'POTENTIAL REVENUE')}</th></tr><tr><th class="energy-direction-header">UPWARD</th><th class="energy-direction-header">DOWNWARD</th></tr><tr><td>{mfrr_data.get('potential_revenue', {}).get('upward', {}).get('value', 0.0):.2f} tūkst. EUR</td><td>{mfrr_data.get('potential_revenue', {}).get('downward', {}).get('value', 0.0):.2f} tūkst. EUR</td></tr></table>""" +
-                                                f"""<table class="market-table energy-table"><tr><th class="energy-header" colspan="2">{mfrr_data.get('bids_selected', {}).get('header', '% OF BIDS SELECTED')}</th></tr><tr><th class="energy-direction-header">UPWARD</th><th class="energy-direction-header">DOWNWARD</th></tr><tr><td>{mfrr_data.get('bids_selected', {}).get('upward', {}).get('value', 0.0):.2f} %</td><td>{mfrr_data.get('bids_selected', {}).get('downward', {}).get('value', 0.0):.2f} %</td></tr></table>""",
-                                                unsafe_allow_html=True)
-                                        processed_something_in_energy = True
-                                    if not processed_something_in_energy:
-                                        st.info("Nėra duomenų apie balansavimo energijos rinką.")
-                                else:
-                                    st.info("Balansavimo energijos rinkos duomenų nėra.")
-
-                            # Tab 3: Electricity Trading (P2H)
-                            with market_tabs_p2h[2]:
-                                if 'ELEKTROS_ENERGIJOS_PREKYBA' in markets_data:
-                                    elektros_energijos_data = markets_data['ELEKTROS_ENERGIJOS_PREKYBA']
-                                    section_keys = list(elektros_energijos_data.keys())
-                                    if not section_keys:
-                                        st.info("Nėra elektros energijos prekybos duomenų.")
-
-                                    for i, section_name in enumerate(section_keys):
-                                        section_data = elektros_energijos_data[section_name]
-
-                                        col1, col2 = st.columns([1, 5])
-                                        with col1:
-                                            st.markdown(
-                                                f"""<div class="trading-market-title"><h4 style="margin:0;">{section_data.get('header', section_name.replace('_', ' '))}</h4><small>{section_data.get('description', '')}</small></div>""",
-                                                unsafe_allow_html=True)
-
-                                        html_tables_trading = ""
-                                        # Volume of Energy Exchange
-                                        voee = section_data.get('volume_of_energy_exchange', {})
-                                        voee_header_text = voee.get('header', 'VOLUME OF ENERGY EXCHANGE')
-                                        if 'sale' in voee:  # Standard purchase/sale structure
-                                            html_tables_trading += f"""<table class="market-table trading-table"><tr><th class="trading-header" colspan="2">{voee_header_text}</th></tr>
-                                                                    <tr><th class="trading-direction-header">PURCHASE</th><th class="trading-direction-header">SALE</th></tr>
-                                                                    <tr><td>{voee.get('purchase', {}).get('value', 0.0):.2f} MWh</td><td>{voee.get('sale', {}).get('value', 0.0):.2f} MWh</td></tr></table>"""
-                                        elif 'purchase' in voee:  # Purchase only (e.g., Electricity Consumption, Heat Generation)
-                                            if section_name == "Heat_Generation" and 'header' not in voee:  # Specific header for Heat Gen if not provided
-                                                voee_header_text = "VOLUME OF HEAT GENERATED"
-                                            elif section_name == "Electricity_Consumption" and 'header' not in voee:
-                                                voee_header_text = "VOLUME OF ENERGY PURCHASED"
-
-                                            html_tables_trading += f"""<table class="market-table trading-table"><tr><th class="trading-header">{voee_header_text}</th></tr>
-                                                                    <tr><td>{voee.get('purchase', {}).get('value', 0.0):.2f} MWh</td></tr></table>"""
-                                        else:  # Fallback
-                                            html_tables_trading += f"""<table class="market-table trading-table"><tr><th class="trading-header" colspan="2">{voee_header_text}</th></tr><tr><td colspan="2">Nėra duomenų</td></tr></table>"""
-
-                                        # Percentage of Time
-                                        pot = section_data.get('percentage_of_time', {})
-                                        pot_header_text = pot.get('header', '% OF TIME')
-                                        if 'sale' in pot:
-                                            html_tables_trading += f"""<table class="market-table trading-table"><tr><th class="trading-header" colspan="2">{pot_header_text}</th></tr>
-                                                                    <tr><th class="trading-direction-header">PURCHASE</th><th class="trading-direction-header">SALE</th></tr>
-                                                                    <tr><td>{pot.get('purchase', {}).get('value', 0.0):.2f} %</td><td>{pot.get('sale', {}).get('value', 0.0):.2f} %</td></tr></table>"""
-                                        elif 'purchase' in pot:
-                                            html_tables_trading += f"""<table class="market-table trading-table"><tr><th class="trading-header">{pot_header_text}</th></tr>
-                                                                    <tr><td>{pot.get('purchase', {}).get('value', 0.0):.2f} %</td></tr></table>"""
-                                        else:
-                                            html_tables_trading += f"""<table class="market-table trading-table"><tr><th class="trading-header" colspan="2">{pot_header_text}</th></tr><tr><td colspan="2">Nėra duomenų</td></tr></table>"""
-
-                                        # Potential Cost/Revenue
-                                        pcr = section_data.get('potential_cost_revenue', {})
-                                        pcr_header_text = pcr.get('header', 'COST & REVENUE')
-                                        if 'revenue' in pcr and 'cost' in pcr:  # Standard cost/revenue structure
-                                            html_tables_trading += f"""<table class="market-table trading-table"><tr><th class="trading-header" colspan="2">{pcr_header_text}</th></tr>
-                                                                    <tr><th class="trading-direction-header">COST</th><th class="trading-direction-header">REVENUE</th></tr>
-                                                                    <tr><td>{pcr.get('cost', {}).get('value', 0.0):.2f} tūkst. EUR</td><td>{pcr.get('revenue', {}).get('value', 0.0):.2f} tūkst. EUR</td></tr></table>"""
-                                        elif 'cost' in pcr:  # Cost only
-                                            if 'header' not in pcr: pcr_header_text = "COST"  # Override if only cost and no specific header
-                                            html_tables_trading += f"""<table class="market-table trading-table"><tr><th class="trading-header">{pcr_header_text}</th></tr>
-                                                                    <tr><td>{pcr.get('cost', {}).get('value', 0.0):.2f} tūkst. EUR</td></tr></table>"""
-                                        else:  # Fallback
-                                            html_tables_trading += f"""<table class="market-table trading-table"><tr><th class="trading-header" colspan="2">{pcr_header_text}</th></tr><tr><td colspan="2">Nėra duomenų</td></tr></table>"""
-
-                                        with col2:
-                                            st.markdown(html_tables_trading, unsafe_allow_html=True)
-
-                                        if i < len(section_keys) - 1:  # Add <hr> if not the last section
-                                            st.markdown("<hr>", unsafe_allow_html=True)
-                                else:
-                                    st.info("Elektros energijos prekybos duomenų nėra.")
-
-                    with tab3:
-                        st.subheader("ECONOMIC RESULTS")
-
-                        if "aggregated" in data and "economic_results" in data["aggregated"]:
-                            econ_data = data["aggregated"]["economic_results"]
-
-                            # GROSS REVENUE BY PRODUCT - table + green bar chart
-                            st.write("##### GROSS REVENUE BY PRODUCT")
-                            gross_revenue_data = econ_data.get('gross_revenue_by_product', [])
-                            if gross_revenue_data:
-                                st.table(gross_revenue_data)
-                                fig_rev = px.bar(
-                                    gross_revenue_data,
-                                    x="Product",
-                                    y="Value (tūkst. EUR)",
-                                    title="GROSS REVENUE BY PRODUCT",
-                                    color_discrete_sequence=['#2ecc71']  # Green
-                                )
-                                fig_rev.update_traces(hovertemplate='%{y:,.2f}<extra></extra>')
-                                st.plotly_chart(fig_rev, use_container_width=True)
-                            else:
-                                st.info("No gross revenue data available")
-
-                            # VARIABLE COSTS BY PRODUCT - table + red bar chart
-                            st.write("##### VARIABLE COSTS BY PRODUCT")
-                            variable_costs_data = econ_data.get('variable_costs_by_product', [])
-                            if variable_costs_data:
-                                st.table(variable_costs_data)
-                                fig_var = px.bar(
-                                    variable_costs_data,
-                                    x="Product",
-                                    y="Value (tūkst. EUR)",
-                                    title="VARIABLE COSTS BY PRODUCT",
-                                    color_discrete_sequence=['#e74c3c']  # Red
-                                )
-                                fig_var.update_traces(hovertemplate='%{y:,.2f}<extra></extra>')
-                                st.plotly_chart(fig_var, use_container_width=True)
-                            else:
-                                st.info("No variable costs data available")
-
-                            # YEARLY RESULTS - table + NPV line chart
-                            st.write("##### YEARLY RESULTS")
-                            if "yearly_table" in econ_data and econ_data["yearly_table"]:
-                                st.table(econ_data["yearly_table"])
-
-                                yearly_df = pd.DataFrame(econ_data["yearly_table"])
-                                npv_col = "NPV (tūkst. EUR)"
-                                if "YEAR" in yearly_df.columns and npv_col in yearly_df.columns:
-                                    fig_yearly_npv = px.line(
-                                        yearly_df, x="YEAR", y=npv_col, markers=True,
-                                        title="NET PRESENT VALUE OVER TIME"
-                                    )
-                                    fig_yearly_npv.update_traces(hovertemplate='%{y:,.2f}<extra></extra>')
-                                    st.plotly_chart(fig_yearly_npv, use_container_width=True)
-                            else:
-                                st.info("No yearly results data available.")
-                        else:
-                            st.info("Economic results data not found.")
-
-                    with tab4:
-                        # P2H Comparison tab - Project Lifetime totals
-                        if 'aggregated' in data and 'comparison' in data['aggregated']:
-                            comparison = data['aggregated']['comparison']
-
-                            st.write("### P2H SAVINGS COMPARISON (Project Lifetime)")
-                            st.write("Total comparison between boiler-only operation and optimized heat pump operation over project lifetime")
-
-                            # Get pre-calculated values from backend
-                            number_of_years = comparison.get('number_of_years', 1)
-                            cost_boiler_total = comparison['tik katilas']['total']
-                            cost_with_hp_total = comparison['katilas + šilumos siurblys']['total']
-                            savings_total = comparison['skirtumas']['total']
-                            balancing_revenue_total = comparison['balancing_revenue']['total']
-                            benefits_total = comparison['benefits']['total']
-                            chart_data = comparison.get('comparison_chart_data', {})
-
-                            # 5 KPI metrics in two rows for better readability
-                            # Row 1: 3 metrics
-                            row1_cols = st.columns(3)
-
-                            with row1_cols[0]:
-                                st.metric(
-                                    "Cost with Boiler",
-                                    f"{cost_boiler_total:.2f} tūkst. EUR",
-                                    help=f"Total project cost of heating with boiler only ({number_of_years} years)"
-                                )
-
-                            with row1_cols[1]:
-                                st.metric(
-                                    "Cost with Boiler + Heat Pump",
-                                    f"{cost_with_hp_total:.2f} tūkst. EUR",
-                                    help=f"Total project cost with optimized heat pump operation ({number_of_years} years)"
-                                )
-
-                            with row1_cols[2]:
-                                st.metric(
-                                    "Savings",
-                                    f"{savings_total:.2f} tūkst. EUR",
-                                    help=f"Total cost savings from heat pump optimization ({number_of_years} years)"
-                                )
-
-                            # Row 2: 2 metrics
-                            row2_cols = st.columns(2)
-
-                            with row2_cols[0]:
-                                st.metric(
-                                    "Revenue from Balancing",
-                                    f"{balancing_revenue_total:.2f} tūkst. EUR",
-                                    help=f"Total revenue from balancing market participation ({number_of_years} years)"
-                                )
-
-                            with row2_cols[1]:
-                                st.metric(
-                                    "Benefits of Heat Pump",
-                                    f"{benefits_total:.2f} tūkst. EUR",
-                                    delta=f"{benefits_total:.2f}",
-                                    delta_color="normal",
-                                    help=f"Total benefit: Savings + Revenue from balancing ({number_of_years} years)"
-                                )
-
-                            # Comparison chart (stacked bar with 3 categories)
-                            st.write("#### COST COMPARISON BREAKDOWN (Project Lifetime)")
-
-                            fig_comparison = go.Figure()
-
-                            # Left bar: Cost with boiler (red, negative)
-                            fig_comparison.add_trace(go.Bar(
-                                name='Cost with Boiler Only',
-                                x=['Boiler Only'],
-                                y=[cost_boiler_total],
-                                marker_color='red',
-                                hovertemplate='%{y:,.2f} tūkst. EUR<extra></extra>'
-                            ))
-
-                            # Middle bar bottom: Cost with boiler + heat pump (lightcoral, negative)
-                            fig_comparison.add_trace(go.Bar(
-                                name='Cost with Boiler + Heat Pump',
-                                x=['Boiler + Heat Pump'],
-                                y=[cost_with_hp_total],
-                                marker_color='lightcoral',
-                                hovertemplate='%{y:,.2f} tūkst. EUR<extra></extra>'
-                            ))
-
-                            # Middle bar top: Revenue from balancing (green, positive)
-                            fig_comparison.add_trace(go.Bar(
-                                name='Revenue from Balancing',
-                                x=['Boiler + Heat Pump'],
-                                y=[balancing_revenue_total],
-                                marker_color='green',
-                                hovertemplate='%{y:,.2f} tūkst. EUR<extra></extra>'
-                            ))
-
-                            # Right bar: Savings (light green, positive)
-                            fig_comparison.add_trace(go.Bar(
-                                name='Savings',
-                                x=['Savings'],
-                                y=[savings_total],
-                                marker_color='lightgreen',
-                                hovertemplate='%{y:,.2f} tūkst. EUR<extra></extra>'
-                            ))
-
-                            fig_comparison.update_layout(
-                                title=f"BOILER vs HEAT PUMP COST COMPARISON (Project Lifetime: {number_of_years} years)",
-                                barmode='relative',
-                                yaxis_title="Cost/Revenue (tūkst. EUR)",
-                                yaxis=dict(zeroline=True, zerolinecolor='black', zerolinewidth=2),
-                                showlegend=True
-                            )
-
-                            st.plotly_chart(fig_comparison, use_container_width=True)
-
-                            # Raw data expander
-                            with st.expander("Raw Comparison Data"):
-                                st.json(comparison)
-                        else:
-                            st.info("Comparison data not found in response.")
+        with col4:
+            # REVENUE vs COST BY PRODUCTS (using total_finance) - PROJECT LIFETIME
+            if 'total_finance' in data.get('aggregated', {}) and 'comparison' in data.get('aggregated', {}) and 'yearly' in data.get('aggregated', {}):
+                total_finance = data['aggregated']['total_finance']
+                comparison = data['aggregated']['comparison']
+                yearly = data['aggregated']['yearly']
+                number_of_years = len(yearly) - 1 if len(yearly) > 1 else 1
+
+                products = []
+                values = []
+
+                # Costs from total_finance (negative values) - PROJECT LIFETIME
+                # Note: perkama DA excluded (shown in PROJECT FINANCIAL BREAKDOWN)
+                cost_products = ['perkama ID']
+                for prod in cost_products:
+                    val = total_finance.get(prod, 0) * number_of_years
+                    if abs(val) > 0.001:  # Filter near-zero
+                        products.append(prod)
+                        values.append(val)
+
+                # Revenue - each balancing product separately - PROJECT LIFETIME
+                balancing_products = ['FCR CAP', 'aFRRu CAP', 'aFRRd CAP', 'mFRRu CAP', 'mFRRd CAP',
+                                      'parduodama ID', 'aFRRu', 'aFRRd', 'mFRRu', 'mFRRd']
+                for prod in balancing_products:
+                    val = total_finance.get(prod, 0) * number_of_years
+                    if abs(val) > 0.001:  # Filter near-zero
+                        products.append(prod)
+                        values.append(val)
+
+                # Sutaupymai (Savings) - PROJECT LIFETIME
+                sutaupymai_val = -comparison['skirtumas']['total']
+                if abs(sutaupymai_val) > 0.001:
+                    products.append('Sutaupymai')
+                    values.append(sutaupymai_val)
+
+                if products:
+                    fig_rev_cost = memo.figure("revenue_cost", build_p2h_revenue_cost_figure, products, values)
+                    st.plotly_chart(fig_rev_cost, use_container_width=True)
                 else:
-                    try:
-                        error_data = response.json()
-                        if "detail" in error_data:
-                            st.error(f"Calculation failed: {error_data['detail']}")
-                        else:
-                            st.error(f"Request failed with status code: {response.status_code}")
-                    except json.JSONDecodeError:
-                        st.error(f"Request failed with status code: {response.status_code}")
-            except requests.exceptions.RequestException as e:
-                st.error(f"Error making request: {str(e)}")
-            except Exception as e:
-                st.error(f"An unexpected error occurred: {str(e)}")
+                    st.info("No revenue/cost data available.")
+            else:
+                st.info("Finance data not found.")
+
+
+def build_p2h_npv_figure(npv_data):
+    import plotly.graph_objects as go
+    from plotly.subplots import make_subplots
+    fig_npv = make_subplots(specs=[[{"secondary_y": True}]])
+    fig_npv.add_trace(go.Bar(x=npv_data['years'], y=npv_data['dcfs'],
+                             name="Discounted Cash Flow", marker_color="lightblue",
+                             opacity=0.7),
+                      secondary_y=False)
+    fig_npv.add_trace(go.Scatter(x=npv_data['years'], y=npv_data['npv'],
+                                 mode="lines+markers", name="Cumulative NPV",
+                                 line=dict(color="red", width=3)), secondary_y=True)
+    if npv_data.get('break_even_point') is not None and \
+            isinstance(npv_data['break_even_point'], int) and \
+            0 <= npv_data['break_even_point'] < len(npv_data['years']):
+        break_even_year = npv_data['years'][npv_data['break_even_point']]
+        break_even_value = npv_data['npv'][npv_data['break_even_point']]
+        fig_npv.add_scatter(x=[break_even_year], y=[break_even_value], mode="markers",
+                            marker=dict(size=10, color="green"),
+                            name="Break-even Point",
+                            secondary_y=True)
+    fig_npv.update_xaxes(title_text="Year")
+    fig_npv.update_yaxes(title_text="Discounted Cash Flow (tūkst. EUR)",
+                         secondary_y=False)
+    fig_npv.update_yaxes(title_text="Cumulative NPV (tūkst. EUR)", secondary_y=True)
+    fig_npv.update_layout(title="NET PRESENT VALUE ANALYSIS", hovermode='x unified')
+    return fig_npv
+
+
+def build_p2h_utilisation_figure(util_data):
+    import plotly.express as px
+    fig_util = px.bar(
+        x=util_data['products'],
+        y=util_data['values'],
+        labels={"x": "Product", "y": "Utilisation (%)"},
+        title="UTILISATION (% TIME) BY PRODUCTS"
+    )
+    fig_util.update_traces(hovertemplate='%{y:,.2f}<extra></extra>')
+    return fig_util
+
+
+def build_p2h_financial_breakdown_figure(capex, opex_total, savings_total, balancing_revenue_total):
+    import plotly.graph_objects as go
+    fig_profit = go.Figure()
+
+    # Positive values (above zero)
+    fig_profit.add_trace(go.Bar(
+        name='Sutaupymai',
+        x=['Project'],
+        y=[savings_total],
+        marker_color='lightgreen',
+        hovertemplate='%{y:,.2f} tūkst. EUR<extra></extra>',
+        base=0
+    ))
+    fig_profit.add_trace(go.Bar(
+        name='Pajamos iš balansavimo',
+        x=['Project'],
+        y=[balancing_revenue_total],
+        marker_color='green',
+        hovertemplate='%{y:,.2f} tūkst. EUR<extra></extra>',
+        base=[savings_total]
+    ))
+
+    # Negative values (below zero)
+    fig_profit.add_trace(go.Bar(
+        name='CAPEX',
+        x=['Project'],
+        y=[-capex],
+        marker_color='lightcoral',
+        hovertemplate='%{y:,.2f} tūkst. EUR<extra></extra>',
+        base=0
+    ))
+    fig_profit.add_trace(go.Bar(
+        name='OPEX',
+        x=['Project'],
+        y=[-opex_total],
+        marker_color='red',
+        hovertemplate='%{y:,.2f} tūkst. EUR<extra></extra>',
+        base=[-capex]
+    ))
+
+    fig_profit.update_layout(
+        title="PROJECT FINANCIAL BREAKDOWN",
+        barmode='relative',
+        yaxis_title="Value (tūkst. EUR)",
+        yaxis=dict(zeroline=True, zerolinecolor='black', zerolinewidth=2),
+        showlegend=True
+    )
+    return fig_profit
+
+
+def build_p2h_revenue_cost_figure(products, values):
+    import plotly.express as px
+    fig_rev_cost = px.bar(
+        x=products, y=values,
+        labels={"x": "Product", "y": "Value (tūkst. EUR)"},
+        title="REVENUE vs COST BY PRODUCTS"
+    )
+    colors = ['red' if v < 0 else 'green' for v in values]
+    fig_rev_cost.update_traces(marker_color=colors, hovertemplate='%{y:,.2f}<extra></extra>')
+    return fig_rev_cost
+
+
+def render_p2h_market_details(data, memo):
+    st.subheader("MARKET DETAILS")
+    if "aggregated" in data and "markets" in data["aggregated"]:
+        render_market_tabs("p2h_market_tab", data["aggregated"]["markets"], BALANCING_AND_TRADING_MARKETS, memo)
+
+
+def render_p2h_economic_results(data, memo):
+    st.subheader("ECONOMIC RESULTS")
+
+    if "aggregated" in data and "economic_results" in data["aggregated"]:
+        econ_data = data["aggregated"]["economic_results"]
+
+        # GROSS REVENUE BY PRODUCT - table + green bar chart
+        st.write("##### GROSS REVENUE BY PRODUCT")
+        gross_revenue_data = econ_data.get('gross_revenue_by_product', [])
+        if gross_revenue_data:
+            st.table(gross_revenue_data)
+            fig_rev = memo.figure("gross_revenue", build_p2h_gross_revenue_figure, gross_revenue_data)
+            st.plotly_chart(fig_rev, use_container_width=True)
+        else:
+            st.info("No gross revenue data available")
+
+        # VARIABLE COSTS BY PRODUCT - table + red bar chart
+        st.write("##### VARIABLE COSTS BY PRODUCT")
+        variable_costs_data = econ_data.get('variable_costs_by_product', [])
+        if variable_costs_data:
+            st.table(variable_costs_data)
+            fig_var = memo.figure("variable_costs", build_p2h_variable_costs_figure, variable_costs_data)
+            st.plotly_chart(fig_var, use_container_width=True)
+        else:
+            st.info("No variable costs data available")
+
+        # YEARLY RESULTS - table + NPV line chart
+        st.write("##### YEARLY RESULTS")
+        if "yearly_table" in econ_data and econ_data["yearly_table"]:
+            st.table(econ_data["yearly_table"])
+
+            yearly_df = pd.DataFrame(econ_data["yearly_table"])
+            npv_col = "NPV (tūkst. EUR)"
+            if "YEAR" in yearly_df.columns and npv_col in yearly_df.columns:
+                fig_yearly_npv = memo.figure("yearly_npv", build_p2h_yearly_npv_figure, yearly_df, npv_col)
+                st.plotly_chart(fig_yearly_npv, use_container_width=True)
+        else:
+            st.info("No yearly results data available.")
+    else:
+        st.info("Economic results data not found.")
+
+
+def build_p2h_gross_revenue_figure(gross_revenue_data):
+    import plotly.express as px
+    fig_rev = px.bar(
+        gross_revenue_data,
+        x="Product",
+        y="Value (tūkst. EUR)",
+        title="GROSS REVENUE BY PRODUCT",
+        color_discrete_sequence=['#2ecc71']  # Green
+    )
+    fig_rev.update_traces(hovertemplate='%{y:,.2f}<extra></extra>')
+    return fig_rev
+
+
+def build_p2h_variable_costs_figure(variable_costs_data):
+    import plotly.express as px
+    fig_var = px.bar(
+        variable_costs_data,
+        x="Product",
+        y="Value (tūkst. EUR)",
+        title="VARIABLE COSTS BY PRODUCT",
+        color_discrete_sequence=['#e74c3c']  # Red
+    )
+    fig_var.update_traces(hovertemplate='%{y:,.2f}<extra></extra>')
+    return fig_var
+
+
+def build_p2h_yearly_npv_figure(yearly_df, npv_col):
+    import plotly.express as px
+    fig_yearly_npv = px.line(
+        yearly_df, x="YEAR", y=npv_col, markers=True,
+        title="NET PRESENT VALUE OVER TIME"
+    )
+    fig_yearly_npv.update_traces(hovertemplate='%{y:,.2f}<extra></extra>')
+    return fig_yearly_npv
+
+
+def render_p2h_comparison(data, memo):
+    # P2H Comparison tab - Project Lifetime totals
+    if 'aggregated' in data and 'comparison' in data['aggregated']:
+        comparison = data['aggregated']['comparison']
+
+        st.write("### P2H SAVINGS COMPARISON (Project Lifetime)")
+        st.write("Total comparison between boiler-only operation and optimized heat pump operation over project lifetime")
+
+        # Get pre-calculated values from backend
+        number_of_years = comparison.get('number_of_years', 1)
+        cost_boiler_total = comparison['tik katilas']['total']
+        cost_with_hp_total = comparison['katilas + šilumos siurblys']['total']
+        savings_total = comparison['skirtumas']['total']
+        balancing_revenue_total = comparison['balancing_revenue']['total']
+        benefits_total = comparison['benefits']['total']
+        chart_data = comparison.get('comparison_chart_data', {})
+
+        # 5 KPI metrics in two rows for better readability
+        # Row 1: 3 metrics
+        row1_cols = st.columns(3)
+
+        with row1_cols[0]:
+            st.metric(
+                "Cost with Boiler",
+                f"{cost_boiler_total:.2f} tūkst. EUR",
+                help=f"Total project cost of heating with boiler only ({number_of_years} years)"
+            )
+
+        with row1_cols[1]:
+            st.metric(
+                "Cost with Boiler + Heat Pump",
+                f"{cost_with_hp_total:.2f} tūkst. EUR",
+                help=f"Total project cost with optimized heat pump operation ({number_of_years} years)"
+            )
+
+        with row1_cols[2]:
+            st.metric(
+                "Savings",
+                f"{savings_total:.2f} tūkst. EUR",
+                help=f"Total cost savings from heat pump optimization ({number_of_years} years)"
+            )
+
+        # Row 2: 2 metrics
+        row2_cols = st.columns(2)
+
+        with row2_cols[0]:
+            st.metric(
+                "Revenue from Balancing",
+                f"{balancing_revenue_total:.2f} tūkst. EUR",
+                help=f"Total revenue from balancing market participation ({number_of_years} years)"
+            )
+
+        with row2_cols[1]:
+            st.metric(
+                "Benefits of Heat Pump",
+                f"{benefits_total:.2f} tūkst. EUR",
+                delta=f"{benefits_total:.2f}",
+                delta_color="normal",
+                help=f"Total benefit: Savings + Revenue from balancing ({number_of_years} years)"
+            )
+
+        # Comparison chart (stacked bar with 3 categories)
+        st.write("#### COST COMPARISON BREAKDOWN (Project Lifetime)")
+
+        fig_comparison = memo.figure("comparison", build_p2h_comparison_figure,
+                                     cost_boiler_total, cost_with_hp_total, balancing_revenue_total, savings_total, number_of_years)
+
+        st.plotly_chart(fig_comparison, use_container_width=True)
+
+        # Raw data expander
+        with st.expander("Raw Comparison Data"):
+            st.json(comparison)
+    else:
+        st.info("Comparison data not found in response.")
+
+
+def build_p2h_comparison_figure(cost_boiler_total, cost_with_hp_total, balancing_revenue_total, savings_total, number_of_years):
+    import plotly.graph_objects as go
+    fig_comparison = go.Figure()
+
+    # Left bar: Cost with boiler (red, negative)
+    fig_comparison.add_trace(go.Bar(
+        name='Cost with Boiler Only',
+        x=['Boiler Only'],
+        y=[cost_boiler_total],
+        marker_color='red',
+        hovertemplate='%{y:,.2f} tūkst. EUR<extra></extra>'
+    ))
+
+    # Middle bar bottom: Cost with boiler + heat pump (lightcoral, negative)
+    fig_comparison.add_trace(go.Bar(
+        name='Cost with Boiler + Heat Pump',
+        x=['Boiler + Heat Pump'],
+        y=[cost_with_hp_total],
+        marker_color='lightcoral',
+        hovertemplate='%{y:,.2f} tūkst. EUR<extra></extra>'
+    ))
+
+    # Middle bar top: Revenue from balancing (green, positive)
+    fig_comparison.add_trace(go.Bar(
+        name='Revenue from Balancing',
+        x=['Boiler + Heat Pump'],
+        y=[balancing_revenue_total],
+        marker_color='green',
+        hovertemplate='%{y:,.2f} tūkst. EUR<extra></extra>'
+    ))
+
+    # Right bar: Savings (light green, positive)
+    fig_comparison.add_trace(go.Bar(
+        name='Savings',
+        x=['Savings'],
+        y=[savings_total],
+        marker_color='lightgreen',
+        hovertemplate='%{y:,.2f} tūkst. EUR<extra></extra>'
+    ))
+
+    fig_comparison.update_layout(
+        title=f"BOILER vs HEAT PUMP COST COMPARISON (Project Lifetime: {number_of_years} years)",
+        barmode='relative',
+        yaxis_title="Cost/Revenue (tūkst. EUR)",
+        yaxis=dict(zeroline=True, zerolinecolor='black', zerolinewidth=2),
+        showlegend=True
+    )
+    return fig_comparison
@@ -0,0 +1,105 @@
+import threading
+import time
+
+# Backend incident handling: a circuit breaker per calculator endpoint fails fast once the backend
+# keeps failing, and a scenario that was calculated before is served from its last saved response
+# (marked as stale) when the fresh calculation is unusually slow, fails or is paused by the breaker.
+# The fresh calculation keeps running and refreshes the saved response for the next submit.
+BREAKER_FAILURE_THRESHOLD = 3  # Consecutive failed calls that open the circuit
+BREAKER_COOLDOWN_SECONDS = 30  # Open circuits let one probe call through after this
+STALE_WHILE_REVALIDATE = True
+# A fresh result is waited for STALE_WAIT_FACTOR times the endpoint's recent p95 response time, at least
+# STALE_MIN_WAIT_SECONDS. Until a call has succeeded there is no limit: the saved response is then only
+# served when the call fails.
+STALE_WAIT_FACTOR = 2
+STALE_MIN_WAIT_SECONDS = 10
+
+
+class CircuitOpenError(Exception):
+    def __init__(self, endpoint, retry_in):
+        self.endpoint = endpoint
+        self.retry_in = retry_in
+        super().__init__(f"The {endpoint.upper()} backend is failing; requests are paused for {retry_in:.0f} s")
+
+
+class CircuitBreaker:
+    # closed: calls go through; open: calls are rejected until the cooldown ends;
+    # half-open: one probe call decides whether the circuit closes or opens again
+    def __init__(self, failure_threshold=BREAKER_FAILURE_THRESHOLD, cooldown_seconds=BREAKER_COOLDOWN_SECONDS):
+        self.failure_threshold = failure_threshold
+        self.cooldown_seconds = cooldown_seconds
+        self._failures = 0
+        self._opened_at = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            return "half-open" if time.monotonic() - self._opened_at >= self.cooldown_seconds else "open"
+
+    def retry_in(self):
+        with self._lock:
+            if self._opened_at is None:
+                return 0.0
+            return max(0.0, self._opened_at + self.cooldown_seconds - time.monotonic())
+
+    def allow(self):
+        # Must be followed by record_success or record_failure when it returns True
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.monotonic() - self._opened_at < self.cooldown_seconds or self._probing:
+                return False
+            self._probing = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._probing or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+            self._probing = False
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def circuit_breaker(endpoint):
+    # One breaker per endpoint (beks, p2h, p2g, dsr), shared by every client and session
+    with _breakers_lock:
+        breaker = _breakers.get(endpoint)
+        if breaker is None:
+            breaker = _breakers[endpoint] = CircuitBreaker()
+        return breaker
+
+
+def breaker_rows():
+    with _breakers_lock:
+        breakers = sorted(_breakers.items())
+    return [{"endpoint": endpoint, "state": breaker.state, "retry_in_s": round(breaker.retry_in(), 1)}
+            for endpoint, breaker in breakers]
+
+
+class StaleResponse:
+    # Stands in for from_cache (it is truthy) when a saved response is served instead of a fresh one.
+    # refresh is the Future of the fresh calculation still running in the background, or None.
+    def __init__(self, saved_at, reason, refresh=None):
+        self.saved_at = saved_at
+        self.reason = reason
+        self.refresh = refresh
+        self.replaced = False  # Set once the refreshed result has been shown instead
+
+    @property
+    def refreshed(self):
+        # True when the background calculation finished with a fresh result
+        return self.refresh is not None and self.refresh.done() and self.refresh.exception() is None
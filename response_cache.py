@@ -0,0 +1,183 @@
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+# Cache configuration
+CACHE_TTL_SECONDS = 24 * 60 * 60  # Responses older than this are treated as misses
+CACHE_MAX_ENTRIES = 256  # LRU bound on the number of in-memory responses
+CACHE_MAX_BYTES = 64 * 1024 * 1024  # LRU bound on the in-memory (compressed) payload size
+PAYLOAD_COMPRESSLEVEL = 6  # gzip level for payloads that did not arrive gzip-encoded
+CACHE_DIR = os.environ.get("P2X_CACHE_DIR")  # Set to a directory to enable the on-disk tier
+CACHE_DISK_MAX_BYTES = 512 * 1024 * 1024  # Oldest files are pruned above this size
+
+
+def canonical_request(endpoint, request_body):
+    # Stable text form of a request: sorted keys, no whitespace, unicode kept as is
+    return json.dumps({"endpoint": endpoint, "request_body": request_body},
+                      sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+
+
+def make_cache_key(endpoint, request_body):
+    return hashlib.sha256(canonical_request(endpoint, request_body).encode("utf-8")).hexdigest()
+
+
+def compress_payload(json_bytes):
+    return gzip.compress(json_bytes, compresslevel=PAYLOAD_COMPRESSLEVEL)
+
+
+def decode_payload(payload):
+    # Payloads are gzip-compressed JSON; decoded straight from bytes without an intermediate str
+    return json.loads(gzip.decompress(payload))
+
+
+class ResponseCache:
+    def __init__(self, ttl_seconds=CACHE_TTL_SECONDS, max_entries=CACHE_MAX_ENTRIES, max_bytes=CACHE_MAX_BYTES,
+                 disk_dir=CACHE_DIR, disk_max_bytes=CACHE_DISK_MAX_BYTES):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self.disk_max_bytes = disk_max_bytes
+        # key -> (stored_at, payload bytes); payloads are kept as gzip-compressed JSON so every
+        # caller gets its own copy, the memory bound is exact and the bytes can be served as is
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        if self.disk_dir:
+            os.makedirs(self.disk_dir, exist_ok=True)
+
+    def get(self, endpoint, request_body):
+        return self.get_by_key(make_cache_key(endpoint, request_body))
+
+    def set(self, endpoint, request_body, data):
+        self.set_by_key(make_cache_key(endpoint, request_body), data)
+
+    def get_payload(self, endpoint, request_body):
+        return self.get_payload_by_key(make_cache_key(endpoint, request_body))
+
+    def set_payload(self, endpoint, request_body, payload):
+        self.set_payload_by_key(make_cache_key(endpoint, request_body), payload)
+
+    def get_by_key(self, key):
+        payload = self.get_payload_by_key(key)
+        return None if payload is None else decode_payload(payload)
+
+    def set_by_key(self, key, data):
+        json_bytes = json.dumps(data, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+        self.set_payload_by_key(key, compress_payload(json_bytes))
+
+    def get_payload_by_key(self, key):
+        payload = self._get_memory(key)
+        if payload is None:
+            entry = self._get_disk(key)
+            if entry is None:
+                return None
+            # Promote disk hits so the next lookup is served from memory; they keep the file's
+            # time, so the promotion does not restart the TTL
+            stored_at, payload = entry
+            self._set_memory(key, payload, stored_at)
+        return payload
+
+    def set_payload_by_key(self, key, payload):
+        self._set_memory(key, payload, time.time())
+        self._set_disk(key, payload)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+        if self.disk_dir:
+            for name in os.listdir(self.disk_dir):
+                if name.endswith(".json.gz"):
+                    os.remove(os.path.join(self.disk_dir, name))
+
+    def _get_memory(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            stored_at, payload = entry
+            if time.time() - stored_at > self.ttl_seconds:
+                del self._entries[key]
+                self._size -= len(payload)
+                return None
+            self._entries.move_to_end(key)
+            return payload
+
+    def _set_memory(self, key, payload, stored_at):
+        if len(payload) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._size -= len(self._entries.pop(key)[1])
+            self._entries[key] = (stored_at, payload)
+            self._size += len(payload)
+            # Evict least recently used entries until both bounds hold
+            while len(self._entries) > self.max_entries or self._size > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+
+    def _disk_path(self, key):
+        return os.path.join(self.disk_dir, f"{key}.json.gz")
+
+    def _get_disk(self, key):
+        if not self.disk_dir:
+            return None
+        path = self._disk_path(key)
+        try:
+            stored_at = os.path.getmtime(path)
+            if time.time() - stored_at > self.ttl_seconds:
+                os.remove(path)
+                return None
+            with open(path, "rb") as f:
+                return stored_at, f.read()
+        except (OSError, EOFError):
+            return None
+
+    def _set_disk(self, key, payload):
+        if not self.disk_dir:
+            return
+        path = self._disk_path(key)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(payload)
+            # Atomic rename so concurrent readers never see a partial file
+            os.replace(tmp_path, path)
+            self._prune_disk()
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def _prune_disk(self):
+        files = []
+        total = 0
+        for name in os.listdir(self.disk_dir):
+            if not name.endswith(".json.gz"):
+                continue
+            path = os.path.join(self.disk_dir, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+        if total <= self.disk_max_bytes:
+            return
+        # Remove the oldest files first
+        for _, size, path in sorted(files):
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            if total <= self.disk_max_bytes:
+                break
+
+
+# Process-wide cache shared by every calculator and every Streamlit session
+response_cache = ResponseCache()
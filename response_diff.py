@@ -0,0 +1,154 @@
+import pandas as pd
+import streamlit as st
+
+from job_manager import job_manager
+from response_cache import decode_payload, make_cache_key
+from result_views import RenderCache
+from scenario_store import scenario_store
+
+DIFF_CACHE_MAX_ENTRIES = 64  # Bound on computed diffs kept across all sessions
+# Columns that identify a row of a response table, in order of preference
+TABLE_KEY_COLUMNS = ("YEAR", "Metric", "Product", "Parameter", "Hour")
+DELTA_COLUMN = "Δ"
+DELTA_PERCENT_COLUMN = "Δ %"
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _table_key(rows):
+    columns = {column for row in rows for column in row}
+    return next((column for column in TABLE_KEY_COLUMNS if column in columns), None)
+
+
+def _walk(a, b, path, records):
+    if isinstance(a, dict) or isinstance(b, dict):
+        a = a if isinstance(a, dict) else {}
+        b = b if isinstance(b, dict) else {}
+        for key in list(a) + [key for key in b if key not in a]:
+            _walk(a.get(key), b.get(key), path + [str(key)], records)
+    elif isinstance(a, list) and a and isinstance(a[0], dict) or isinstance(b, list) and b and isinstance(b[0], dict):
+        # Tables: rows are matched on their key column (YEAR, Metric, ...) or else on position
+        a = a if isinstance(a, list) else []
+        b = b if isinstance(b, list) else []
+        key = _table_key(a + b)
+        rows_a = {row.get(key, i) if key else i: row for i, row in enumerate(a)}
+        rows_b = {row.get(key, i) if key else i: row for i, row in enumerate(b)}
+        for row_key in list(rows_a) + [row_key for row_key in rows_b if row_key not in rows_a]:
+            row_a = rows_a.get(row_key, {})
+            row_b = rows_b.get(row_key, {})
+            for column in list(row_a) + [column for column in row_b if column not in row_a]:
+                if column != key:
+                    _add(path, row_key, column, row_a.get(column), row_b.get(column), records)
+    elif _is_number(a) or _is_number(b):
+        _add(path, None, None, a, b, records)
+    # Text and plain number arrays (chart series repeating the tables) are not compared
+
+
+def _add(path, row, column, a, b, records):
+    if not (_is_number(a) or a is None) or not (_is_number(b) or b is None):
+        return
+    delta = b - a if a is not None and b is not None else None
+    percent = delta / abs(a) * 100 if delta is not None and a else None
+    # Market cells hold {"value": ..., "unit": ...}; the trailing "value" adds nothing to the path
+    path = path[:-1] if path and path[-1] == "value" else path
+    records.append({"Section": path[0] if path else "", "Path": " / ".join(path[1:]), "Row": row,
+                    "Column": column, "A": a, "B": b, DELTA_COLUMN: delta, DELTA_PERCENT_COLUMN: percent})
+
+
+def diff_responses(data_a, data_b):
+    # One row per numeric value found in either aggregated tree
+    records = []
+    _walk(data_a.get("aggregated", {}), data_b.get("aggregated", {}), [], records)
+    diff = pd.DataFrame(records, columns=["Section", "Path", "Row", "Column", "A", "B", DELTA_COLUMN,
+                                          DELTA_PERCENT_COLUMN])
+    # Row keys mix years and metric names; as text they display and filter uniformly
+    diff["Row"] = diff["Row"].map(lambda value: "" if value is None else str(value))
+    diff["Column"] = diff["Column"].fillna("")
+    return diff
+
+
+def load_source(source):
+    # source is ("job", job id) or ("scenario", scenario id); returns response data or None
+    kind, source_id = source
+    if kind == "job":
+        job = job_manager.get(source_id)
+        if job is None or not job.future.done() or job.future.exception() is not None:
+            return None
+        return job.future.result()[0]
+    stored = scenario_store.load(source_id)
+    return None if stored is None else decode_payload(stored[2])
+
+
+def diff_sources(source_a, source_b):
+    data_a = load_source(source_a)
+    data_b = load_source(source_b)
+    if data_a is None or data_b is None:
+        return None
+    return diff_responses(data_a, data_b)
+
+
+# A finished job never changes and a stored scenario only by being saved again (which moves its
+# created_at), so a diff is computed once per pair of source versions
+diff_cache = RenderCache(DIFF_CACHE_MAX_ENTRIES)
+
+
+def _highlight_delta(value):
+    if not _is_number(value) or pd.isna(value) or value == 0:
+        return ""
+    return "background-color: #d4edda" if value > 0 else "background-color: #f8d7da"
+
+
+def render_response_diff(session_key, endpoint):
+    # Compare two results of this calculator: this session's finished jobs or saved scenarios
+    with st.expander("Compare two scenarios"):
+        sources = {}
+        request_keys = {}  # Source -> cache key of the request it answers
+        versions = {}  # Scenario source -> created_at of its stored payload
+        for job_id in reversed(st.session_state.get(session_key, [])):
+            job = job_manager.get(job_id)
+            if job is not None and job.future.done() and job.future.exception() is None:
+                sources[("job", job_id)] = f"This session: {job.label}"
+                request_keys[("job", job_id)] = make_cache_key(job.endpoint, job.request_body)
+        # Served from memory on reruns; the store queries SQLite again only after a new scenario is saved
+        for scenario in scenario_store.search(endpoint):
+            source = ("scenario", scenario["id"])
+            sources[source] = (f"Saved #{scenario['id']}: {scenario['provider']}, "
+                               f"{scenario['sector']}, size {scenario['size']}")
+            request_keys[source] = scenario["cache_key"]
+            versions[source] = scenario["created_at"]
+        # A session job and its saved scenario answer the same request
+        if len(set(request_keys.values())) < 2:
+            st.info("At least two results for different inputs are needed for a comparison.")
+            return
+
+        options = list(sources)
+        # B starts on the newest result of another request: a session job is usually also saved
+        index_b = next((i for i, source in enumerate(options[1:], start=1)
+                        if request_keys[source] != request_keys[options[0]]), 1)
+        col1, col2 = st.columns(2)
+        with col1:
+            source_a = st.selectbox("A", options, format_func=sources.get, key=f"{endpoint}_diff_a")
+        with col2:
+            source_b = st.selectbox("B", options, index=index_b, format_func=sources.get, key=f"{endpoint}_diff_b")
+        if source_a == source_b:
+            st.info("Pick two different results.")
+            return
+
+        diff = diff_cache.get_or_build((source_a, versions.get(source_a), source_b, versions.get(source_b)),
+                                       diff_sources, source_a, source_b)
+        if diff is None:
+            st.error("One of the results is no longer available.")
+            return
+
+        only_changed = st.checkbox("Only changed values", value=True, key=f"{endpoint}_diff_changed")
+        if only_changed:
+            diff = diff[diff[DELTA_COLUMN].fillna(1) != 0]
+        if diff.empty:
+            st.success("The two results are identical.")
+            return
+        for section, section_diff in diff.groupby("Section", sort=False):
+            st.write(f"##### {section.replace('_', ' ').upper()} ({len(section_diff)})")
+            st.dataframe(section_diff.drop(columns="Section").style.map(_highlight_delta, subset=[DELTA_COLUMN])
+                         .format(precision=2, na_rep=""), use_container_width=True, hide_index=True)
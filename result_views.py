@@ -0,0 +1,119 @@
+import threading
+from collections import OrderedDict
+
+import streamlit as st
+
+from response_cache import make_cache_key
+
+# Only the selected result tab is built on a rerun; set to False to fall back to st.tabs,
+# which builds (and sends to the browser) every tab's content on every rerun
+LAZY_TABS = True
+FIGURE_CACHE_MAX_ENTRIES = 256  # Bound on figures kept across all sessions and responses
+HTML_CACHE_MAX_ENTRIES = 256  # Bound on HTML fragments kept across all sessions and responses
+
+
+def render_tabs(key, tabs, *args, pending=()):
+    # tabs is a list of (label, render function); render functions are called with *args.
+    # pending lists the labels whose section of a streamed response has not arrived yet.
+    labels = [label for label, _ in tabs]
+    if not LAZY_TABS:
+        for container, (label, render) in zip(st.tabs(labels), tabs):
+            with container:
+                _render_tab(label, render, pending, args)
+        return
+
+    selected = st.radio("Section", labels, horizontal=True, key=key, label_visibility="collapsed")
+    _render_tab(selected, dict(tabs)[selected], pending, args)
+
+
+def _render_tab(label, render, pending, args):
+    if label in pending:
+        st.info(f"{label} will appear here as soon as this part of the response arrives.")
+    else:
+        render(*args)
+
+
+def pending_tabs(tab_sections, data):
+    # Labels of result tabs (label -> aggregated section) whose section has not been streamed in yet
+    aggregated = data.get("aggregated", {})
+    return [label for label, section in tab_sections.items() if section not in aggregated]
+
+
+class RenderCache:
+    # Process-wide LRU of built render objects (Plotly figures, HTML fragments) keyed by
+    # (response hash, id); they are only read after they are built, so sessions showing
+    # the same response share them
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_build(self, key, build, *args):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+                return value
+        # Built outside the lock; two sessions racing on the same key just build it twice
+        value = build(*args)
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+figure_cache = RenderCache(FIGURE_CACHE_MAX_ENTRIES)
+html_cache = RenderCache(HTML_CACHE_MAX_ENTRIES)
+
+
+class ResponseMemo:
+    # Render objects of one response, looked up in the shared caches
+    def __init__(self, response_key):
+        self.response_key = response_key
+
+    def figure(self, chart_id, build, *args):
+        return figure_cache.get_or_build((self.response_key, chart_id), build, *args)
+
+    def html(self, fragment_id, build, *args):
+        return html_cache.get_or_build((self.response_key, fragment_id), build, *args)
+
+
+def response_memo(session_key, data):
+    # Hashing a large response is not free, so the hash is kept while the same response object is shown
+    slot = st.session_state.get(session_key)
+    if slot is None or slot[0] is not data:
+        slot = (data, make_cache_key(session_key, data))
+        st.session_state[session_key] = slot
+    return ResponseMemo(slot[1])
+
+
+# Multi-request runs (batch sweeps, comparisons, sensitivity) are drawn outside the job list, so the
+# last one is kept per calculator and redrawn on reruns instead of disappearing. Form widgets return
+# their submitted values, so the inputs of the last run stay current until the form is submitted again.
+LAST_RUN_NOTE = "Last run with these inputs, shown from memory. Submit changed inputs to recalculate."
+
+
+def last_run(session_key, inputs):
+    # Results of the last run when it was made with these inputs, else None
+    slot = st.session_state.get(session_key)
+    return slot[1] if slot is not None and slot[0] == inputs else None
+
+
+def last_run_inputs(session_key):
+    slot = st.session_state.get(session_key)
+    return None if slot is None else slot[0]
+
+
+def remember_run(session_key, inputs, results):
+    st.session_state[session_key] = (inputs, results)
+
+
+def run_memo(session_key, inputs):
+    # Figures of a finished run, shared by its redraws
+    return ResponseMemo(make_cache_key(session_key, inputs))
@@ -0,0 +1,167 @@
+import gzip
+import json
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+
+from dcf import final_npv
+from response_cache import PAYLOAD_COMPRESSLEVEL, make_cache_key
+
+# Scenario history: every request body / response pair the backend returned, kept across
+# sessions and restarts in a local SQLite file. Set P2X_SCENARIO_DB to "" to disable it.
+# Saves are written by one background thread, off the request path; searches are answered from
+# memory until this process saves the next scenario.
+SCENARIO_DB_PATH = os.environ.get("P2X_SCENARIO_DB", os.path.join(os.path.expanduser("~"), ".p2x", "scenarios.sqlite3"))
+SCENARIO_RETENTION_SECONDS = 90 * 24 * 60 * 60  # Scenarios older than this are deleted
+SCENARIO_MAX_ROWS = 5000  # Only the newest scenarios are kept above this
+SCENARIO_SEARCH_LIMIT = 200  # Rows returned by one search
+SCENARIO_SEARCH_CACHE_SIZE = 64  # Distinct searches answered from memory between two saves
+
+# Sizing input indexed per calculator, so scenarios can be filtered by project size
+SIZE_PARAMETERS = {
+    "beks": "Q_max",
+    "p2h": "Q_max_HP",
+    "p2g": "Q_max",
+    "dsr": "Q_avg",
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS scenarios (
+    id INTEGER PRIMARY KEY,
+    cache_key TEXT NOT NULL UNIQUE,
+    calculator TEXT NOT NULL,
+    provider TEXT,
+    sector TEXT,
+    size REAL,
+    npv REAL,
+    created_at REAL NOT NULL,
+    request_body BLOB NOT NULL,
+    payload BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS scenarios_lookup ON scenarios (calculator, provider, sector, size);
+CREATE INDEX IF NOT EXISTS scenarios_recent ON scenarios (calculator, created_at);
+CREATE INDEX IF NOT EXISTS scenarios_created_at ON scenarios (created_at);
+"""
+
+
+class ScenarioStore:
+    def __init__(self, path=SCENARIO_DB_PATH, retention_seconds=SCENARIO_RETENTION_SECONDS,
+                 max_rows=SCENARIO_MAX_ROWS):
+        self.path = path
+        self.retention_seconds = retention_seconds
+        self.max_rows = max_rows
+        self._lock = threading.Lock()
+        self._ready = False
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="scenario-store")
+        self._searches = {}  # search arguments -> rows, cleared on every save
+
+    @property
+    def enabled(self):
+        return bool(self.path)
+
+    def _connect(self):
+        if not self._ready and os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        connection = sqlite3.connect(self.path, timeout=10)
+        if not self._ready:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.executescript(SCHEMA)
+            self._ready = True
+        return connection
+
+    def save(self, endpoint, request_body, payload, data):
+        # payload is the gzip-compressed response as cached; the request body is compressed the same way.
+        # A storage failure never fails the calculation, the scenario is just not kept.
+        if not self.enabled:
+            return
+        body_bytes = gzip.compress(json.dumps(request_body, ensure_ascii=False).encode("utf-8"),
+                                   compresslevel=PAYLOAD_COMPRESSLEVEL)
+        size_key = SIZE_PARAMETERS.get(endpoint)
+        size = request_body.get(size_key) if size_key else None
+        row = (make_cache_key(endpoint, request_body), endpoint, request_body.get("provider"),
+               request_body.get("Sector"), size if isinstance(size, (int, float)) else None, final_npv(data),
+               time.time(), body_bytes, payload)
+        self._writer.submit(self._write, row)
+
+    def _write(self, row):
+        try:
+            with self._lock, closing(self._connect()) as connection, connection:
+                connection.execute(
+                    "INSERT INTO scenarios (cache_key, calculator, provider, sector, size, npv, created_at, "
+                    "request_body, payload) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                    "ON CONFLICT(cache_key) DO UPDATE SET created_at = excluded.created_at, "
+                    "npv = excluded.npv, payload = excluded.payload", row)
+                self._prune(connection)
+                self._searches.clear()
+        except (sqlite3.Error, OSError):
+            pass
+
+    def flush(self):
+        # Waits for the saves submitted so far to be written
+        self._writer.submit(lambda: None).result()
+
+    def _prune(self, connection):
+        connection.execute("DELETE FROM scenarios WHERE created_at < ?", (time.time() - self.retention_seconds,))
+        connection.execute("DELETE FROM scenarios WHERE id IN (SELECT id FROM scenarios ORDER BY created_at DESC "
+                           "LIMIT -1 OFFSET ?)", (self.max_rows,))
+
+    def search(self, calculator, provider=None, sector=None, size_min=None, size_max=None,
+               limit=SCENARIO_SEARCH_LIMIT):
+        # Newest first; only the indexed columns are read, not the payloads
+        if not self.enabled:
+            return []
+        clauses = ["calculator = ?"]
+        params = [calculator]
+        for clause, value in (("provider = ?", provider), ("sector = ?", sector), ("size >= ?", size_min),
+                              ("size <= ?", size_max)):
+            if value is not None:
+                clauses.append(clause)
+                params.append(value)
+        query = (f"SELECT id, created_at, provider, sector, size, npv, cache_key FROM scenarios "
+                 f"WHERE {' AND '.join(clauses)} ORDER BY created_at DESC LIMIT ?")
+        search_key = (query, tuple(params), limit)
+        with self._lock:
+            rows = self._searches.get(search_key)
+            if rows is None:
+                try:
+                    with closing(self._connect()) as connection, connection:
+                        rows = connection.execute(query, params + [limit]).fetchall()
+                except (sqlite3.Error, OSError):
+                    return []
+                if len(self._searches) >= SCENARIO_SEARCH_CACHE_SIZE:
+                    self._searches.clear()
+                self._searches[search_key] = rows
+        # New dicts on every call, callers format them in place
+        return [dict(zip(("id", "created_at", "provider", "sector", "size", "npv", "cache_key"), row)) for row in rows]
+
+    def latest_payload(self, cache_key):
+        # (payload, saved at) of the stored response for this request, regardless of its age, or None
+        if not self.enabled:
+            return None
+        try:
+            with self._lock, closing(self._connect()) as connection, connection:
+                row = connection.execute("SELECT payload, created_at FROM scenarios WHERE cache_key = ?",
+                                         (cache_key,)).fetchone()
+        except (sqlite3.Error, OSError):
+            return None
+        return None if row is None else (row[0], row[1])
+
+    def load(self, scenario_id):
+        # Returns (calculator, request body, payload) or None
+        try:
+            with self._lock, closing(self._connect()) as connection, connection:
+                row = connection.execute("SELECT calculator, request_body, payload FROM scenarios WHERE id = ?",
+                                         (scenario_id,)).fetchone()
+        except (sqlite3.Error, OSError):
+            return None
+        if row is None:
+            return None
+        calculator, body_bytes, payload = row
+        return calculator, json.loads(gzip.decompress(body_bytes)), payload
+
+
+# Process-wide store shared by every calculator and every Streamlit session
+scenario_store = ScenarioStore()
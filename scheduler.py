@@ -0,0 +1,122 @@
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+# Admission control for backend calls: every request that actually goes to the backend (not cache
+# hits or coalesced calls) waits here for a token and a free slot, so a batch sweep or a full room
+# of users stays under the APIM quota. 0 disables the respective limit.
+RATE_LIMIT = float(os.environ.get("P2X_RATE_LIMIT", "4"))  # Requests per second, sustained
+RATE_BURST = int(os.environ.get("P2X_RATE_BURST", "8"))  # Requests that may start back to back
+MAX_CONCURRENCY = int(os.environ.get("P2X_MAX_CONCURRENCY", "8"))  # Backend calls in flight at once
+
+# Priority classes, served strictly in this order; within a class sessions take turns
+PRIORITY_INTERACTIVE = 0  # A submit of the form
+PRIORITY_BATCH = 1  # Batch sweeps, comparisons and sensitivity runs
+PRIORITY_BACKGROUND = 2  # Cache warm-up
+PRIORITIES = (PRIORITY_INTERACTIVE, PRIORITY_BATCH, PRIORITY_BACKGROUND)
+
+
+def current_session_id():
+    # Streamlit session of the calling script thread; None in worker and background threads
+    ctx = get_script_run_ctx(suppress_warning=True)
+    return None if ctx is None else ctx.session_id
+
+
+class Ticket:
+    def __init__(self, priority, session_id, tag):
+        self.priority = priority
+        self.session_id = session_id
+        self.tag = tag  # Lets the UI find the ticket of its job
+
+
+class AdmissionScheduler:
+    def __init__(self, rate=RATE_LIMIT, burst=RATE_BURST, max_concurrency=MAX_CONCURRENCY):
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self.max_concurrency = max_concurrency
+        self._tokens = float(self.burst)
+        self._refilled_at = time.monotonic()
+        self._active = 0
+        # priority -> session id -> waiting tickets; sessions are served round-robin in key order
+        self._queues = {priority: OrderedDict() for priority in PRIORITIES}
+        self._condition = threading.Condition()
+
+    def _refill(self):
+        now = time.monotonic()
+        if self.rate > 0:
+            self._tokens = min(self.burst, self._tokens + (now - self._refilled_at) * self.rate)
+        self._refilled_at = now
+
+    def _order(self):
+        # Waiting tickets in the order they will be admitted, as long as nothing new arrives
+        for priority in PRIORITIES:
+            queues = [list(tickets) for tickets in self._queues[priority].values()]
+            for turn in range(max((len(tickets) for tickets in queues), default=0)):
+                for tickets in queues:
+                    if turn < len(tickets):
+                        yield tickets[turn]
+
+    def _admit_next(self):
+        for priority in PRIORITIES:
+            sessions = self._queues[priority]
+            if sessions:
+                session_id, tickets = next(iter(sessions.items()))
+                tickets.popleft()
+                # The session goes to the back of its class so other sessions get the next turns
+                del sessions[session_id]
+                if tickets:
+                    sessions[session_id] = tickets
+                return
+
+    def acquire(self, priority=PRIORITY_INTERACTIVE, session_id=None, tag=None):
+        ticket = Ticket(priority, session_id, tag)
+        with self._condition:
+            self._queues[priority].setdefault(session_id, deque()).append(ticket)
+            while True:
+                self._refill()
+                has_slot = self.max_concurrency <= 0 or self._active < self.max_concurrency
+                has_token = self.rate <= 0 or self._tokens >= 1
+                if next(self._order()) is ticket and has_slot and has_token:
+                    self._admit_next()
+                    self._active += 1
+                    if self.rate > 0:
+                        self._tokens -= 1
+                    # The next ticket in line may be admissible right away
+                    self._condition.notify_all()
+                    return ticket
+                # Without a token, wake up when the next one is due; otherwise when a slot frees up
+                timeout = None if has_token else (1 - self._tokens) / self.rate
+                self._condition.wait(timeout)
+
+    def release(self):
+        with self._condition:
+            self._active -= 1
+            self._condition.notify_all()
+
+    @contextmanager
+    def admit(self, priority=PRIORITY_INTERACTIVE, session_id=None, tag=None):
+        self.acquire(priority, session_id, tag)
+        try:
+            yield
+        finally:
+            self.release()
+
+    def position(self, tag):
+        # 1-based place in the admission order of the ticket with this tag, None when not waiting
+        with self._condition:
+            for place, ticket in enumerate(self._order(), start=1):
+                if ticket.tag == tag:
+                    return place
+        return None
+
+    def waiting(self):
+        with self._condition:
+            return sum(len(tickets) for sessions in self._queues.values() for tickets in sessions.values())
+
+
+# Process-wide scheduler in front of every backend client
+scheduler = AdmissionScheduler()
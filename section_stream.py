@@ -0,0 +1,67 @@
+import json
+
+# Streamed responses: the backend sends one NDJSON line per response section, so the summary can be
+# shown while the heavier sections are still on their way. A line is {"path": [...], "value": ...}
+# and sets one key of the response, e.g. ["aggregated", "summary"]. Clients opt in with the Accept
+# header; a backend that does not stream answers with the usual single JSON document.
+STREAM_CONTENT_TYPE = "application/x-ndjson"
+# Aggregated sections in the order they are sent: the summary first, the large market tables last.
+# Sections not listed follow in response order, before markets.
+SECTION_ORDER = ("summary", "comparison", "yearly", "total_finance", "economic_results")
+LAST_SECTIONS = ("markets",)
+
+
+class TruncatedStreamError(ValueError):
+    # The stream ended inside a line: the connection was cut while a section was being sent
+    pass
+
+
+def response_sections(data):
+    # (path, value) pairs covering the whole response, in streaming order
+    aggregated = data.get("aggregated")
+    if not isinstance(aggregated, dict):
+        return [([key], value) for key, value in data.items()]
+    names = [name for name in SECTION_ORDER if name in aggregated]
+    names += [name for name in aggregated if name not in names and name not in LAST_SECTIONS]
+    names += [name for name in LAST_SECTIONS if name in aggregated]
+    sections = [(["aggregated", name], aggregated[name]) for name in names]
+    return sections + [([key], value) for key, value in data.items() if key != "aggregated"]
+
+
+def encode_section(path, value):
+    return json.dumps({"path": path, "value": value}, ensure_ascii=False).encode("utf-8") + b"\n"
+
+
+def read_sections(chunks):
+    # (path, value) pairs from an iterable of byte chunks, as soon as each line is complete
+    partial = []  # Pieces of the line being received; a market section spans many chunks
+    for chunk in chunks:
+        *lines, rest = chunk.split(b"\n")
+        if lines:
+            lines[0] = b"".join(partial) + lines[0]
+            partial = []
+        for line in lines:
+            if line.strip():
+                record = json.loads(line)
+                yield record["path"], record["value"]
+        if rest:
+            partial.append(rest)
+    line = b"".join(partial)
+    if line.strip():
+        # Complete JSON without the final newline is accepted; anything else was cut off
+        try:
+            record = json.loads(line)
+        except ValueError:
+            raise TruncatedStreamError(f"Stream ended inside a section after {len(line)} bytes") from None
+        yield record["path"], record["value"]
+
+
+def assemble_sections(sections):
+    # The response built from (path, value) pairs; also works on the sections received so far
+    data = {}
+    for path, value in sections:
+        target = data
+        for key in path[:-1]:
+            target = target.setdefault(key, {})
+        target[path[-1]] = value
+    return data
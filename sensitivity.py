@@ -0,0 +1,205 @@
+import time
+
+import pandas as pd
+import streamlit as st
+
+from backend_client import get_backend_client
+from batch_runner import apply_overrides, run_batch
+from dcf import final_npv
+from response_cache import make_cache_key, response_cache
+from result_views import LAST_RUN_NOTE, last_run, remember_run, run_memo
+
+# Economic inputs that can be perturbed, per calculator endpoint: (request body key, label with the
+# same unit as the calculator form)
+SENSITIVITY_PARAMETERS = {
+    "beks": [
+        ("CAPEX_P", "CAPEX_P (tūkst. EUR/MW)"),
+        ("CAPEX_C", "CAPEX_C (tūkst. EUR/MWh)"),
+        ("OPEX_P", "OPEX_P (tūkst. EUR/MW/m)"),
+        ("OPEX_C", "OPEX_C (tūkst. EUR/MWh)"),
+        ("discount_rate", "discount_rate (%)"),
+        ("number_of_years", "number_of_years"),
+    ],
+    "p2h": [
+        ("CAPEX_HP", "CAPEX_HP (tūkst. EUR/MW)"),
+        ("CAPEX_HS", "CAPEX_HS (tūkst. EUR/m³)"),
+        ("OPEX_HP", "OPEX_HP (tūkst. EUR/MW/m)"),
+        ("OPEX_HS", "OPEX_HS (tūkst. EUR/m³/m)"),
+        ("P_FUEL", "P_FUEL (EUR/nm³)"),
+        ("discount_rate", "discount_rate (%)"),
+        ("number_of_years", "number_of_years"),
+    ],
+    "p2g": [
+        ("CAPEX", "CAPEX (tūkst. EUR/MW)"),
+        ("OPEX", "OPEX (tūkst. EUR/MW/m)"),
+        ("P_H2", "P_H2 (EUR/kg)"),
+        ("discount_rate", "discount_rate (%)"),
+        ("number_of_years", "number_of_years"),
+    ],
+    "dsr": [
+        ("CAPEX", "CAPEX (tūkst. EUR/MW)"),
+        ("OPEX", "OPEX (tūkst. EUR/MW/year)"),
+        ("discount_rate", "discount_rate (%)"),
+        ("number_of_years", "number_of_years"),
+    ],
+}
+DEFAULT_SENSITIVITY_PERCENT = 10.0
+NPV_COLUMN = "NPV (tūkst. EUR)"
+
+
+def perturb(value, percent, direction):
+    # Integer inputs (number_of_years) stay integers and never drop below 1
+    changed = value * (1 + direction * percent / 100)
+    if isinstance(value, int) and not isinstance(value, bool):
+        return max(1, int(round(changed)))
+    return round(changed, 10)
+
+
+def plan_sensitivity(endpoint, base_request_body, parameters, percent):
+    # Returns (cases, requests): cases are (parameter, direction, value, cache key) with the base
+    # case first (parameter None); requests maps each distinct cache key to its request body, so
+    # perturbations that round back to the same request are only calculated once
+    cases = [(None, 0, None, make_cache_key(endpoint, base_request_body))]
+    requests_by_key = {cases[0][3]: base_request_body}
+    for parameter in parameters:
+        for direction in (-1, 1):
+            value = perturb(base_request_body[parameter], percent, direction)
+            request_body = apply_overrides(base_request_body, {parameter: value})
+            key = make_cache_key(endpoint, request_body)
+            cases.append((parameter, direction, value, key))
+            requests_by_key.setdefault(key, request_body)
+    return cases, requests_by_key
+
+
+def run_sensitivity(client, endpoint, requests_by_key):
+    # Yields (cache key, data, error, from_cache); cached responses first, then the misses as one batch
+    misses = []
+    for key, request_body in requests_by_key.items():
+        data = response_cache.get_by_key(key)
+        if data is None:
+            misses.append(key)
+        else:
+            yield key, data, None, True
+    request_bodies = [requests_by_key[key] for key in misses]
+    for index, data, error in run_batch(client, endpoint, request_bodies):
+        yield misses[index], data, error, False
+
+
+def sensitivity_table(cases, npv_by_key, labels):
+    base_npv = npv_by_key.get(cases[0][3])
+    rows = {}
+    for parameter, direction, value, key in cases[1:]:
+        row = rows.setdefault(parameter, {"Parameter": labels.get(parameter, parameter)})
+        side = "Low" if direction < 0 else "High"
+        row[f"{side} value"] = value
+        npv = npv_by_key.get(key)
+        row[f"{side} {NPV_COLUMN}"] = npv
+        row[f"{side} ΔNPV"] = npv - base_npv if npv is not None and base_npv is not None else None
+    table = pd.DataFrame(list(rows.values()))
+    if {"Low ΔNPV", "High ΔNPV"} <= set(table.columns):
+        table["Swing"] = (table["High ΔNPV"] - table["Low ΔNPV"]).abs()
+        table = table.sort_values("Swing", ascending=False, na_position="last")
+    return base_npv, table
+
+
+def render_sensitivity_inputs(endpoint):
+    # Called inside the calculator form; returns (parameters, percent)
+    registry = SENSITIVITY_PARAMETERS[endpoint]
+    labels = dict(registry)
+    st.subheader("Sensitivity analysis")
+    parameters = st.multiselect("Parameters", [key for key, _ in registry], default=[key for key, _ in registry],
+                                format_func=lambda key: labels[key], key=f"{endpoint}_sensitivity_parameters")
+    percent = st.number_input("Perturbation (±%)", min_value=0.1, max_value=100.0,
+                              value=DEFAULT_SENSITIVITY_PERCENT, step=1.0, key=f"{endpoint}_sensitivity_percent")
+    return parameters, percent
+
+
+def render_sensitivity(BE_URL, LOCAL_MODE, P2X_APIM_SECRET, endpoint, base_request_body, parameters, percent):
+    if not parameters:
+        st.warning("No sensitivity parameters selected.")
+        return
+    labels = dict(SENSITIVITY_PARAMETERS[endpoint])
+    cases, requests_by_key = plan_sensitivity(endpoint, base_request_body, parameters, percent)
+
+    run_key = f"{endpoint}_sensitivity_run"
+    inputs = (endpoint, base_request_body, parameters, percent)
+    memo = run_memo(run_key, inputs)
+    st.header("Sensitivity Analysis")
+    stored = last_run(run_key, inputs)
+    if stored is not None:
+        st.caption(LAST_RUN_NOTE)
+        npv_by_key, errors = stored
+        draw_sensitivity(endpoint, cases, npv_by_key, errors, labels, percent,
+                         [st.empty() for _ in range(3)], len(requests_by_key), memo)
+        return
+
+    total = len(requests_by_key)
+    progress = st.progress(0.0, text=f"0/{total} scenarios finished")
+    placeholders = [st.empty() for _ in range(3)]
+
+    client = get_backend_client(BE_URL, LOCAL_MODE, P2X_APIM_SECRET)
+    npv_by_key = {}
+    errors = []
+    cached = 0
+    last_draw = 0.0
+    for done, (key, data, error, from_cache) in enumerate(run_sensitivity(client, endpoint, requests_by_key),
+                                                         start=1):
+        if error is None:
+            npv_by_key[key] = final_npv(data)
+            if from_cache:
+                cached += 1
+        else:
+            errors.append(str(error))
+
+        progress.progress(done / total, text=f"{done}/{total} scenarios finished ({cached} from cache)")
+        # Redraw a few times per second at most; always draw the final state
+        if done == total:
+            draw_sensitivity(endpoint, cases, npv_by_key, errors, labels, percent, placeholders, done, memo)
+        elif time.monotonic() - last_draw > 0.5:
+            draw_sensitivity(endpoint, cases, npv_by_key, [], labels, percent, placeholders, done)
+            last_draw = time.monotonic()
+    remember_run(run_key, inputs, (npv_by_key, errors))
+
+
+def draw_sensitivity(endpoint, cases, npv_by_key, errors, labels, percent, placeholders, draw_id, memo=None):
+    # placeholders: status, table and tornado chart; memo is given for the final state only
+    status_placeholder, table_placeholder, chart_placeholder = placeholders
+    base_npv, table = sensitivity_table(cases, npv_by_key, labels)
+    table_placeholder.dataframe(table, use_container_width=True, hide_index=True)
+    if base_npv is not None:
+        fig_tornado = (memo.figure("tornado", build_tornado_figure, table, base_npv, percent) if memo
+                       else build_tornado_figure(table, base_npv, percent))
+        chart_placeholder.plotly_chart(fig_tornado, use_container_width=True, key=f"{endpoint}_tornado_{draw_id}")
+
+    if errors:
+        status_placeholder.error(f"{len(errors)} scenario(s) failed: {errors[0]}")
+    elif memo is not None and base_npv is None:
+        status_placeholder.warning("The base scenario returned no NPV, so no deltas can be shown.")
+
+
+def build_tornado_figure(table, base_npv, percent):
+    import plotly.graph_objects as go
+    # Widest swing at the top: plotly draws horizontal bar categories bottom-up
+    table = table.iloc[::-1]
+    fig_tornado = go.Figure()
+    for side, color in (("Low", "#e74c3c"), ("High", "#2ecc71")):
+        column = f"{side} ΔNPV"
+        if column not in table.columns:
+            continue
+        fig_tornado.add_trace(go.Bar(
+            name=f"-{percent:g}%" if side == "Low" else f"+{percent:g}%",
+            y=table["Parameter"],
+            x=table[column],
+            orientation='h',
+            marker_color=color,
+            customdata=table[f"{side} value"],
+            hovertemplate='value %{customdata}<br>ΔNPV %{x:,.2f} tūkst. EUR<extra></extra>'
+        ))
+    fig_tornado.update_layout(
+        title=f"NPV SENSITIVITY (base NPV {base_npv:,.2f} tūkst. EUR)",
+        barmode='overlay',
+        xaxis_title="ΔNPV (tūkst. EUR)",
+        xaxis=dict(zeroline=True, zerolinecolor='black', zerolinewidth=2),
+        showlegend=True
+    )
+    return fig_tornado
@@ -1,31 +1,65 @@
+import importlib
+import os
+
 import streamlit as st
 
 # Configuration for local development
 LOCAL_MODE = False  # Set to False for production/Azure deployment
 P2X_APIM_SECRET = "test"  # APIM secret for local backend authentication
+# Local backend URL; `python stub_backend.py` serves a stand-in backend here for offline load testing
+LOCAL_BE_URL = os.environ.get("P2X_LOCAL_BE_URL", "http://0.0.0.0:80/")
+# Pre-fetch the default scenarios (warmup.WARMUP_SCENARIOS) in the background when the server starts
+CACHE_WARMUP = os.environ.get("P2X_CACHE_WARMUP", "0") == "1"
+# Instrumentation settings (debug panel, /metrics port, log lines) are in metrics.py
 
+# Calculator modules, imported only once their calculator is first selected (they pull in pandas
+# and their result views). Plotly itself is imported by the figure builders on first chart use.
+CALCULATOR_MODULES = {
+    "BEKS": ("beks_calculator", "render_beks_calculator"),
+    "P2H": ("p2h_calculator", "render_p2h_calculator"),
+    "P2G": ("p2g_calculator", "render_p2g_calculator"),
+    "DSR": ("dsr_calculator", "render_dsr_calculator"),
+}
 
-# Import calculator modules
-from beks_calculator import render_beks_calculator
-from p2h_calculator import render_p2h_calculator
-from p2g_calculator import render_p2g_calculator
-from dsr_calculator import render_dsr_calculator
+from backend_client import get_backend_client
+from metrics import METRICS_PORT, metrics, render_debug_panel, start_metrics_server
 
 # Automatically set BE_URL based on LOCAL_MODE
-BE_URL = "http://0.0.0.0:80/" if LOCAL_MODE else "https://p2xapim.azure-api.net/P2X/"
+BE_URL = LOCAL_BE_URL if LOCAL_MODE else "https://p2xapim.azure-api.net/P2X/"
+
+
+@st.cache_resource
+def start_cache_warmup(BE_URL, LOCAL_MODE, P2X_APIM_SECRET):
+    # Cached as a resource so the warm-up runs once per server process, not once per session
+    from warmup import start_warmup
+    return start_warmup(get_backend_client(BE_URL, LOCAL_MODE, P2X_APIM_SECRET))
+
+
+@st.cache_resource
+def start_cache_metrics_server(port):
+    # One Prometheus /metrics endpoint per server process
+    return start_metrics_server(port)
+
+
+def load_calculator(calculator_type):
+    module_name, function_name = CALCULATOR_MODULES[calculator_type]
+    return getattr(importlib.import_module(module_name), function_name)
+
 
 # Set page title and description
 st.set_page_config(page_title="Energy Optimization", layout="wide")
 st.title("Energy Optimization Tools")
 
+if CACHE_WARMUP:
+    start_cache_warmup(BE_URL, LOCAL_MODE, P2X_APIM_SECRET)
+if METRICS_PORT:
+    start_cache_metrics_server(METRICS_PORT)
+
 # Create a selector for the calculator type
-calculator_type = st.radio("Select Calculator", ["BEKS", "P2H", "P2G", "DSR"], horizontal=True)
-
-if calculator_type == "BEKS":
-    render_beks_calculator(BE_URL, LOCAL_MODE, P2X_APIM_SECRET)
-elif calculator_type == "P2H":
-    render_p2h_calculator(BE_URL, LOCAL_MODE, P2X_APIM_SECRET)
-elif calculator_type == "P2G":
-    render_p2g_calculator(BE_URL, LOCAL_MODE, P2X_APIM_SECRET)
-elif calculator_type == "DSR":
-    render_dsr_calculator(BE_URL, LOCAL_MODE, P2X_APIM_SECRET)
+calculator_type = st.radio("Select Calculator", list(CALCULATOR_MODULES), horizontal=True)
+
+with metrics.timer("page", calculator_type.lower()):
+    render_calculator = load_calculator(calculator_type)
+    render_calculator(BE_URL, LOCAL_MODE, P2X_APIM_SECRET)
+
+render_debug_panel()
@@ -0,0 +1,565 @@
+import argparse
+import gzip
+import itertools
+import json
+import math
+import os
+import random
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+import requests
+
+from dcf import FINANCE_PARAMETERS
+from response_cache import make_cache_key
+from section_stream import STREAM_CONTENT_TYPE, encode_section, response_sections
+from timeouts import CONNECT_TIMEOUT, DEFAULT_READ_TIMEOUT, READ_TIMEOUTS
+
+# Local stand-in for the calculator backend. Serves /beks, /p2h, /p2g and /dsr with the
+# same form-encoded "parameters" contract and the aggregated.* schema the renderers read.
+#
+#   python stub_backend.py                              synthetic responses on http://0.0.0.0:80/
+#   python stub_backend.py --latency 5 --jitter 2       simulate slow optimisations
+#   python stub_backend.py --pad-kb 512                 inflate every response to ~512 KB
+#   python stub_backend.py --no-gzip                    send uncompressed bodies even if gzip is accepted
+#   python stub_backend.py --no-stream                  one JSON document even if NDJSON sections are accepted
+#   python stub_backend.py --mode record --upstream https://p2xapim.azure-api.net/P2X/
+#   python stub_backend.py --mode replay                serve recorded responses
+#
+# Set LOCAL_MODE = True in streamlit_app.py to point the app at the stub.
+
+ENDPOINTS = ("beks", "p2h", "p2g", "dsr")
+DEFAULT_RECORDINGS_DIR = "recordings"
+
+PRODUCTS = ["FCR", "aFRRu", "aFRRd", "mFRRu", "mFRRd"]
+DSR_PRODUCTS = ["aFRRu", "aFRRd", "mFRRu", "mFRRd"]
+
+GZIP_MIN_BYTES = 1024  # Smaller bodies are sent uncompressed
+
+
+def _rng(endpoint, request_body):
+    # Deterministic per scenario so repeated requests give identical responses. Like the real
+    # optimisation, the simulated dispatch does not depend on the finance inputs.
+    dispatch_inputs = {key: value for key, value in request_body.items() if key not in FINANCE_PARAMETERS}
+    return random.Random(int(make_cache_key(endpoint, dispatch_inputs)[:16], 16))
+
+
+def _value(value, unit):
+    return {"value": round(value, 2), "unit": unit}
+
+
+def _directional(header, upward, downward, unit):
+    return {"header": header, "upward": _value(upward, unit), "downward": _value(downward, unit)}
+
+
+def _economics(capex, opex, revenue, discount_rate, number_of_years):
+    rate = discount_rate / 100
+    cash_flows = [-capex] + [revenue - opex] * number_of_years
+    dcfs = [cf / (1 + rate) ** year for year, cf in enumerate(cash_flows)]
+    npv = list(itertools.accumulate(dcfs))
+    break_even_point = next((year for year, value in enumerate(npv) if year > 0 and value >= 0), None)
+    yearly_table = [{
+        "YEAR": year,
+        "CAPEX (tūkst. EUR)": round(capex if year == 0 else 0.0, 2),
+        "OPEX (tūkst. EUR)": round(0.0 if year == 0 else opex, 2),
+        "REVENUE (tūkst. EUR)": round(0.0 if year == 0 else revenue, 2),
+        "CF (tūkst. EUR)": round(cash_flows[year], 2),
+        "DCF (tūkst. EUR)": round(dcfs[year], 2),
+        "NPV (tūkst. EUR)": round(npv[year], 2)
+    } for year in range(number_of_years + 1)]
+    npv_chart_data = {
+        "years": list(range(number_of_years + 1)),
+        "dcfs": [round(v, 2) for v in dcfs],
+        "npv": [round(v, 2) for v in npv],
+        "break_even_point": break_even_point
+    }
+    return yearly_table, npv_chart_data
+
+
+def _summary(revenue_by_product, costs, capex, opex, number_of_years, npv_chart_data, utilisation):
+    revenue = sum(revenue_by_product.values())
+    annual_profit = revenue + sum(costs.values()) - opex
+    return {
+        "yearly_summary_table": [
+            {"Metric": "Gross revenue", "Value": round(revenue, 2)},
+            {"Metric": "Variable costs", "Value": round(sum(costs.values()), 2)},
+            {"Metric": "OPEX", "Value": round(-opex, 2)},
+            {"Metric": "Annual profit", "Value": round(annual_profit, 2)}
+        ],
+        "project_summary_table": [
+            {"Metric": "CAPEX", "Value": round(-capex, 2)},
+            {"Metric": "Total profit", "Value": round(annual_profit * number_of_years, 2)},
+            {"Metric": "NPV", "Value": npv_chart_data["npv"][-1]}
+        ],
+        "npv_chart_data": npv_chart_data,
+        "revenue_cost_chart_data": {
+            "products": list(revenue_by_product) + list(costs),
+            "values": [round(v, 2) for v in list(revenue_by_product.values()) + list(costs.values())]
+        },
+        "utilisation_chart_data": {
+            "products": list(utilisation),
+            "values": [round(v, 2) for v in utilisation.values()]
+        }
+    }
+
+
+def _balancing_markets(rng, power, products, energy_unit="MWh"):
+    capacity = {}
+    if "FCR" in products:
+        capacity["FCR"] = {
+            "header": "FCR", "description": "FREQUENCY CONTAINMENT RESERVE",
+            "volume_of_procured_reserves": {"header": "VOLUME OF PROCURED RESERVES", "value": round(power * 0.5, 2)},
+            "utilisation": {"header": "UTILISATION (% OF TIME)", "value": round(rng.uniform(20, 90), 2)},
+            "potential_revenue": {"header": "POTENTIAL REVENUE", "value": round(power * rng.uniform(20, 60), 2),
+                                  "unit": "tūkst. EUR"},
+            "bids_selected": {"header": "% OF BIDS SELECTED", "value": round(rng.uniform(30, 95), 2)}
+        }
+    energy = {}
+    for service, description in (("aFRR", "AUTOMATIC FREQUENCY RESTORATION RESERVE"),
+                                 ("mFRR", "MANUAL FREQUENCY RESTORATION RESERVE")):
+        capacity[service] = {
+            "header": service, "description": description,
+            "volume_of_procured_reserves": _directional("VOLUME OF PROCURED RESERVES", power, power, "MW"),
+            "utilisation": _directional("UTILISATION (% OF TIME)", rng.uniform(10, 80), rng.uniform(10, 80), "%"),
+            "potential_revenue": _directional("POTENTIAL REVENUE", power * rng.uniform(10, 50),
+                                              power * rng.uniform(10, 50), "tūkst. EUR"),
+            "bids_selected": _directional("% OF BIDS SELECTED", rng.uniform(20, 90), rng.uniform(20, 90), "%")
+        }
+        energy[service] = {
+            "header": service, "description": description,
+            "volume_of_procured_energy": _directional("VOLUME OF PROCURED ENERGY", power * rng.uniform(50, 400),
+                                                      power * rng.uniform(50, 400), energy_unit),
+            "utilisation": _directional("UTILISATION (% OF TIME)", rng.uniform(5, 40), rng.uniform(5, 40), "%"),
+            "potential_revenue": _directional("POTENTIAL REVENUE", power * rng.uniform(5, 30),
+                                              power * rng.uniform(5, 30), "tūkst. EUR"),
+            "bids_selected": _directional("% OF BIDS SELECTED", rng.uniform(10, 70), rng.uniform(10, 70), "%")
+        }
+    return {"BALANSAVIMO_PAJEGUMU_RINKA": capacity, "BALANSAVIMO_ENERGIJOS_RINKA": energy}
+
+
+def _trading_section(header, description, purchase, sale=None, cost=0.0, revenue=None, unit="MWh"):
+    section = {
+        "header": header, "description": description,
+        "volume_of_energy_exchange": {"header": "VOLUME OF ENERGY EXCHANGE", "purchase": _value(purchase, unit)},
+        "percentage_of_time": {"header": "% OF TIME", "purchase": _value(min(100.0, purchase / 50), "%")},
+        "potential_cost_revenue": {"header": "POTENTIAL COST & REVENUE", "cost": _value(cost, "tūkst. EUR")}
+    }
+    if sale is not None:
+        section["volume_of_energy_exchange"]["sale"] = _value(sale, unit)
+        section["percentage_of_time"]["sale"] = _value(min(100.0, sale / 50), "%")
+    if revenue is not None:
+        section["potential_cost_revenue"]["revenue"] = _value(revenue, "tūkst. EUR")
+    return section
+
+
+def _economic_results(revenue_by_product, costs, yearly_table, other_costs=None):
+    return {
+        "gross_revenue_by_product": [{"Product": p, "Value (tūkst. EUR)": round(v, 2)}
+                                     for p, v in revenue_by_product.items()],
+        "variable_costs_by_product": [{"Product": p, "Value (tūkst. EUR)": round(v, 2)} for p, v in costs.items()],
+        "other_costs_by_product": [{"Product": p, "Value (tūkst. EUR)": round(v, 2)}
+                                   for p, v in (other_costs or {}).items()],
+        "total_profit": round(sum(revenue_by_product.values()) + sum(costs.values()), 2),
+        "yearly_table": yearly_table
+    }
+
+
+def build_beks_response(request_body):
+    rng = _rng("beks", request_body)
+    q_max = request_body.get("Q_max", 1.0)
+    q_total = request_body.get("Q_total", 2.0)
+    number_of_years = int(request_body.get("number_of_years", 10))
+    rte = request_body.get("RTE", 88.0) / 100
+
+    capex = request_body.get("CAPEX_P", 1000.0) * q_max + request_body.get("CAPEX_C", 500.0) * q_total
+    opex = request_body.get("OPEX_P", 2.52) * q_max * 12 + request_body.get("OPEX_C", 0.5125) * q_total
+    revenue_by_product = {p: q_max * rng.uniform(15, 60) * rte for p in PRODUCTS}
+    revenue_by_product["parduodama ID"] = q_total * request_body.get("N_cycles_ID", 4) * rng.uniform(5, 12) * rte
+    costs = {"perkama DA": -q_total * request_body.get("N_cycles_DA", 1) * rng.uniform(10, 25),
+             "perkama ID": -q_total * request_body.get("N_cycles_ID", 4) * rng.uniform(3, 8)}
+    revenue = sum(revenue_by_product.values()) + sum(costs.values())
+    yearly_table, npv_chart_data = _economics(capex, opex, revenue, request_body.get("discount_rate", 5.0),
+                                              number_of_years)
+
+    markets = _balancing_markets(rng, q_max, PRODUCTS)
+    markets["ELEKTROS_ENERGIJOS_PREKYBA"] = {
+        "Day_Ahead": _trading_section("Day Ahead", "DAY AHEAD MARKET", q_total * 365, q_total * 365 * rte,
+                                      costs["perkama DA"], -costs["perkama DA"] * 1.3),
+        "Intraday": _trading_section("Intraday", "INTRADAY MARKET", q_total * 730, q_total * 730 * rte,
+                                     costs["perkama ID"], revenue_by_product["parduodama ID"])
+    }
+    utilisation = {p: rng.uniform(5, 95) for p in PRODUCTS}
+    return {"aggregated": {
+        "summary": _summary(revenue_by_product, costs, capex, opex, number_of_years, npv_chart_data, utilisation),
+        "markets": markets,
+        "economic_results": _economic_results(revenue_by_product, costs, yearly_table,
+                                              {"aFRRd": -q_max * rng.uniform(0, 5)})
+    }}
+
+
+def build_p2h_response(request_body):
+    rng = _rng("p2h", request_body)
+    q_max_hp = request_body.get("Q_max_HP", 2.0)
+    number_of_years = int(request_body.get("number_of_years", 10))
+    volume_hs = math.pi * (request_body.get("d_HS", 5.0) / 2) ** 2 * request_body.get("H_HS", 12.0)
+
+    capex = request_body.get("CAPEX_HP", 6000.0) * q_max_hp / 10 + request_body.get("CAPEX_HS", 0.1) * volume_hs
+    opex = request_body.get("OPEX_HP", 300.0) * q_max_hp / 10 + request_body.get("OPEX_HS", 0.005) * volume_hs * 12
+    fuel_volume = request_body.get("Q_yearly", 13000000.0) * 1000 / max(request_body.get("q_FUEL", 9550.0), 1.0)
+    boiler_cost = -fuel_volume * request_body.get("P_FUEL", 0.75) / max(request_body.get("eta_BOILER", 98.0) / 100,
+                                                                       0.01) / 1e6
+    savings = -boiler_cost * min(0.5, q_max_hp * rng.uniform(0.03, 0.06))
+    products = [p for p, enabled in request_body.get("produktai", {p: True for p in PRODUCTS}).items() if enabled]
+    revenue_by_product = {p: q_max_hp * rng.uniform(10, 40) for p in products}
+    costs = {"perkama DA": -savings * rng.uniform(0.2, 0.4), "perkama ID": -q_max_hp * rng.uniform(1, 5)}
+    balancing_revenue = sum(revenue_by_product.values())
+    revenue = balancing_revenue + savings + costs["perkama ID"]
+    yearly_table, npv_chart_data = _economics(capex, opex, revenue, request_body.get("discount_rate", 5.0),
+                                              number_of_years)
+
+    markets = _balancing_markets(rng, q_max_hp, products)
+    markets["ELEKTROS_ENERGIJOS_PREKYBA"] = {
+        "Electricity_Consumption": _trading_section("Electricity Consumption", "DAY AHEAD PURCHASES",
+                                                    q_max_hp * 4000, cost=costs["perkama DA"]),
+        "Intraday": _trading_section("Intraday", "INTRADAY MARKET", q_max_hp * 300, q_max_hp * 200,
+                                     costs["perkama ID"], q_max_hp * rng.uniform(1, 4)),
+        "Heat_Generation": _trading_section("Heat Generation", "HEAT PRODUCED BY THE HEAT PUMP", q_max_hp * 12000,
+                                            cost=0.0)
+    }
+    total_finance = {"perkama DA": costs["perkama DA"], "perkama ID": costs["perkama ID"]}
+    total_finance.update({f"{p} CAP": v * 0.6 for p, v in revenue_by_product.items()})
+    total_finance.update({p: v * 0.4 for p, v in revenue_by_product.items() if p != "FCR"})
+    utilisation = {p: rng.uniform(5, 95) for p in products}
+    with_hp_cost = boiler_cost + savings
+
+    return {"aggregated": {
+        "summary": _summary(revenue_by_product, costs, capex, opex, number_of_years, npv_chart_data, utilisation),
+        "markets": markets,
+        "economic_results": _economic_results(revenue_by_product, costs, yearly_table),
+        "yearly": yearly_table,
+        "total_finance": {k: round(v, 2) for k, v in total_finance.items()},
+        "comparison": {
+            "number_of_years": number_of_years,
+            "tik katilas": {"total": round(boiler_cost * number_of_years, 2)},
+            "katilas + šilumos siurblys": {"total": round(with_hp_cost * number_of_years, 2)},
+            "skirtumas": {"total": round(savings * number_of_years, 2)},
+            "balancing_revenue": {"total": round(balancing_revenue * number_of_years, 2)},
+            "benefits": {"total": round((savings + balancing_revenue) * number_of_years, 2)},
+            "comparison_chart_data": {"categories": ["Boiler Only", "Boiler + Heat Pump"],
+                                      "baseline_cost": round(boiler_cost, 2),
+                                      "optimized_cost": round(with_hp_cost, 2),
+                                      "balancing_revenue": round(balancing_revenue, 2)}
+        }
+    }}
+
+
+# Yearly state-of-health loss per electrolyser technology (%)
+SOH_DEGRADATION = {"SOEC": 3.0, "AEL": 1.0, "PEM": 2.0}
+
+
+def build_p2g_response(request_body):
+    rng = _rng("p2g", request_body)
+    q_max = request_body.get("Q_max", 1.0)
+    number_of_years = int(request_body.get("number_of_years", 10))
+    tech = request_body.get("electrolyzer_tech", "SOEC")
+
+    energy_mwh = q_max * 8760 * rng.uniform(0.5, 0.7)
+    h2_kg = energy_mwh * 1000 * request_body.get("eta_H2", 50.0) / 100 / 39.4
+    capex = request_body.get("CAPEX", 2000.0) * q_max
+    opex = request_body.get("OPEX", 16.0) * q_max * 12
+    products = [p for p, enabled in request_body.get("produktai", {p: True for p in PRODUCTS}).items() if enabled]
+    revenue_by_product = {p: q_max * rng.uniform(5, 30) for p in products}
+    revenue_by_product["H2"] = h2_kg * request_body.get("P_H2", 3.5) / 1000
+    costs = {"perkama DA": -energy_mwh * rng.uniform(60, 100) / 1000}
+    revenue = sum(revenue_by_product.values()) + sum(costs.values())
+    yearly_table, npv_chart_data = _economics(capex, opex, revenue, request_body.get("discount_rate", 5.0),
+                                              number_of_years)
+
+    markets = _balancing_markets(rng, q_max, products, energy_unit="GWh")
+    markets["ELEKTROS_ENERGIJOS_PREKYBA"] = {
+        "Day_Ahead": _trading_section("Day Ahead", "Electricity procurement for hydrogen production",
+                                      energy_mwh / 1000, cost=costs["perkama DA"], unit="GWh")
+    }
+    markets["VANDENILIO_PREKYBA"] = {
+        "Hydrogen_Sales": {
+            "header": "Hydrogen Sales", "description": "Revenue from selling produced hydrogen",
+            "volume_of_h2_sold": {"header": "VOLUME OF H2 SOLD", "value": round(h2_kg, 2)},
+            "potential_cost_revenue": {"header": "REVENUE", "revenue": _value(revenue_by_product["H2"], "tūkst. EUR")}
+        }
+    }
+    degradation = SOH_DEGRADATION.get(tech, 2.0)
+    economic_results = _economic_results(revenue_by_product, costs, yearly_table)
+    economic_results["soh_data"] = [{"YEAR": year, "SOH (%)": round(max(0.0, 100 - degradation * year), 2)}
+                                    for year in range(number_of_years + 1)]
+    utilisation = {p: rng.uniform(5, 95) for p in products}
+    return {"aggregated": {
+        "summary": _summary(revenue_by_product, costs, capex, opex, number_of_years, npv_chart_data, utilisation),
+        "markets": markets,
+        "economic_results": economic_results
+    }}
+
+
+def build_dsr_response(request_body):
+    rng = _rng("dsr", request_body)
+    q_avg = request_body.get("Q_avg", 10.0)
+    flexibility = max(request_body.get("Q_max", 15.0) - request_body.get("Q_min", 5.0), 0.0)
+    number_of_years = int(request_body.get("number_of_years", 10))
+
+    capex = request_body.get("CAPEX", 150.0) * flexibility
+    opex = request_body.get("OPEX", 10.0) * flexibility
+    baseline_cost = -q_avg * 8760 * rng.uniform(70, 110) / 1000
+    da_savings = -baseline_cost * rng.uniform(0.02, 0.08)
+    products = [p for p, enabled in request_body.get("produktai", {p: True for p in DSR_PRODUCTS}).items() if enabled]
+    revenue_by_product = {p: flexibility * rng.uniform(5, 25) for p in products}
+    balancing_revenue = sum(revenue_by_product.values())
+    costs = {"perkama DA": baseline_cost + da_savings}
+    yearly_table, npv_chart_data = _economics(capex, opex, da_savings + balancing_revenue,
+                                              request_body.get("discount_rate", 5.0), number_of_years)
+
+    markets = _balancing_markets(rng, flexibility, products)
+    markets["ELEKTROS_ENERGIJOS_PREKYBA"] = {
+        "Day_Ahead": _trading_section("Day Ahead", "DAY AHEAD MARKET", q_avg * 8760, cost=costs["perkama DA"]),
+        "Intraday": _trading_section("Intraday", "INTRADAY MARKET", flexibility * 200, flexibility * 150,
+                                     -flexibility * rng.uniform(1, 3), flexibility * rng.uniform(1, 4))
+    }
+    summary = _summary(revenue_by_product, costs, capex, opex, number_of_years, npv_chart_data,
+                       {p: rng.uniform(5, 95) for p in products})
+    summary["profit_breakdown_chart_data"] = {
+        "categories": ["Project"],
+        "da_savings": round(da_savings, 2),
+        "balancing_revenue": round(balancing_revenue, 2),
+        "capex": round(capex, 2),
+        "opex": round(opex * number_of_years, 2)
+    }
+    optimized_cost = baseline_cost + da_savings
+    return {"aggregated": {
+        "summary": summary,
+        "markets": markets,
+        "economic_results": _economic_results(revenue_by_product, costs, yearly_table),
+        "comparison": {
+            "be DSR": {"label": "Baseline Cost (No DSR)", "value": round(baseline_cost, 2)},
+            "su DSR": {"label": "Optimized Cost (With DSR)", "value": round(optimized_cost, 2)},
+            "skirtumas": {"label": "DSR benefit", "value": round(da_savings + balancing_revenue, 2)},
+            "comparison_chart_data": {
+                "categories": ["Be DSR", "Su DSR"],
+                "baseline_cost": round(baseline_cost, 2),
+                "optimized_cost": round(optimized_cost, 2),
+                "balancing_revenue": round(balancing_revenue, 2)
+            }
+        }
+    }}
+
+
+RESPONSE_BUILDERS = {
+    "beks": build_beks_response,
+    "p2h": build_p2h_response,
+    "p2g": build_p2g_response,
+    "dsr": build_dsr_response,
+}
+
+
+def build_response(endpoint, request_body, pad_kb=0):
+    data = RESPONSE_BUILDERS[endpoint](request_body)
+    if pad_kb:
+        # Unused by the renderers; only inflates the payload for transfer/decoding benchmarks
+        data["padding"] = "x" * (pad_kb * 1024)
+    return data
+
+
+def recording_path(recordings_dir, endpoint, request_body):
+    return os.path.join(recordings_dir, endpoint, f"{make_cache_key(endpoint, request_body)}.json")
+
+
+def save_recording(recordings_dir, endpoint, request_body, status_code, body):
+    path = recording_path(recordings_dir, endpoint, request_body)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"endpoint": endpoint, "request_body": request_body, "status_code": status_code,
+                   "body": body}, f, ensure_ascii=False)
+
+
+def load_recording(recordings_dir, endpoint, request_body):
+    try:
+        with open(recording_path(recordings_dir, endpoint, request_body), encoding="utf-8") as f:
+            recording = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return recording["status_code"], recording["body"]
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    # Configured by serve(); shared by all handler threads
+    config = None
+
+    def do_POST(self):
+        endpoint = self.path.strip("/").split("/")[-1]
+        if endpoint not in ENDPOINTS:
+            self._send_json(404, {"detail": f"Unknown endpoint '{endpoint}'"})
+            return
+
+        secret = self.config.secret
+        if secret and self.headers.get("P2X-APIM-Secret") != secret:
+            self._send_json(401, {"detail": "Invalid P2X-APIM-Secret"})
+            return
+
+        length = int(self.headers.get("Content-Length", 0))
+        form = parse_qs(self.rfile.read(length).decode("utf-8"))
+        try:
+            request_body = json.loads(form["parameters"][0])
+        except (KeyError, IndexError, ValueError):
+            self._send_json(422, {"detail": "Missing or invalid 'parameters' form field"})
+            return
+
+        started = time.perf_counter()
+        status_code, body = self._handle(endpoint, request_body)
+        if status_code == 200 and self.config.stream and STREAM_CONTENT_TYPE in self.headers.get("Accept", ""):
+            self._send_stream(json.loads(body))
+            return
+        self._simulate_latency()
+        # Reported like a real backend would, so clients can split compute from network time
+        self._send_body(status_code, body, compute_seconds=time.perf_counter() - started)
+
+    def _handle(self, endpoint, request_body):
+        config = self.config
+        if config.error_rate and random.random() < config.error_rate:
+            return 503, json.dumps({"detail": "Simulated backend failure"})
+        if config.mode == "record":
+            headers = {}
+            if self.headers.get("P2X-APIM-Secret"):
+                headers["P2X-APIM-Secret"] = self.headers["P2X-APIM-Secret"]
+            # Same timeouts as the app's client, so a stalled upstream cannot hang the stub
+            timeout = (CONNECT_TIMEOUT, READ_TIMEOUTS.get(endpoint, DEFAULT_READ_TIMEOUT))
+            try:
+                response = requests.post(f"{config.upstream}{endpoint}",
+                                         data={"parameters": json.dumps(request_body)}, headers=headers,
+                                         timeout=timeout)
+            except requests.exceptions.Timeout:
+                return 504, json.dumps({"detail": "Upstream did not answer in time"})
+            except requests.exceptions.RequestException as e:
+                return 502, json.dumps({"detail": f"Upstream request failed: {e}"})
+            save_recording(config.recordings_dir, endpoint, request_body, response.status_code, response.text)
+            return response.status_code, response.text
+
+        if config.mode == "replay":
+            recording = load_recording(config.recordings_dir, endpoint, request_body)
+            if recording is not None:
+                return recording
+            if config.strict:
+                return 404, json.dumps({"detail": "No recorded response for this scenario"})
+
+        return 200, json.dumps(build_response(endpoint, request_body, config.pad_kb), ensure_ascii=False)
+
+    def _latency(self):
+        config = self.config
+        if config.mode == "record":
+            return 0.0
+        return config.latency + (random.uniform(-config.jitter, config.jitter) if config.jitter else 0.0)
+
+    def _simulate_latency(self):
+        delay = self._latency()
+        if delay > 0:
+            time.sleep(delay)
+
+    def _send_json(self, status_code, data):
+        self._send_body(status_code, json.dumps(data, ensure_ascii=False))
+
+    def _send_body(self, status_code, body, compute_seconds=None):
+        payload = body.encode("utf-8")
+        accepts_gzip = "gzip" in self.headers.get("Accept-Encoding", "")
+        compress = self.config.gzip and accepts_gzip and len(payload) >= GZIP_MIN_BYTES
+        if compress:
+            payload = gzip.compress(payload)
+        self.send_response(status_code)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        if compress:
+            self.send_header("Content-Encoding", "gzip")
+        if compute_seconds is not None:
+            self.send_header("Server-Timing", f"compute;dur={compute_seconds * 1000:.1f}")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _send_stream(self, data):
+        # One NDJSON line per section, each in its own HTTP/1.1 chunk. The simulated latency is spread
+        # over the sections, as if the backend sent each one as soon as it was calculated.
+        sections = response_sections(data)
+        delay = self._latency() / len(sections) if sections else 0.0
+        accepts_gzip = "gzip" in self.headers.get("Accept-Encoding", "")
+        # Flushed after every line so the client can decompress each section as it arrives
+        compressor = zlib.compressobj(wbits=31) if self.config.gzip and accepts_gzip else None
+        self.protocol_version = "HTTP/1.1"
+        self.send_response(200)
+        self.send_header("Content-Type", f"{STREAM_CONTENT_TYPE}; charset=utf-8")
+        if compressor is not None:
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        for path, value in sections:
+            if delay > 0:
+                time.sleep(delay)
+            chunk = encode_section(path, value)
+            if compressor is not None:
+                chunk = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+            self._send_chunk(chunk)
+        if compressor is not None:
+            self._send_chunk(compressor.flush())
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _send_chunk(self, chunk):
+        # An empty chunk would end the body
+        if chunk:
+            self.wfile.write(f"{len(chunk):X}\r\n".encode("ascii") + chunk + b"\r\n")
+
+    def log_message(self, format, *args):
+        if not self.config.quiet:
+            super().log_message(format, *args)
+
+
+def make_server(config):
+    handler = type("ConfiguredStubHandler", (StubHandler,), {"config": config})
+    return ThreadingHTTPServer((config.host, config.port), handler)
+
+
+def serve_in_background(config):
+    # Used by benchmarks: starts the stub on a daemon thread and returns the server
+    server = make_server(config)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Local stand-in for the P2X calculator backend")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=80)
+    parser.add_argument("--mode", choices=["synthetic", "record", "replay"], default="synthetic")
+    parser.add_argument("--latency", type=float, default=0.0, help="Mean response delay in seconds")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Uniform +/- jitter on the delay in seconds")
+    parser.add_argument("--pad-kb", type=int, default=0, help="Extra payload added to each synthetic response")
+    parser.add_argument("--error-rate", type=float, default=0.0,
+                        help="Fraction of requests answered with 503, to exercise retries and the circuit breaker")
+    parser.add_argument("--upstream", default="https://p2xapim.azure-api.net/P2X/",
+                        help="Backend to forward to in record mode")
+    parser.add_argument("--recordings-dir", default=DEFAULT_RECORDINGS_DIR)
+    parser.add_argument("--strict", action="store_true",
+                        help="In replay mode, return 404 instead of a synthetic response for unknown scenarios")
+    parser.add_argument("--secret", default=None, help="Require this P2X-APIM-Secret header")
+    parser.add_argument("--no-gzip", dest="gzip", action="store_false",
+                        help="Never gzip-encode responses")
+    parser.add_argument("--no-stream", dest="stream", action="store_false",
+                        help="Never stream responses section by section (NDJSON)")
+    parser.add_argument("--quiet", action="store_true")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    config = parse_args()
+    server = make_server(config)
+    print(f"Stub backend ({config.mode}) listening on http://{config.host}:{config.port}/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
@@ -0,0 +1,213 @@
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# No scenario history: nothing is stored and no stale response can be served
+os.environ["P2X_SCENARIO_DB"] = ""
+
+import requests  # noqa: E402
+
+import backend_client  # noqa: E402
+import resilience  # noqa: E402
+from backend_client import BackendClient, BackendError, SingleFlight  # noqa: E402
+from metrics import Metrics  # noqa: E402
+from resilience import StaleResponse, circuit_breaker  # noqa: E402
+from response_cache import ResponseCache, compress_payload, decode_payload  # noqa: E402
+from scenario_store import scenario_store  # noqa: E402
+
+SLOW_SECONDS = 1.0  # Backend compute time, longer than the test read timeout
+JOIN_SECONDS = 0.2  # Time given to the other callers to join a call in flight
+CALLERS = 6
+
+
+class SlowHandler(BaseHTTPRequestHandler):
+    hits = 0
+    status = 200
+    body = b'{"aggregated": {"summary": {}}}'
+
+    def do_POST(self):
+        type(self).hits += 1
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        time.sleep(SLOW_SECONDS)
+        try:
+            self.send_response(self.status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(self.body)))
+            self.end_headers()
+            self.wfile.write(self.body)
+        except OSError:
+            pass  # The client has given up
+
+    def log_message(self, format, *args):
+        pass
+
+
+class BackendTestCase(unittest.TestCase):
+    def setUp(self):
+        SlowHandler.hits = 0
+        # Fresh circuit breakers, so failures of one test do not open the circuit for the next
+        patcher = mock.patch.dict(resilience._breakers, clear=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), SlowHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.client = BackendClient(f"http://127.0.0.1:{self.server.server_port}/")
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class ReadTimeoutTest(BackendTestCase):
+    def test_read_timeout_reaches_backend_once(self):
+        with mock.patch.dict(backend_client.READ_TIMEOUTS, {"beks": 0.2}):
+            with self.assertRaises(requests.exceptions.ReadTimeout):
+                self.client.calculate("beks", {"provider": "ESO"}, use_cache=False)
+        # Let a retried request arrive before counting
+        time.sleep(SLOW_SECONDS / 2)
+        self.assertEqual(SlowHandler.hits, 1)
+
+
+def run_concurrently(function, count=CALLERS):
+    # Results or exceptions of count concurrent calls, in call order
+    def outcome():
+        try:
+            return function()
+        except Exception as e:
+            return e
+    with ThreadPoolExecutor(max_workers=count) as pool:
+        return list(pool.map(lambda _: outcome(), range(count)))
+
+
+class SingleFlightTest(unittest.TestCase):
+    def test_concurrent_calls_share_one_run(self):
+        single_flight = SingleFlight()
+        runs = []
+
+        def slow(value):
+            runs.append(value)
+            time.sleep(JOIN_SECONDS)
+            return value * 2
+
+        results = run_concurrently(lambda: single_flight.do("key", slow, 21))
+        self.assertEqual(runs, [21])
+        self.assertEqual(sorted(results, key=lambda result: result[1]), [(42, False)] + [(42, True)] * (CALLERS - 1))
+
+    def test_exception_reaches_every_caller(self):
+        single_flight = SingleFlight()
+        runs = []
+
+        def failing():
+            runs.append(None)
+            time.sleep(JOIN_SECONDS)
+            raise ValueError("backend down")
+
+        errors = run_concurrently(lambda: single_flight.do("key", failing))
+        self.assertEqual(len(runs), 1)
+        self.assertEqual([type(error) for error in errors], [ValueError] * CALLERS)
+        self.assertEqual({str(error) for error in errors}, {"backend down"})
+
+    def test_keys_are_independent_and_released(self):
+        single_flight = SingleFlight()
+        self.assertEqual(single_flight.do("a", lambda: 1), (1, False))
+        self.assertEqual(single_flight.do("b", lambda: 2), (2, False))
+        # A finished call is not reused: the next call with the same key runs again
+        self.assertEqual(single_flight.do("a", lambda: 3), (3, False))
+        self.assertEqual(single_flight._calls, {})
+
+
+class CoalescingTest(BackendTestCase):
+    def test_identical_requests_make_one_backend_call(self):
+        results = run_concurrently(lambda: self.client.calculate("p2g", {"Q_max": 1.0}, use_cache=False))
+        self.assertEqual(SlowHandler.hits, 1)
+        self.assertEqual([data for data, _ in results], [{"aggregated": {"summary": {}}}] * CALLERS)
+        self.assertEqual(sorted(from_cache for _, from_cache in results), [False] + [True] * (CALLERS - 1))
+        # Every caller gets its own copy of the response
+        self.assertEqual(len({id(data) for data, _ in results}), CALLERS)
+
+    def test_different_requests_are_not_coalesced(self):
+        run_concurrently(lambda: self.client.calculate("p2g", {"Q_max": threading.get_ident()}, use_cache=False),
+                         count=2)
+        self.assertEqual(SlowHandler.hits, 2)
+
+    def test_backend_error_reaches_every_caller(self):
+        with mock.patch.multiple(SlowHandler, status=500, body=b'{"detail": "Optimisation failed"}'):
+            errors = run_concurrently(lambda: self.client.calculate("p2g", {"Q_max": 1.0}, use_cache=False))
+        self.assertEqual(SlowHandler.hits, 1)
+        self.assertEqual([type(error) for error in errors], [BackendError] * CALLERS)
+        self.assertEqual({error.detail for error in errors}, {"Optimisation failed"})
+
+
+class StaleWhileRevalidateTest(BackendTestCase):
+    REQUEST_BODY = {"provider": "ESO", "Sector": "Kita", "Q_max": 1.0}
+    SAVED = {"aggregated": {"summary": {"npv_chart_data": {"npv": [-100.0, 25.5]}}}}
+
+    def setUp(self):
+        super().setUp()
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        # An empty response cache, fresh timers and a scenario database holding an older response
+        for patcher in (mock.patch.multiple(scenario_store, path=os.path.join(tmp.name, "scenarios.sqlite3"),
+                                            _ready=False, _searches={}),
+                        mock.patch.object(backend_client, "response_cache", ResponseCache(disk_dir=None)),
+                        mock.patch.object(backend_client, "metrics", Metrics()),
+                        mock.patch.object(backend_client, "STALE_MIN_WAIT_SECONDS", 0.2)):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        scenario_store.save("beks", self.REQUEST_BODY, compress_payload(json.dumps(self.SAVED).encode("utf-8")),
+                            self.SAVED)
+        scenario_store.flush()
+
+    def calculate(self):
+        return self.client.calculate("beks", self.REQUEST_BODY)
+
+    def assert_refreshed(self, stale):
+        data, from_cache, payload = stale.refresh.result(timeout=5)
+        self.assertEqual(data, {"aggregated": {"summary": {}}})
+        self.assertEqual(decode_payload(backend_client.response_cache.get_payload("beks", self.REQUEST_BODY)),
+                         data)
+        scenario_store.flush()
+        self.assertEqual(self.calculate(), (data, True))
+
+    def test_unusually_slow_call_serves_the_saved_response_and_refreshes_it(self):
+        backend_client.metrics.observe("fetch", "beks", SLOW_SECONDS / 10)
+        started = time.monotonic()
+        data, stale = self.calculate()
+        self.assertLess(time.monotonic() - started, SLOW_SECONDS)
+        self.assertEqual(data, self.SAVED)
+        self.assertIsInstance(stale, StaleResponse)
+        self.assertIn("has not answered within", stale.reason)
+        self.assert_refreshed(stale)
+        self.assertEqual(SlowHandler.hits, 1)
+
+    def test_call_as_slow_as_usual_is_waited_for(self):
+        backend_client.metrics.observe("fetch", "beks", SLOW_SECONDS)
+        self.assertEqual(self.calculate(), ({"aggregated": {"summary": {}}}, False))
+
+    def test_no_response_time_history_waits_for_the_fresh_result(self):
+        self.assertEqual(self.calculate(), ({"aggregated": {"summary": {}}}, False))
+
+    def test_open_circuit_refreshes_once_the_cooldown_ends(self):
+        breaker = circuit_breaker("beks")
+        breaker.cooldown_seconds = JOIN_SECONDS
+        for _ in range(breaker.failure_threshold):
+            breaker.record_failure()
+        (data, stale), (_, other) = self.calculate(), self.calculate()
+        self.assertEqual(data, self.SAVED)
+        self.assertIn("paused", stale.reason)
+        self.assertIs(other.refresh, stale.refresh)
+        self.assert_refreshed(stale)
+        self.assertEqual(breaker.state, "closed")
+        self.assertEqual(SlowHandler.hits, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+import io
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from batch_runner import build_grid, parse_sweep_values, read_scenario_csv  # noqa: E402
+
+BASE_REQUEST_BODY = {"provider": "ESO", "Q_max": 1.0, "Q_total": 2.0, "N_cycles_ID": 4}
+
+
+def read_csv_text(text):
+    return read_scenario_csv(io.StringIO(text), BASE_REQUEST_BODY)
+
+
+class SweepValuesTest(unittest.TestCase):
+    def test_range_is_inclusive(self):
+        self.assertEqual(parse_sweep_values("0.5:2.0:0.5"), [0.5, 1.0, 1.5, 2.0])
+
+    def test_list_and_empty(self):
+        self.assertEqual(parse_sweep_values(" 1, 2.5 ,"), [1.0, 2.5])
+        self.assertEqual(parse_sweep_values("  "), [])
+
+    def test_repeated_values_are_dropped(self):
+        self.assertEqual(parse_sweep_values("1,2,1"), [1.0, 2.0])
+        self.assertEqual(parse_sweep_values("2, 2.0, 3", int), [2, 3])
+
+    def test_invalid_values(self):
+        for text in ("1:2", "2:1:0.5", "1:2:0", "1,abc", "1:x:1", "nan"):
+            with self.subTest(text=text), self.assertRaises(ValueError):
+                parse_sweep_values(text)
+
+    def test_integer_sweep_takes_whole_numbers(self):
+        self.assertEqual(parse_sweep_values("2,4", int), [2, 4])
+        self.assertEqual(parse_sweep_values("1:5:2", int), [1, 3, 5])
+        for text in ("2,4.5", "1:3:0.5"):
+            with self.subTest(text=text), self.assertRaises(ValueError):
+                parse_sweep_values(text, int)
+
+    def test_grid_skips_empty_sweeps(self):
+        grid = build_grid({"Q_max": [1.0, 2.0], "Q_total": [3.0], "RTE": []})
+        self.assertEqual(grid, [{"Q_max": 1.0, "Q_total": 3.0}, {"Q_max": 2.0, "Q_total": 3.0}])
+
+
+class ScenarioCsvTest(unittest.TestCase):
+    def test_rows_keep_base_types(self):
+        rows = read_csv_text("Q_max,N_cycles_ID,provider\n1.5,2,Litgrid\n2,3,ESO\n")
+        self.assertEqual(rows, [{"Q_max": 1.5, "N_cycles_ID": 2, "provider": "Litgrid"},
+                                {"Q_max": 2.0, "N_cycles_ID": 3, "provider": "ESO"}])
+        self.assertIsInstance(rows[0]["N_cycles_ID"], int)
+        self.assertIsInstance(rows[1]["Q_max"], float)
+
+    def test_unknown_column(self):
+        with self.assertRaisesRegex(ValueError, "Unknown parameter columns: Q_min"):
+            read_csv_text("Q_max,Q_min\n1,2\n")
+
+    def test_duplicate_column(self):
+        with self.assertRaisesRegex(ValueError, "Duplicate parameter columns: Q_max"):
+            read_csv_text("Q_max,Q_total,Q_max\n1,2,3\n")
+
+    def test_missing_value(self):
+        with self.assertRaisesRegex(ValueError, "Row 2: missing value for Q_total"):
+            read_csv_text("Q_max,Q_total\n1,2\n1,\n")
+
+    def test_non_numeric_value(self):
+        with self.assertRaisesRegex(ValueError, "Row 1: 'abc' is not a number for Q_max"):
+            read_csv_text("Q_max\nabc\n1\n")
+
+    def test_fractional_integer_parameter(self):
+        with self.assertRaisesRegex(ValueError, "Row 1: N_cycles_ID takes whole numbers"):
+            read_csv_text("N_cycles_ID\n2.5\n")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import stub_backend  # noqa: E402
+from dcf import is_finance_only_change, recalculate_response  # noqa: E402
+
+# Response values are rounded to cents, so recalculated NPVs can differ in the last digits
+TOLERANCE = 0.1
+BASE_REQUEST_BODIES = {
+    "beks": {},
+    "p2h": {},
+    "p2g": {"electrolyzer_tech": "PEM"},
+    "dsr": {},
+}
+FINANCE_CHANGES = [
+    ("discount rate", {"discount_rate": 8.0}),
+    ("shorter horizon", {"number_of_years": 6}),
+    ("both", {"discount_rate": 3.0, "number_of_years": 7}),
+]
+
+
+class RecalculateResponseTest(unittest.TestCase):
+    def assert_close(self, got, want, path="data"):
+        if isinstance(want, dict):
+            self.assertIsInstance(got, dict, path)
+            self.assertEqual(sorted(got), sorted(want), path)
+            for key in want:
+                self.assert_close(got[key], want[key], f"{path}.{key}")
+        elif isinstance(want, list):
+            self.assertIsInstance(got, list, path)
+            self.assertEqual(len(got), len(want), path)
+            for index, (got_item, want_item) in enumerate(zip(got, want)):
+                self.assert_close(got_item, want_item, f"{path}[{index}]")
+        elif isinstance(want, float) and not isinstance(got, bool):
+            self.assertAlmostEqual(got, want, delta=TOLERANCE, msg=path)
+        else:
+            self.assertEqual(got, want, path)
+
+    def test_matches_backend_result(self):
+        for endpoint, body in BASE_REQUEST_BODIES.items():
+            base_request_body = dict(body, discount_rate=5.0, number_of_years=10)
+            data = stub_backend.build_response(endpoint, base_request_body)
+            for change, overrides in FINANCE_CHANGES:
+                request_body = dict(base_request_body, **overrides)
+                with self.subTest(endpoint=endpoint, change=change):
+                    self.assertTrue(is_finance_only_change(base_request_body, request_body))
+                    got = recalculate_response(data, base_request_body, request_body)
+                    self.assert_close(got, stub_backend.build_response(endpoint, request_body))
+
+    def test_longer_horizon_is_left_to_backend(self):
+        base_request_body = {"discount_rate": 5.0, "number_of_years": 10}
+        data = stub_backend.build_response("beks", base_request_body)
+        self.assertIsNone(recalculate_response(data, base_request_body, dict(base_request_body, number_of_years=12)))
+
+    def test_base_response_is_not_modified(self):
+        base_request_body = {"discount_rate": 5.0, "number_of_years": 10}
+        data = stub_backend.build_response("dsr", base_request_body)
+        before = stub_backend.build_response("dsr", base_request_body)
+        recalculate_response(data, base_request_body, dict(base_request_body, number_of_years=5))
+        self.assertEqual(data, before)
+
+
+if __name__ == "__main__":
+    unittest.main()
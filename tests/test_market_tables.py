@@ -0,0 +1,27 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from market_tables import DIRECTIONS, MISSING_VALUE, build_table_html  # noqa: E402
+
+
+class TableCellTest(unittest.TestCase):
+    def test_values_keep_the_spec_or_response_unit(self):
+        table = build_table_html({"upward": {"value": 1.5}, "downward": {"value": 2, "unit": "EUR"}},
+                                 "POTENTIAL REVENUE", None, DIRECTIONS, "power")
+        self.assertIn("<td>1.50 tūkst. EUR</td>", table)
+        self.assertIn("<td>2.00 EUR</td>", table)
+        table = build_table_html({"value": 40.0}, "UTILISATION", "%", DIRECTIONS, "power")
+        self.assertIn("<td>40.00 %</td>", table)
+
+    def test_missing_values_are_not_shown_as_zero(self):
+        table = build_table_html({"upward": {"value": None, "unit": "MW"}, "downward": {}},
+                                 "VOLUME", "MW", DIRECTIONS, "power")
+        self.assertEqual(table.count(f"<td>{MISSING_VALUE}</td>"), 2)
+        self.assertNotIn("0.00", table)
+
+
+if __name__ == "__main__":
+    unittest.main()
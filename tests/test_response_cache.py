@@ -0,0 +1,38 @@
+import os
+import sys
+import tempfile
+import time
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from response_cache import ResponseCache  # noqa: E402
+
+TTL_SECONDS = 60
+
+
+class DiskPromotionTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        ResponseCache(ttl_seconds=TTL_SECONDS, disk_dir=self.tmp.name).set_by_key("key", {"npv": 1.0})
+        # The file was written most of a TTL ago
+        self.written_at = time.time() - TTL_SECONDS + 5
+        path = os.path.join(self.tmp.name, "key.json.gz")
+        os.utime(path, (self.written_at, self.written_at))
+
+    def test_promoted_entry_keeps_file_time(self):
+        cache = ResponseCache(ttl_seconds=TTL_SECONDS, disk_dir=self.tmp.name)
+        self.assertEqual(cache.get_by_key("key"), {"npv": 1.0})
+        self.assertAlmostEqual(cache._entries["key"][0], self.written_at, places=3)
+
+    def test_promoted_entry_expires_with_file(self):
+        cache = ResponseCache(ttl_seconds=TTL_SECONDS, disk_dir=self.tmp.name)
+        self.assertIsNotNone(cache.get_by_key("key"))
+        os.remove(os.path.join(self.tmp.name, "key.json.gz"))
+        cache.ttl_seconds = 10  # Older than this counted from the write, not from the promotion
+        self.assertIsNone(cache.get_by_key("key"))
+
+
+if __name__ == "__main__":
+    unittest.main()
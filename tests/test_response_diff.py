@@ -0,0 +1,52 @@
+import json
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+os.environ["P2X_SCENARIO_DB"] = ""
+
+from streamlit.testing.v1 import AppTest  # noqa: E402
+
+import stub_backend  # noqa: E402
+from response_cache import compress_payload  # noqa: E402
+from scenario_store import scenario_store  # noqa: E402
+
+PANEL_SCRIPT = (f"import sys\nsys.path.insert(0, {ROOT_DIR!r})\n"
+                "from response_diff import render_response_diff\n"
+                "render_response_diff('beks_jobs', 'beks')")
+
+
+class DiffPanelTest(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        # Point the process-wide store at an empty database for this test
+        patcher = mock.patch.multiple(scenario_store, path=os.path.join(tmp.name, "scenarios.sqlite3"),
+                                      _ready=False, _searches={})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        for q_max in (1.0, 2.0):
+            request_body = {"provider": "ESO", "Sector": "Kita", "Q_max": q_max}
+            data = stub_backend.build_response("beks", request_body)
+            payload = compress_payload(json.dumps(data).encode("utf-8"))
+            scenario_store.save("beks", request_body, payload, data)
+        scenario_store.flush()
+
+    def test_reruns_do_not_query_the_store(self):
+        at = AppTest.from_string(PANEL_SCRIPT)
+        at.run()
+        self.assertEqual(len(at.selectbox("beks_diff_a").options), 2)
+        self.assertTrue(at.dataframe)
+        with mock.patch.object(scenario_store, "_connect", wraps=scenario_store._connect) as connect:
+            at.run()
+            at.checkbox("beks_diff_changed").uncheck().run()
+        self.assertEqual(connect.call_count, 0)
+        self.assertFalse(at.exception)
+
+
+if __name__ == "__main__":
+    unittest.main()
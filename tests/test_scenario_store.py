@@ -0,0 +1,51 @@
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from response_cache import compress_payload  # noqa: E402
+from scenario_store import ScenarioStore  # noqa: E402
+
+DATA = {"aggregated": {"summary": {"npv_chart_data": {"npv": [-100.0, 25.5]}}}}
+PAYLOAD = compress_payload(b'{"aggregated": {}}')
+
+
+class ScenarioStoreTest(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.store = ScenarioStore(os.path.join(tmp.name, "scenarios.sqlite3"))
+
+    def save(self, **request_body):
+        self.store.save("beks", dict({"provider": "ESO", "Sector": "Kita", "Q_max": 1.0}, **request_body),
+                        PAYLOAD, DATA)
+
+    def test_save_is_written_off_the_calling_thread(self):
+        with mock.patch.object(self.store, "_write") as write:
+            self.save()
+            self.store.flush()
+        write.assert_called_once()
+        self.assertEqual(write.call_args[0][0][1:6], ("beks", "ESO", "Kita", 1.0, 25.5))
+
+    def test_searches_are_answered_from_memory_until_the_next_save(self):
+        self.save()
+        self.store.flush()
+        with mock.patch.object(self.store, "_connect", wraps=self.store._connect) as connect:
+            first = self.store.search("beks")
+            first[0]["created_at"] = "formatted by the caller"
+            second = self.store.search("beks", provider="ESO")
+            self.assertEqual(self.store.search("beks")[0]["npv"], 25.5)
+            self.assertIsInstance(self.store.search("beks")[0]["created_at"], float)
+            self.assertEqual(connect.call_count, 2)
+            self.save(Q_max=2.0)
+            self.store.flush()
+            self.assertEqual([row["size"] for row in self.store.search("beks")], [2.0, 1.0])
+        self.assertEqual(len(second), 1)
+        self.assertEqual(connect.call_count, 4)  # The save and the search after it
+
+
+if __name__ == "__main__":
+    unittest.main()
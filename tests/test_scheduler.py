@@ -0,0 +1,98 @@
+import os
+import sys
+import threading
+import time
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scheduler import PRIORITY_BACKGROUND, PRIORITY_BATCH, PRIORITY_INTERACTIVE, AdmissionScheduler  # noqa: E402
+
+TOKEN_SECONDS = 0.05  # Token interval once admissions resume, long enough to keep the threads in order
+
+
+class AdmissionOrderTest(unittest.TestCase):
+    def setUp(self):
+        # One token, spent right away: every later ticket waits for the refill
+        self.scheduler = AdmissionScheduler(rate=0.001, burst=1, max_concurrency=0)
+        self.scheduler.acquire()
+        self.admitted = []
+        self.threads = []
+
+    def tearDown(self):
+        for thread in self.threads:
+            thread.join(5)
+
+    def enqueue(self, tag, priority, session_id):
+        # Starts a waiting caller and returns once its ticket is queued, so queue order is deterministic
+        waiting = self.scheduler.waiting()
+
+        def run():
+            self.scheduler.acquire(priority, session_id, tag)
+            self.admitted.append(tag)
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        self.threads.append(thread)
+        deadline = time.monotonic() + 5
+        while self.scheduler.waiting() == waiting and time.monotonic() < deadline:
+            time.sleep(0.001)
+
+    def resume(self):
+        # Tokens come back every TOKEN_SECONDS; release wakes the waiting callers
+        self.scheduler.rate = 1 / TOKEN_SECONDS
+        self.scheduler.release()
+        for thread in self.threads:
+            thread.join(5)
+
+    def test_priority_then_sessions_take_turns(self):
+        self.enqueue("warmup", PRIORITY_BACKGROUND, None)
+        for tag in ("a1", "a2", "a3"):
+            self.enqueue(tag, PRIORITY_BATCH, "session-a")
+        for tag in ("b1", "b2"):
+            self.enqueue(tag, PRIORITY_BATCH, "session-b")
+        self.enqueue("submit", PRIORITY_INTERACTIVE, "session-c")
+        expected = ["submit", "a1", "b1", "a2", "b2", "a3", "warmup"]
+
+        self.assertEqual(self.scheduler.waiting(), len(expected))
+        self.assertEqual([self.scheduler.position(tag) for tag in expected], list(range(1, len(expected) + 1)))
+        self.assertEqual(self.admitted, [])
+        self.resume()
+        self.assertEqual(self.admitted, expected)
+        self.assertEqual(self.scheduler.waiting(), 0)
+        self.assertIsNone(self.scheduler.position("submit"))
+
+    def test_a_busy_session_does_not_hold_back_a_new_one(self):
+        for index in range(4):
+            self.enqueue(f"batch{index}", PRIORITY_BATCH, "session-a")
+        self.enqueue("other", PRIORITY_BATCH, "session-b")
+        self.assertEqual(self.scheduler.position("other"), 2)
+        self.resume()
+        self.assertEqual(self.admitted, ["batch0", "other", "batch1", "batch2", "batch3"])
+
+
+class ConcurrencyLimitTest(unittest.TestCase):
+    def test_slots_bound_calls_in_flight(self):
+        scheduler = AdmissionScheduler(rate=0, max_concurrency=2)
+        in_flight = []
+        peak = []
+        lock = threading.Lock()
+
+        def call():
+            with scheduler.admit():
+                with lock:
+                    in_flight.append(None)
+                    peak.append(len(in_flight))
+                time.sleep(0.02)
+                with lock:
+                    in_flight.pop()
+        threads = [threading.Thread(target=call) for _ in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(5)
+        self.assertEqual(len(peak), 6)
+        self.assertEqual(max(peak), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
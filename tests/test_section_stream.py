@@ -0,0 +1,151 @@
+import os
+import socket
+import sys
+import threading
+import unittest
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ["P2X_SCENARIO_DB"] = ""
+
+import requests  # noqa: E402
+
+import resilience  # noqa: E402
+import stub_backend  # noqa: E402
+from backend_client import BackendClient  # noqa: E402
+from response_cache import decode_payload  # noqa: E402
+from section_stream import (STREAM_CONTENT_TYPE, TruncatedStreamError, assemble_sections, encode_section,  # noqa: E402
+                            read_sections, response_sections)
+
+REQUEST_BODY = {"provider": "ESO", "Q_max": 1.0}
+FIRST_SECTION = ["aggregated", "summary"]
+
+
+def gzip_lines(lines):
+    # Each line compressed and flushed on its own, as a streaming backend sends them
+    compressor = zlib.compressobj(wbits=31)
+    chunks = [compressor.compress(line) + compressor.flush(zlib.Z_SYNC_FLUSH) for line in lines]
+    return chunks + [compressor.flush()]
+
+
+def gunzip_chunks(chunks):
+    decompressor = zlib.decompressobj(wbits=31)
+    for chunk in chunks:
+        yield decompressor.decompress(chunk)
+
+
+class ReadSectionsTest(unittest.TestCase):
+    def setUp(self):
+        self.data = stub_backend.build_response("p2h", REQUEST_BODY)
+        self.lines = [encode_section(path, value) for path, value in response_sections(self.data)]
+
+    def test_summary_first_and_markets_last(self):
+        paths = [path for path, _ in response_sections(self.data)]
+        self.assertEqual(paths[0], FIRST_SECTION)
+        self.assertEqual(paths[-1], ["aggregated", "markets"])
+
+    def test_any_chunking_gives_the_same_response(self):
+        body = b"".join(self.lines)
+        for size in (1, 7, 4096, len(body)):
+            with self.subTest(chunk_size=size):
+                chunks = [body[start:start + size] for start in range(0, len(body), size)]
+                self.assertEqual(assemble_sections(read_sections(chunks)), self.data)
+
+    def test_gzip_ndjson(self):
+        sections = read_sections(gunzip_chunks(gzip_lines(self.lines)))
+        self.assertEqual(next(sections)[0], FIRST_SECTION)
+        self.assertEqual(assemble_sections([(FIRST_SECTION, self.data["aggregated"]["summary"])] + list(sections)),
+                         self.data)
+
+    def test_final_line_without_newline(self):
+        chunks = [b'{"path": ["a"], "value": 1}\n{"path": ["b", "c"], "value": [2]}']
+        self.assertEqual(assemble_sections(read_sections(chunks)), {"a": 1, "b": {"c": [2]}})
+
+    def test_truncated_final_line(self):
+        body = b"".join(self.lines)
+        sections = read_sections([body[:len(self.lines[0]) + 20]])
+        self.assertEqual(next(sections)[0], FIRST_SECTION)
+        with self.assertRaises(TruncatedStreamError):
+            next(sections)
+
+
+class TruncatingHandler(BaseHTTPRequestHandler):
+    # Sends the first section and part of the second, then ends the body (or drops the connection)
+    protocol_version = "HTTP/1.1"
+    drop_connection = False
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        lines = [encode_section(path, value) for path, value in
+                 response_sections(stub_backend.build_response("beks", REQUEST_BODY))]
+        self.send_response(200)
+        self.send_header("Content-Type", STREAM_CONTENT_TYPE)
+        self.send_header("Transfer-Encoding", "chunked")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        for chunk in (lines[0], lines[1][:10]):
+            self.wfile.write(f"{len(chunk):X}\r\n".encode("ascii") + chunk + b"\r\n")
+        self.wfile.flush()
+        if self.drop_connection:
+            self.connection.shutdown(socket.SHUT_RDWR)
+        else:
+            self.wfile.write(b"0\r\n\r\n")
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StreamedResponseTest(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch.dict(resilience._breakers, clear=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def serve(self, server):
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        return BackendClient(f"http://127.0.0.1:{server.server_port}/")
+
+    def serve_stub(self, *options):
+        config = stub_backend.parse_args(["--host", "127.0.0.1", "--port", "0", "--quiet", *options])
+        return self.serve(stub_backend.make_server(config))
+
+    def calculate(self, client):
+        sections = []
+        data, from_cache, payload = client.calculate_with_payload(
+            "beks", REQUEST_BODY, use_cache=False, on_section=lambda path, value: sections.append(path))
+        self.assertFalse(from_cache)
+        self.assertEqual(decode_payload(payload), data)
+        return data, sections
+
+    def test_gzip_stream(self):
+        data, sections = self.calculate(self.serve_stub())
+        self.assertEqual(data, stub_backend.build_response("beks", REQUEST_BODY))
+        self.assertEqual(sections[0], FIRST_SECTION)
+        self.assertEqual(len(sections), len(response_sections(data)))
+
+    def test_uncompressed_stream(self):
+        data, sections = self.calculate(self.serve_stub("--no-gzip"))
+        self.assertEqual(data, stub_backend.build_response("beks", REQUEST_BODY))
+        self.assertEqual(sections[0], FIRST_SECTION)
+
+    def test_fallback_to_single_document(self):
+        # A backend that ignores the Accept header: one JSON body and no sections reported
+        data, sections = self.calculate(self.serve_stub("--no-stream"))
+        self.assertEqual(data, stub_backend.build_response("beks", REQUEST_BODY))
+        self.assertEqual(sections, [])
+
+    def test_truncated_stream_is_a_request_error(self):
+        for drop_connection in (False, True):
+            with self.subTest(drop_connection=drop_connection):
+                with mock.patch.object(TruncatingHandler, "drop_connection", drop_connection):
+                    client = self.serve(ThreadingHTTPServer(("127.0.0.1", 0), TruncatingHandler))
+                    with self.assertRaises(requests.exceptions.ChunkedEncodingError):
+                        self.calculate(client)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+import os
+import sys
+import unittest
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+os.environ["P2X_SCENARIO_DB"] = ""
+
+from streamlit.testing.v1 import AppTest  # noqa: E402
+
+from response_cache import make_cache_key  # noqa: E402
+from sensitivity import (SENSITIVITY_PARAMETERS, build_tornado_figure, perturb, plan_sensitivity,  # noqa: E402
+                         sensitivity_table)
+
+P2H_REQUEST_BODY = {"P_FUEL": 0.75, "CAPEX_HP": 700.0, "discount_rate": 5.0, "number_of_years": 10}
+P2H_LABELS = dict(SENSITIVITY_PARAMETERS["p2h"])
+
+
+class PlanTest(unittest.TestCase):
+    def test_base_case_first_then_low_and_high(self):
+        cases, requests_by_key = plan_sensitivity("p2h", P2H_REQUEST_BODY, ["P_FUEL", "CAPEX_HP"], 10.0)
+        self.assertEqual(cases[0], (None, 0, None, make_cache_key("p2h", P2H_REQUEST_BODY)))
+        self.assertEqual([(parameter, direction, value) for parameter, direction, value, _ in cases[1:]],
+                         [("P_FUEL", -1, 0.675), ("P_FUEL", 1, 0.825), ("CAPEX_HP", -1, 630.0), ("CAPEX_HP", 1, 770.0)])
+        self.assertEqual(len(requests_by_key), 5)
+        self.assertEqual(requests_by_key[cases[1][3]], dict(P2H_REQUEST_BODY, P_FUEL=0.675))
+
+    def test_integer_parameters_stay_whole_and_positive(self):
+        self.assertEqual(perturb(10, 10.0, -1), 9)
+        self.assertIsInstance(perturb(10, 10.0, 1), int)
+        self.assertEqual(perturb(1, 60.0, -1), 1)
+
+    def test_perturbations_that_round_back_are_calculated_once(self):
+        request_body = dict(P2H_REQUEST_BODY, number_of_years=1)
+        cases, requests_by_key = plan_sensitivity("p2h", request_body, ["number_of_years"], 10.0)
+        self.assertEqual({key for _, _, _, key in cases}, {cases[0][3]})
+        self.assertEqual(len(requests_by_key), 1)
+
+    def test_repeated_parameters_share_requests(self):
+        cases, requests_by_key = plan_sensitivity("p2h", P2H_REQUEST_BODY, ["P_FUEL", "P_FUEL"], 10.0)
+        self.assertEqual(len(cases), 5)
+        self.assertEqual(len(requests_by_key), 3)
+        _, table = sensitivity_table(cases, {key: 0.0 for key in requests_by_key}, P2H_LABELS)
+        self.assertEqual(len(table), 1)
+
+
+class FuelPriceAxisTest(unittest.TestCase):
+    def setUp(self):
+        # A dearer fuel makes the heat pump more profitable
+        cases, requests_by_key = plan_sensitivity("p2h", P2H_REQUEST_BODY, ["P_FUEL"], 10.0)
+        npv_by_key = {key: 1000.0 + 400.0 * (request_body["P_FUEL"] - 0.75) / 0.075
+                      for key, request_body in requests_by_key.items()}
+        self.base_npv, self.table = sensitivity_table(cases, npv_by_key, P2H_LABELS)
+
+    def test_delta_sign_follows_direction(self):
+        row = self.table.iloc[0]
+        self.assertEqual(self.base_npv, 1000.0)
+        self.assertEqual(row["Low value"], 0.675)
+        self.assertAlmostEqual(row["Low ΔNPV"], -400.0)
+        self.assertEqual(row["High value"], 0.825)
+        self.assertAlmostEqual(row["High ΔNPV"], 400.0)
+        self.assertAlmostEqual(row["Swing"], 800.0)
+
+    def test_tornado_bars_and_unit(self):
+        fig = build_tornado_figure(self.table, self.base_npv, 10.0)
+        low, high = fig.data
+        self.assertEqual((low.name, high.name), ("-10%", "+10%"))
+        self.assertEqual(list(low.y), ["P_FUEL (EUR/nm³)"])
+        self.assertLess(low.x[0], 0)
+        self.assertGreater(high.x[0], 0)
+        # Hover shows the perturbed price in the form's unit, not converted
+        self.assertEqual(list(low.customdata), [0.675])
+
+
+class FormUnitTest(unittest.TestCase):
+    def test_labels_match_calculator_forms(self):
+        for endpoint, parameters in SENSITIVITY_PARAMETERS.items():
+            at = AppTest.from_string(
+                f"import sys\nsys.path.insert(0, {ROOT_DIR!r})\n"
+                f"from {endpoint}_calculator import render_{endpoint}_calculator\n"
+                f"render_{endpoint}_calculator('http://127.0.0.1:1/', True, 'test')")
+            at.run()
+            form_labels = {widget.label.split(" ")[0]: widget.label for widget in at.number_input}
+            for key, label in parameters:
+                with self.subTest(endpoint=endpoint, parameter=key):
+                    # Some forms spell the unit "Eur"
+                    self.assertEqual(form_labels[key].casefold(), label.casefold())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,41 @@
+import importlib
+import os
+import sys
+import unittest
+from unittest import mock
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+os.environ["P2X_SCENARIO_DB"] = ""
+
+from streamlit.testing.v1 import AppTest  # noqa: E402
+
+from warmup import DEFAULT_REQUEST_BODIES  # noqa: E402
+
+
+class DefaultRequestBodiesTest(unittest.TestCase):
+    def submitted_request_body(self, endpoint):
+        # The request body the calculator form submits when nothing has been changed
+        module = importlib.import_module(f"{endpoint}_calculator")
+        submitted = []
+        with mock.patch.object(module, "submit_job", lambda session_key, client, endpoint, request_body:
+                               submitted.append(request_body)):
+            at = AppTest.from_string(f"import sys\nsys.path.insert(0, {ROOT_DIR!r})\n"
+                                     f"from {endpoint}_calculator import render_{endpoint}_calculator\n"
+                                     f"render_{endpoint}_calculator('http://127.0.0.1:1/', True, 'test')")
+            at.run()
+            next(button for button in at.button if button.label == "Submit").click()
+            at.run()
+        self.assertFalse(at.exception)
+        self.assertEqual(len(submitted), 1)
+        return submitted[0]
+
+    def test_warmup_bodies_match_form_defaults(self):
+        for endpoint, request_body in DEFAULT_REQUEST_BODIES.items():
+            with self.subTest(endpoint=endpoint):
+                # Any difference, including a missing or extra key, gives another cache key
+                self.assertEqual(self.submitted_request_body(endpoint), request_body)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,10 @@
+# Backend timeouts in seconds: (connect, read). Optimisations differ a lot in runtime per endpoint.
+# Kept free of other imports so the standalone stub backend can share them with the app's client.
+CONNECT_TIMEOUT = 10
+READ_TIMEOUTS = {
+    "beks": 120,
+    "p2h": 300,
+    "p2g": 180,
+    "dsr": 300,
+}
+DEFAULT_READ_TIMEOUT = 300
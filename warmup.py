@@ -0,0 +1,84 @@
+import threading
+
+from batch_runner import apply_overrides, run_batch
+from response_cache import response_cache
+from scheduler import PRIORITY_BACKGROUND
+
+# Background pre-fetch of the scenarios most sessions start with, so a first default submit
+# is a cache hit. Runs at most WARMUP_MAX_WORKERS requests at a time next to user traffic.
+WARMUP_MAX_WORKERS = 2
+
+# Request bodies the forms send with their default values; tests/test_warmup.py submits each form
+# with its defaults and fails when they drift apart
+DEFAULT_REQUEST_BODIES = {
+    "beks": {
+        "provider": "ESO", "RTE": 88.0, "Q_max": 1.0, "Q_total": 2.0, "SOC_min": 10.0, "SOC_max": 95.0,
+        "N_cycles_DA": 1, "N_cycles_ID": 4, "reaction_time": 300, "CAPEX_P": 1000.0, "CAPEX_C": 500.0,
+        "OPEX_P": 2.52, "OPEX_C": 0.5125, "discount_rate": 5.0, "number_of_years": 10, "P_FCR_CAP_BSP": 0.0,
+        "P_aFRRu_CAP_BSP": 0.0, "P_aFRRd_CAP_BSP": 0.0, "P_mFRRu_CAP_BSP": 0.0, "P_mFRRd_CAP_BSP": 0.0,
+        "P_aFRRu_BSP": 0.0, "P_aFRRd_BSP": 0.0, "P_mFRRu_BSP": 0.0, "P_mFRRd_BSP": 0.0, "Sector": "Paslaugų"
+    },
+    "p2h": {
+        "provider": "ESO", "Q_max_HP": 2.0, "reaction_time_u": 300, "reaction_time_d": 0, "T_HP": -10.0,
+        "Q_max_BOILER": 3.0, "P_FUEL": 0.75, "q_FUEL": 9550.0, "eta_BOILER": 98.0, "d_HS": 5.0, "H_HS": 12.0,
+        "T_max_HS": 85.0, "lambda_HS": 0.032, "dx_HS": 0.25, "CAPEX_HP": 6000.0, "CAPEX_HS": 0.1, "OPEX_HP": 300.0,
+        "OPEX_HS": 0.005, "discount_rate": 5.0, "number_of_years": 10, "P_FCR_CAP_BSP": 0.0,
+        "P_aFRRu_CAP_BSP": 0.0, "P_aFRRd_CAP_BSP": 0.0, "P_mFRRu_CAP_BSP": 0.0, "P_mFRRd_CAP_BSP": 0.0,
+        "P_aFRRu_BSP": 0.0, "P_aFRRd_BSP": 0.0, "P_mFRRu_BSP": 0.0, "P_mFRRd_BSP": 0.0, "Sector": "Paslaugų",
+        "County": "kaunas", "Q_yearly": 13000000.0,
+        "produktai": {"FCR": False, "aFRRd": False, "aFRRu": True, "mFRRd": False, "mFRRu": True}
+    },
+    "p2g": {
+        "Q_max": 1.0, "P_H2": 3.5, "electrolyzer_tech": "SOEC", "eta_H2": 50.0, "reaction_time_d": 0,
+        "reaction_time_u": 30, "T0": 80.0, "p0": 30.0, "eta_C": 80.0, "CAPEX": 2000.0, "OPEX": 16.0,
+        "discount_rate": 5.0, "number_of_years": 10, "P_FCR_CAP_BSP": 0.0, "P_aFRRu_CAP_BSP": 0.0,
+        "P_aFRRd_CAP_BSP": 0.0, "P_mFRRu_CAP_BSP": 0.0, "P_mFRRd_CAP_BSP": 0.0, "P_aFRRu_BSP": 0.0,
+        "P_aFRRd_BSP": 0.0, "P_mFRRu_BSP": 0.0, "P_mFRRd_BSP": 0.0, "provider": "Litgrid", "Sector": "Paslaugų",
+        "produktai": {"FCR": False, "aFRRd": False, "aFRRu": True, "mFRRd": False, "mFRRu": True}
+    },
+    "dsr": {
+        "Q_avg": 10.0, "Q_min": 5.0, "Q_max": 15.0, "reaction_time_d": 0, "reaction_time_u": 300, "T_shift": 1,
+        "CAPEX": 150.0, "OPEX": 10.0, "discount_rate": 5.0, "number_of_years": 10, "provider": "Litgrid",
+        "Sector": "Pramonės", "P_aFRRu_CAP_BSP": 0.0, "P_aFRRd_CAP_BSP": 0.0, "P_mFRRu_CAP_BSP": 0.0,
+        "P_mFRRd_CAP_BSP": 0.0, "P_aFRRu_BSP": 0.0, "P_aFRRd_BSP": 0.0, "P_mFRRu_BSP": 0.0, "P_mFRRd_BSP": 0.0,
+        "produktai": {"aFRRu": True, "aFRRd": False, "mFRRu": True, "mFRRd": False},
+        "restoration_investment_needed": False, "restoration_investment_percentage": 0.0,
+        "restoration_working_hours": 0
+    },
+}
+
+# Scenarios to pre-fetch per calculator, as overrides of the default request body
+WARMUP_SCENARIOS = {
+    "beks": [{"provider": "ESO"}, {"provider": "Litgrid"}],
+    "p2h": [{"provider": "ESO"}, {"provider": "Litgrid"}],
+    "p2g": [{"provider": "ESO"}, {"provider": "Litgrid"}],
+    "dsr": [{"provider": "ESO"}, {"provider": "Litgrid"}],
+}
+
+
+def warmup_requests(scenarios=WARMUP_SCENARIOS):
+    # [(endpoint, request body)] of the configured scenarios that are not cached yet
+    requests_to_fetch = []
+    for endpoint, overrides_list in scenarios.items():
+        for overrides in overrides_list:
+            request_body = apply_overrides(DEFAULT_REQUEST_BODIES[endpoint], overrides)
+            if response_cache.get_payload(endpoint, request_body) is None:
+                requests_to_fetch.append((endpoint, request_body))
+    return requests_to_fetch
+
+
+def warm_cache(client, scenarios=WARMUP_SCENARIOS):
+    # Failures are ignored: the scenario is simply calculated on the first real submit
+    by_endpoint = {}
+    for endpoint, request_body in warmup_requests(scenarios):
+        by_endpoint.setdefault(endpoint, []).append(request_body)
+    for endpoint, request_bodies in by_endpoint.items():
+        for _ in run_batch(client, endpoint, request_bodies, max_workers=WARMUP_MAX_WORKERS,
+                           priority=PRIORITY_BACKGROUND):
+            pass
+
+
+def start_warmup(client, scenarios=WARMUP_SCENARIOS):
+    thread = threading.Thread(target=warm_cache, args=(client, scenarios), name="cache-warmup", daemon=True)
+    thread.start()
+    return thread